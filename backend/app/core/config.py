@@ -0,0 +1,175 @@
+import os
+from typing import List
+
+# --- Application Settings ---
+# Values are read from environment variables (and the .env file loaded in main.py) at import time.
+# main.py calls load_dotenv() before importing the routers/services, so .env overrides are visible here.
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_list(name: str, default: List[str]) -> List[str]:
+    """Comma-separated list; an empty item stands for an empty string (e.g. the unfiltered search)."""
+    value = os.getenv(name)
+    if value is None:
+        return list(default)
+    return [item.strip() for item in value.split(",")]
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# --- Result Cache ---
+# `ttl` is how long an entry is served as fresh. After that it is served stale for up to `stale_ttl`
+# more seconds while a background refresh runs (stale-while-revalidate).
+SEARCH_CACHE_TTL_SECONDS = _env_float("HF_SEARCH_CACHE_TTL_SECONDS", 60.0)
+SEARCH_CACHE_STALE_TTL_SECONDS = _env_float("HF_SEARCH_CACHE_STALE_TTL_SECONDS", 300.0)
+SEARCH_CACHE_MAX_ENTRIES = _env_int("HF_SEARCH_CACHE_MAX_ENTRIES", 2048)
+SEARCH_CACHE_MAX_BYTES = _env_int("HF_SEARCH_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+
+DETAILS_CACHE_TTL_SECONDS = _env_float("HF_DETAILS_CACHE_TTL_SECONDS", 600.0)
+DETAILS_CACHE_STALE_TTL_SECONDS = _env_float("HF_DETAILS_CACHE_STALE_TTL_SECONDS", 3600.0)
+DETAILS_CACHE_MAX_ENTRIES = _env_int("HF_DETAILS_CACHE_MAX_ENTRIES", 1024)
+DETAILS_CACHE_MAX_BYTES = _env_int("HF_DETAILS_CACHE_MAX_BYTES", 128 * 1024 * 1024)
+
+# READMEs (as served by /api/models/{author}/{name}/readme, and reused for details) have the details TTLs.
+# Rendered HTML is cached by the README's content hash, so it never goes stale, only out of the LRU.
+README_CACHE_MAX_ENTRIES = _env_int("HF_README_CACHE_MAX_ENTRIES", 1024)
+README_CACHE_MAX_BYTES = _env_int("HF_README_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+README_HTML_CACHE_MAX_ENTRIES = _env_int("HF_README_HTML_CACHE_MAX_ENTRIES", 1024)
+README_HTML_CACHE_MAX_BYTES = _env_int("HF_README_HTML_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+
+# Stale-if-error: when the Hub is throttling us or unavailable, expired entries keep being served for this long
+# past their stale window instead of failing the request.
+SEARCH_CACHE_STALE_IF_ERROR_SECONDS = _env_float("HF_SEARCH_CACHE_STALE_IF_ERROR_SECONDS", 3600.0)
+DETAILS_CACHE_STALE_IF_ERROR_SECONDS = _env_float("HF_DETAILS_CACHE_STALE_IF_ERROR_SECONDS", 24 * 3600.0)
+
+# --- Shared Result Cache ---
+# Each uvicorn worker has its own in-memory caches, so N workers ask the Hub for the same things up to N times.
+# HF_CACHE_BACKEND=sqlite (a local file, for workers on one host) or redis (HF_CACHE_REDIS_URL, any
+# Redis-protocol server) keeps the search, details, README and GGUF header caches where every worker sees them,
+# and lets one worker at a time load a missing entry while the others wait for it. "memory" is per process.
+# Shared entries are msgpack-encoded plain data; entries in any other format are ignored.
+CACHE_BACKEND = (os.getenv("HF_CACHE_BACKEND") or "memory").strip().lower()
+CACHE_SQLITE_PATH = os.getenv("HF_CACHE_SQLITE_PATH") or "hf_result_cache.db"
+CACHE_SQLITE_MAX_BYTES = _env_int("HF_CACHE_SQLITE_MAX_BYTES", 1024 * 1024 * 1024)
+CACHE_SQLITE_MMAP_BYTES = _env_int("HF_CACHE_SQLITE_MMAP_BYTES", 256 * 1024 * 1024)
+CACHE_REDIS_URL = os.getenv("HF_CACHE_REDIS_URL") or "redis://localhost:6379/0"
+# Prepended to every shared key; change it to start from an empty cache, or to share one server between deployments.
+CACHE_KEY_PREFIX = os.getenv("HF_CACHE_KEY_PREFIX") or "hfsearch:v1:"
+# How long a worker loading an entry holds its lock at most, and how often the others check for the result.
+CACHE_LOCK_TIMEOUT_SECONDS = _env_float("HF_CACHE_LOCK_TIMEOUT_SECONDS", 30.0)
+CACHE_LOCK_POLL_SECONDS = _env_float("HF_CACHE_LOCK_POLL_SECONDS", 0.05)
+
+# --- Local Catalogue Mirror ---
+# Set HF_MIRROR_DB_PATH to keep a local SQLite copy of the Hub model catalogue and answer searches from it.
+MIRROR_DB_PATH = os.getenv("HF_MIRROR_DB_PATH") or None
+MIRROR_SYNC_ENABLED = _env_bool("HF_MIRROR_SYNC_ENABLED", True)
+MIRROR_SYNC_INTERVAL_SECONDS = _env_float("HF_MIRROR_SYNC_INTERVAL_SECONDS", 900.0)
+MIRROR_FULL_SYNC_INTERVAL_SECONDS = _env_float("HF_MIRROR_FULL_SYNC_INTERVAL_SECONDS", 24 * 3600.0)
+
+# --- Hub HTTP Client ---
+HUB_HTTP_TIMEOUT_SECONDS = _env_float("HF_HUB_HTTP_TIMEOUT_SECONDS", 15.0)
+HUB_HTTP_CONNECT_TIMEOUT_SECONDS = _env_float("HF_HUB_HTTP_CONNECT_TIMEOUT_SECONDS", 5.0)
+HUB_HTTP_MAX_CONNECTIONS = _env_int("HF_HUB_HTTP_MAX_CONNECTIONS", 100)
+HUB_HTTP_MAX_KEEPALIVE_CONNECTIONS = _env_int("HF_HUB_HTTP_MAX_KEEPALIVE_CONNECTIONS", 50)
+HUB_HTTP_PER_HOST_CONCURRENCY = _env_int("HF_HUB_HTTP_PER_HOST_CONCURRENCY", 256)
+HUB_HTTP_MAX_RETRIES = _env_int("HF_HUB_HTTP_MAX_RETRIES", 3)
+HUB_HTTP_RETRY_BACKOFF_SECONDS = _env_float("HF_HUB_HTTP_RETRY_BACKOFF_SECONDS", 0.5)
+HUB_HTTP2_ENABLED = _env_bool("HF_HUB_HTTP2_ENABLED", True)
+# Bodies and ETag/Last-Modified of recent model info and README responses, kept so refetches are sent as
+# conditional requests (If-None-Match / If-Modified-Since) and an unchanged model costs a 304.
+HUB_CONDITIONAL_CACHE_MAX_BYTES = _env_int("HF_HUB_CONDITIONAL_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+
+# --- Hub Rate-Limit Scheduler ---
+# Every outbound Hub call takes a token from its credential's bucket (RATE_LIMIT_PER_SECOND, bursts up to
+# RATE_LIMIT_BURST; 0 disables scheduling). Queued calls are released by priority: interactive search, then
+# details, then background prefetch/sync. A call that can't get a token within its class's max wait is shed.
+# A 429 pauses the credential for its Retry-After (or DEFAULT_PAUSE_SECONDS without one).
+HUB_RATE_LIMIT_PER_SECOND = _env_float("HF_HUB_RATE_LIMIT_PER_SECOND", 20.0)
+HUB_RATE_LIMIT_BURST = _env_int("HF_HUB_RATE_LIMIT_BURST", 40)
+HUB_RATE_LIMIT_DEFAULT_PAUSE_SECONDS = _env_float("HF_HUB_RATE_LIMIT_DEFAULT_PAUSE_SECONDS", 5.0)
+HUB_SCHEDULER_MAX_WAIT_INTERACTIVE_SECONDS = _env_float("HF_HUB_SCHEDULER_MAX_WAIT_INTERACTIVE_SECONDS", 5.0)
+HUB_SCHEDULER_MAX_WAIT_DETAIL_SECONDS = _env_float("HF_HUB_SCHEDULER_MAX_WAIT_DETAIL_SECONDS", 10.0)
+HUB_SCHEDULER_MAX_WAIT_BACKGROUND_SECONDS = _env_float("HF_HUB_SCHEDULER_MAX_WAIT_BACKGROUND_SECONDS", 120.0)
+
+# --- Batch Model Details ---
+BATCH_DETAILS_CONCURRENCY = _env_int("HF_BATCH_DETAILS_CONCURRENCY", 8)
+
+# --- Streaming Search ---
+# Items fetched from the Hub (or mirror) per chunk while streaming; bounds per-stream memory.
+SEARCH_STREAM_CHUNK_SIZE = _env_int("HF_SEARCH_STREAM_CHUNK_SIZE", 50)
+
+# --- GGUF Header Parsing ---
+# Model details read the metadata header of each .gguf file with HTTP Range requests (never the tensor data).
+# Reads start at INITIAL_BYTES and grow until the header fits; files with larger headers are left unparsed.
+# Headers without a tokenizer vocabulary (split-file shards, small models) fit in the first read; big vocabularies
+# take a few more.
+GGUF_HEADER_PARSING_ENABLED = _env_bool("HF_GGUF_HEADER_PARSING_ENABLED", True)
+GGUF_HEADER_INITIAL_BYTES = _env_int("HF_GGUF_HEADER_INITIAL_BYTES", 256 * 1024)
+GGUF_HEADER_MAX_BYTES = _env_int("HF_GGUF_HEADER_MAX_BYTES", 64 * 1024 * 1024)
+GGUF_HEADER_CONCURRENCY = _env_int("HF_GGUF_HEADER_CONCURRENCY", 4)
+# How long a details request waits for headers before answering with filename-based info; parsing carries on
+# in the background and later requests pick up the result.
+GGUF_HEADER_TIMEOUT_SECONDS = _env_float("HF_GGUF_HEADER_TIMEOUT_SECONDS", 10.0)
+# Parsed headers are keyed by the file's LFS sha256 / git blob id, so entries never go stale.
+GGUF_HEADER_CACHE_TTL_SECONDS = _env_float("HF_GGUF_HEADER_CACHE_TTL_SECONDS", 30 * 24 * 3600.0)
+GGUF_HEADER_CACHE_MAX_ENTRIES = _env_int("HF_GGUF_HEADER_CACHE_MAX_ENTRIES", 8192)
+
+# --- Autocomplete ---
+# Suggestions come from an in-memory prefix index rebuilt in the background (from the mirror when it's ready,
+# otherwise from the AUTOCOMPLETE_HUB_MODEL_LIMIT most downloaded models). Lowest ranked suggestions are dropped
+# to stay within the memory budget.
+AUTOCOMPLETE_ENABLED = _env_bool("HF_AUTOCOMPLETE_ENABLED", True)
+AUTOCOMPLETE_REBUILD_INTERVAL_SECONDS = _env_float("HF_AUTOCOMPLETE_REBUILD_INTERVAL_SECONDS", 3600.0)
+AUTOCOMPLETE_MEMORY_BUDGET_BYTES = _env_int("HF_AUTOCOMPLETE_MEMORY_BUDGET_BYTES", 128 * 1024 * 1024)
+AUTOCOMPLETE_HUB_MODEL_LIMIT = _env_int("HF_AUTOCOMPLETE_HUB_MODEL_LIMIT", 20000)
+
+# --- Prefetching and Warm-up ---
+# After a search response is sent, the next page and the details of the top results are loaded into the caches
+# in the background. Prefetches are dropped rather than queued once PREFETCH_MAX_PENDING are waiting, and at most
+# PREFETCH_BUDGET_PER_MINUTE of them may go upstream per minute.
+PREFETCH_ENABLED = _env_bool("HF_PREFETCH_ENABLED", True)
+PREFETCH_CONCURRENCY = _env_int("HF_PREFETCH_CONCURRENCY", 2)
+PREFETCH_MAX_PENDING = _env_int("HF_PREFETCH_MAX_PENDING", 32)
+PREFETCH_BUDGET_PER_MINUTE = _env_int("HF_PREFETCH_BUDGET_PER_MINUTE", 120)
+PREFETCH_TOP_K_DETAILS = _env_int("HF_PREFETCH_TOP_K_DETAILS", 3)
+# Searches run at startup so the first users after a deploy hit a warm cache ("" is the unfiltered listing).
+# Results are requested like the frontend does: page 1, PREFETCH_WARMUP_PAGE_SIZE items, sorted by downloads.
+PREFETCH_WARMUP_QUERIES = _env_list("HF_PREFETCH_WARMUP_QUERIES", ["", "llama", "mistral", "qwen", "gguf", "text generation"])
+PREFETCH_WARMUP_PAGE_SIZE = _env_int("HF_PREFETCH_WARMUP_PAGE_SIZE", 20)
+
+# --- Facets ---
+# Facet counts (task, library, license, language, GGUF quantization) come from an in-memory index over the
+# catalogue mirror, rebuilt in the background; they are only available when HF_MIRROR_DB_PATH is set.
+FACETS_ENABLED = _env_bool("HF_FACETS_ENABLED", True)
+FACETS_REBUILD_INTERVAL_SECONDS = _env_float("HF_FACETS_REBUILD_INTERVAL_SECONDS", 900.0)
+FACET_COUNTS_CACHE_MAX_ENTRIES = _env_int("HF_FACET_COUNTS_CACHE_MAX_ENTRIES", 1024)
+
+# --- Compact catalogue ---
+# Columnar copy of the mirror's public models in one memory-mapped file (a few dozen bytes per model), shared
+# read-only by all worker processes. Browse pages (no search text, at most a task filter) are sliced from its
+# precomputed sort orders instead of sorting and counting in SQLite. Defaults to HF_MIRROR_DB_PATH + ".compact".
+COMPACT_CATALOG_ENABLED = _env_bool("HF_COMPACT_CATALOG_ENABLED", True)
+COMPACT_CATALOG_PATH = os.getenv("HF_COMPACT_CATALOG_PATH") or None
+COMPACT_CATALOG_REBUILD_INTERVAL_SECONDS = _env_float("HF_COMPACT_CATALOG_REBUILD_INTERVAL_SECONDS", 900.0)
+COMPACT_CATALOG_CHECK_INTERVAL_SECONDS = _env_float("HF_COMPACT_CATALOG_CHECK_INTERVAL_SECONDS", 30.0)
+
+# --- HTTP Caching and Compression (our API's responses) ---
+# Search and model details responses carry an ETag and Cache-Control (max-age and stale-while-revalidate from
+# the result cache TTLs above), and answer If-None-Match with 304. Bodies of at least COMPRESSION_MIN_BYTES are
+# compressed with brotli (when the `brotli` package is installed) or gzip, per the client's Accept-Encoding.
+COMPRESSION_MIN_BYTES = _env_int("HF_COMPRESSION_MIN_BYTES", 1024)
+COMPRESSED_RESPONSE_CACHE_MAX_ENTRIES = _env_int("HF_COMPRESSED_RESPONSE_CACHE_MAX_ENTRIES", 256)
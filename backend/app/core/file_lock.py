@@ -0,0 +1,33 @@
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: msvcrt instead
+    fcntl = None
+    import msvcrt
+
+# Advisory locks on lock files, for work only one worker process should do at a time (catalogue syncs,
+# compact catalogue rebuilds). The OS drops a lock when its holder exits, so a crashed worker never leaves one behind.
+
+
+def open_lock_file(path: str) -> int:
+    return os.open(path, os.O_CREAT | os.O_RDWR, 0o644)
+
+
+def try_lock(fd: int) -> bool:
+    """Takes an exclusive lock on the open lock file `fd` without waiting. False if another process holds it."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)  # The file's first byte stands for the whole file
+    except OSError:  # BlockingIOError from flock, PermissionError from msvcrt
+        return False
+    return True
+
+
+def unlock(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
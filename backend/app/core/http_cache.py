@@ -0,0 +1,161 @@
+import gzip
+import hashlib
+from collections import OrderedDict
+from typing import Iterator, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+from . import config
+
+try:
+    import brotli
+except ImportError:  # Optional: without it responses are gzip-compressed only
+    brotli = None
+
+# --- Conditional, compressed responses ---
+# ETags computed here are weak (W/"..."): the same body is served identically in every Content-Encoding.
+# Callers with a content hash pass a strong ETag instead, which range requests (If-Range) need; it is
+# weakened whenever the body is compressed.
+
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# (etag, encoding) -> compressed body, so popular responses are compressed once rather than on every request
+_compressed: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+
+
+def etag_for(content: bytes) -> str:
+    return 'W/"' + hashlib.blake2b(content, digest_size=16).hexdigest() + '"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison: W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def _accepted_encodings(accept_encoding: str) -> set:
+    """Content codings the client accepts (q > 0)."""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, *params = part.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def choose_encoding(accept_encoding: Optional[str], size: int) -> Optional[str]:
+    if size < config.COMPRESSION_MIN_BYTES or not accept_encoding:
+        return None
+    accepted = _accepted_encodings(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def _compress(content: bytes, etag: str, encoding: str) -> bytes:
+    key = (etag, encoding)
+    compressed = _compressed.get(key)
+    if compressed is not None:
+        _compressed.move_to_end(key)
+        return compressed
+    # Moderate levels: most of the size reduction for a fraction of the CPU of the maximum settings
+    compressed = brotli.compress(content, quality=5) if encoding == "br" else gzip.compress(content, compresslevel=6)
+    _compressed[key] = compressed
+    while len(_compressed) > config.COMPRESSED_RESPONSE_CACHE_MAX_ENTRIES:
+        _compressed.popitem(last=False)
+    return compressed
+
+
+def _byte_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    [start, end) of a single `Range: bytes=...` (a-b, a- or -suffix), clamped to the content. None when there is
+    no usable Range (absent, malformed or multi-range: the full content is sent); (size, size) if unsatisfiable.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    first, _, last = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if not first:
+            suffix = int(last)
+            return (max(0, size - suffix), size) if suffix > 0 else (size, size)
+        start = int(first)
+        end = min(size, int(last) + 1) if last else size
+    except ValueError:
+        return None
+    if end <= start and start < size:
+        return None  # last < first is malformed, not unsatisfiable
+    return (start, end) if start < size else (size, size)
+
+
+def _chunks(content: bytes, start: int, end: int) -> Iterator[bytes]:
+    view = memoryview(content)
+    for offset in range(start, end, STREAM_CHUNK_BYTES):
+        yield view[offset:min(end, offset + STREAM_CHUNK_BYTES)].tobytes()
+
+
+def cached_response(
+    request: Request,
+    content: bytes,
+    media_type: str,
+    max_age: float,
+    stale_while_revalidate: float,
+    etag: Optional[str] = None,
+    ranges: bool = False,
+) -> Response:
+    """
+    Response with an ETag and Cache-Control, answered with 304 when the client's If-None-Match matches and
+    compressed per Accept-Encoding otherwise. With ranges=True, a Range request (honouring If-Range) gets the
+    206 byte range uncompressed, and uncompressed bodies are streamed in chunks.
+    """
+    etag = etag or etag_for(content)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={int(max_age)}, stale-while-revalidate={int(stale_while_revalidate)}",
+        "Vary": "Accept-Encoding",
+    }
+    if ranges:
+        headers["Accept-Ranges"] = "bytes"
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if_range = request.headers.get("if-range")
+    if ranges and (if_range is None or (if_range == etag and not etag.startswith("W/"))):
+        byte_range = _byte_range(request.headers.get("range"), len(content))
+        if byte_range is not None:
+            start, end = byte_range
+            if start >= len(content):
+                return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{len(content)}"})
+            headers["Content-Range"] = f"bytes {start}-{end - 1}/{len(content)}"
+            headers["Content-Length"] = str(end - start)
+            return StreamingResponse(_chunks(content, start, end), status_code=206, media_type=media_type, headers=headers)
+
+    encoding = choose_encoding(request.headers.get("accept-encoding"), len(content))
+    if encoding is not None:
+        content = _compress(content, etag, encoding)
+        headers["Content-Encoding"] = encoding
+        if not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag  # The compressed bytes differ from the identity representation
+    elif ranges:
+        headers["Content-Length"] = str(len(content))
+        return StreamingResponse(_chunks(content, 0, len(content)), media_type=media_type, headers=headers)
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
+def cached_json_response(request: Request, content: bytes, max_age: float, stale_while_revalidate: float) -> Response:
+    """JSON variant of cached_response."""
+    return cached_response(request, content, "application/json", max_age, stale_while_revalidate)
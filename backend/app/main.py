@@ -1,7 +1,10 @@
 import logging
 import os
+import time
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
@@ -22,11 +25,32 @@ load_dotenv(dotenv_path="../.env") # Assuming .env is in the backend/ root next
 # or load_dotenv() if .env is in the same directory as main.py (less common for this structure)
 
 
+# --- Application Lifespan ---
+# Starts and stops background jobs. Service modules are imported further down, after the app is created.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await hub_client.start_hub_client()
+    catalog_mirror.start_background_sync()
+    autocomplete.start_background_rebuild()
+    facets.start_background_rebuild()
+    compact_catalog.start_background_refresh()
+    prefetch.start_warmup()
+    yield
+    await prefetch.stop()
+    await compact_catalog.stop_background_refresh()
+    await facets.stop_background_rebuild()
+    await autocomplete.stop_background_rebuild()
+    await catalog_mirror.stop_background_sync()
+    await hub_client.close_hub_client()
+    await shared_cache.close_store()
+
+
 # --- FastAPI App Initialization ---
 app = FastAPI(
     title="Hugging Face Advanced Search API",
     version="0.1.0",
     description="An advanced search tool for Hugging Face models.",
+    lifespan=lifespan,
 )
 
 # --- CORS (Cross-Origin Resource Sharing) ---
@@ -56,7 +80,7 @@ async def read_root():
     """
     Root endpoint providing a welcome message.
     """
-    logger.info("Root endpoint '/' was accessed.")
+    logger.debug("Root endpoint '/' was accessed.")
     return {"message": "Welcome to the Hugging Face Advanced Search API!"}
 
 # --- Health Check / Ping Endpoint ---
@@ -65,16 +89,62 @@ async def ping_server():
     """
     A simple ping endpoint to check if the server is responsive.
     """
-    logger.info("Ping endpoint '/api/ping' was accessed.")
+    logger.debug("Ping endpoint '/api/ping' was accessed.")
     return {"message": "pong"}
 # --- API Endpoints ---
 
 from .routers import search_router, model_router
+from .services import hf_service, catalog_mirror, compact_catalog, hub_client, autocomplete, facets, prefetch, metrics, shared_cache
 
 
 app.include_router(search_router.router, prefix="/api/search", tags=["Search Operations"])
 app.include_router(model_router.router, prefix="/api/models", tags=["Model Operations"]) 
 
+
+# --- Request Metrics ---
+# Latency per route (labelled by endpoint function name) and the number of Hub calls each request caused. For streaming responses the
+# latency covers the time to the first byte, not the whole stream.
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = "500"
+    with metrics.count_upstream_calls() as upstream:
+        try:
+            response = await call_next(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            handler = getattr(request.scope.get("route"), "name", "unmatched")
+            metrics.HTTP_REQUEST_SECONDS.labels(request.method, handler, status).observe(time.perf_counter() - started)
+            metrics.UPSTREAM_CALLS_PER_REQUEST.labels(handler).observe(upstream.calls)
+
+
+@app.get("/metrics", tags=["Utilities"], include_in_schema=False)
+async def prometheus_metrics():
+    """
+    Prometheus exposition: request latency per route, per-stage timings of search and model details,
+    and Hub calls per request.
+    """
+    return Response(metrics.render_latest(), media_type=metrics.CONTENT_TYPE_LATEST)
+
+# --- Cache Statistics Endpoint ---
+@app.get("/api/cache/stats", tags=["Utilities"])
+async def cache_stats():
+    """
+    Hit/miss/eviction counters for the server-side result caches, for tuning TTLs and memory caps,
+    plus prefetch counters (how much speculative work was scheduled, skipped or dropped) and the Hub
+    scheduler's per-credential queue depths, wait times and shed calls, how many Hub refetches were answered
+    with 304, and the facet index's and compact catalogue's sizes.
+    """
+    return {
+        **hf_service.get_cache_stats(),
+        "facet_index": facets.get_index_stats(),
+        "compact_catalog": compact_catalog.get_catalog_stats(),
+        "prefetch": prefetch.get_stats(),
+        "hub_scheduler": hub_client.get_hub_client().scheduler.stats(),
+        "hub_conditional_requests": hub_client.get_hub_client().conditional.stats(),
+    }
+
 if __name__ == "__main__":
     # This block is for running with `python app/main.py` directly (less common for FastAPI)
     # Uvicorn is typically used as the ASGI server from the command line.
@@ -1,48 +1,191 @@
 import logging
-from typing import Optional
+import math
+from typing import Optional, Dict, List, Literal
 
-from fastapi import APIRouter, HTTPException, Depends, Path
-from fastapi.concurrency import run_in_threadpool
+from fastapi import APIRouter, HTTPException, Depends, Path, Query, Request
+from fastapi.responses import Response, StreamingResponse
 
-from ..services import hf_service
-from ..schemas.model_schemas import ModelDetailResponse # Ensure this schema is defined
+from ..core import config, http_cache
+from ..services import hf_service, readme_render
+from ..services.hub_client import HubNotFoundError, HubRateLimitedError
+from ..schemas.model_schemas import (
+    MODEL_ID_PART_PATTERN, ModelDetailResponse, ModelBatchRequest, ModelBatchItem, ModelBatchResponse, is_valid_model_id,
+)
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+
+def _rate_limited(model_id: str, e: HubRateLimitedError) -> HTTPException:
+    """503 with Retry-After; only reached when no cached copy could be served instead."""
+    logger.warning(f"Request for {model_id} rate-limited upstream: {e}")
+    retry_after = math.ceil(e.retry_after_seconds) if e.retry_after_seconds else 1
+    return HTTPException(
+        status_code=503, detail="The Hugging Face Hub is rate-limiting requests; try again shortly.",
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+def _detail_view(
+    details: ModelDetailResponse, lean: bool, siblings_ext: Optional[List[str]], siblings_offset: int, siblings_limit: Optional[int]
+) -> ModelDetailResponse:
+    """The requested view of cached details: README dropped in lean mode, siblings filtered by extension and paginated."""
+    siblings = details.siblings or []
+    if siblings_ext:
+        suffixes = tuple(ext.lower() if ext.startswith(".") else f".{ext.lower()}" for ext in siblings_ext)
+        siblings = [sibling for sibling in siblings if sibling["name"].lower().endswith(suffixes)]
+    end = None if siblings_limit is None else siblings_offset + siblings_limit
+    update = {"siblings": siblings[siblings_offset:end], "siblings_total": len(siblings)}
+    if lean:
+        update["readme_content"] = None
+    return details.model_copy(update=update)
+
+
 @router.get(
     "/{model_id_author}/{model_id_name}", # Matches the frontend route
     response_model=Optional[ModelDetailResponse], # Optional if model might not be found
     summary="Get Model Details",
-    description="Fetches detailed information for a specific model, including its README and GGUF files."
+    description=(
+        "Fetches detailed information for a specific model, including its README and GGUF files. "
+        "With `lean=true` the README is left out; `readme` gives its size, hash and the URL serving it. "
+        "Responses carry an ETag (send it back as If-None-Match to get a 304 when unchanged) and Cache-Control, "
+        "and are gzip/brotli-compressed when the client accepts it."
+    ),
 )
 async def get_single_model_details(
-    model_id_author: str = Path(..., description="The author/organization part of the model ID."),
-    model_id_name: str = Path(..., description="The name part of the model ID.")
+    request: Request,
+    model_id_author: str = Path(..., pattern=MODEL_ID_PART_PATTERN, description="The author/organization part of the model ID."),
+    model_id_name: str = Path(..., pattern=MODEL_ID_PART_PATTERN, description="The name part of the model ID."),
+    lean: bool = Query(False, description="Leave out readme_content; fetch it from `readme.url` when needed."),
+    siblings_ext: Optional[List[str]] = Query(None, description="Only list siblings with these extensions (repeatable), e.g. .gguf, .safetensors."),
+    siblings_offset: int = Query(0, ge=0, description="Siblings to skip (after filtering)."),
+    siblings_limit: Optional[int] = Query(None, ge=1, le=10000, description="Maximum number of siblings to list (default: all)."),
     # If using wildcard "/model/*" route:
     # model_repo_id: str = Path(..., description="The full model repository ID, e.g., 'openai-community/gpt2'. Note: URL decode if necessary.")
 ):
     full_model_id = f"{model_id_author}/{model_id_name}"
     # If using wildcard: full_model_id = model_repo_id
 
-    logger.info(f"Request received for model details: {full_model_id}")
+    logger.debug("Request received for model details: %s", full_model_id)
     try:
-        # get_model_details_from_hub involves file I/O (README download) and network calls.
-        # Run it in a threadpool to keep the FastAPI event loop unblocked.
-        model_details = await run_in_threadpool(hf_service.get_model_details_from_hub, model_id=full_model_id)
+        # get_model_details_from_hub is async; the cached wrapper only calls the Hub on a miss.
+        model_details = await hf_service.get_model_details_cached(model_id=full_model_id)
         
         if model_details is None:
             logger.warning(f"Model details not found for {full_model_id} by service.")
             raise HTTPException(status_code=404, detail=f"Model '{full_model_id}' not found.")
         
-        logger.info(f"Successfully retrieved details for {full_model_id}")
-        return model_details
+        logger.debug("Successfully retrieved details for %s", full_model_id)
+        view = _detail_view(model_details, lean, siblings_ext, siblings_offset, siblings_limit)
+        # Mostly README text: compressed, and revalidated by ETag instead of downloaded again
+        return http_cache.cached_json_response(
+            request, view.model_dump_json(by_alias=True).encode("utf-8"),
+            config.DETAILS_CACHE_TTL_SECONDS, config.DETAILS_CACHE_STALE_TTL_SECONDS,
+        )
     except HTTPException as http_exc: # Re-raise HTTPExceptions
         raise http_exc
+    except HubNotFoundError:
+        logger.warning(f"Model {full_model_id} not found on the Hub.")
+        raise HTTPException(status_code=404, detail=f"Model '{full_model_id}' not found.")
+    except HubRateLimitedError as e:
+        raise _rate_limited(full_model_id, e)
     except Exception as e:
         logger.error(f"Error retrieving details for model {full_model_id}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"An internal server error occurred while fetching details for model '{full_model_id}'.")
 
+
+@router.get(
+    "/{model_id_author}/{model_id_name}/readme",
+    summary="Get Model README",
+    response_class=Response,
+    responses={200: {"content": {"text/markdown": {}, "text/html": {}}}, 206: {"description": "The requested byte range."}},
+    description=(
+        "Streams README.md as stored in the repo, with HTTP Range support (Accept-Ranges: bytes, If-Range). "
+        "`format=html` returns it rendered to sanitized HTML (raw HTML escaped, unsafe link targets dropped), "
+        "cached by the README's hash. The ETag is the README's SHA-256, as in the details' `readme.sha256`."
+    ),
+)
+async def get_model_readme(
+    request: Request,
+    model_id_author: str = Path(..., pattern=MODEL_ID_PART_PATTERN, description="The author/organization part of the model ID."),
+    model_id_name: str = Path(..., pattern=MODEL_ID_PART_PATTERN, description="The name part of the model ID."),
+    format: Literal["markdown", "html"] = Query("markdown", description="Raw markdown, or sanitized HTML."),
+):
+    full_model_id = f"{model_id_author}/{model_id_name}"
+    try:
+        if format == "html":
+            if not readme_render.is_available():
+                raise HTTPException(status_code=501, detail="HTML rendering needs the markdown-it-py package on the server.")
+            content, sha256 = await hf_service.get_readme_html_cached(full_model_id)
+            media_type, etag = "text/html; charset=utf-8", f'"{sha256}-html"'
+        else:
+            readme = await hf_service.get_readme_cached(full_model_id)
+            content, media_type, etag = readme.content, "text/markdown; charset=utf-8", f'"{readme.sha256}"'
+    except HTTPException:
+        raise
+    except HubNotFoundError:
+        raise HTTPException(status_code=404, detail=f"No README found for model '{full_model_id}'.")
+    except HubRateLimitedError as e:
+        raise _rate_limited(full_model_id, e)
+    except Exception as e:
+        logger.error(f"Error retrieving README for model {full_model_id}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"An internal server error occurred while fetching the README for model '{full_model_id}'.")
+    return http_cache.cached_response(
+        request, content, media_type, config.DETAILS_CACHE_TTL_SECONDS, config.DETAILS_CACHE_STALE_TTL_SECONDS,
+        etag=etag, ranges=True,
+    )
+
+def _batch_item(model_id: str, details: Optional[ModelDetailResponse], error: Optional[Exception]) -> ModelBatchItem:
+    """Maps one batch result to a per-item status, mirroring the single-model endpoint's status codes."""
+    if error is None and details is not None:
+        return ModelBatchItem(model_id=model_id, status=200, data=details)
+    if error is None or isinstance(error, HubNotFoundError):
+        return ModelBatchItem(model_id=model_id, status=404, error=f"Model '{model_id}' not found.")
+    if isinstance(error, HubRateLimitedError):
+        return ModelBatchItem(model_id=model_id, status=503, error="The Hugging Face Hub is rate-limiting requests; try again shortly.")
+    logger.error(f"Error retrieving details for model {model_id} in batch: {error}", exc_info=error)
+    return ModelBatchItem(model_id=model_id, status=500, error=f"An internal server error occurred while fetching details for model '{model_id}'.")
+
+
+@router.post(
+    "/batch",
+    response_model=ModelBatchResponse,
+    summary="Get Details for Multiple Models",
+    description=(
+        "Fetches details for up to 100 models concurrently, with per-item errors: each item's `status` is 200, 404, 500, "
+        "or 503 while the Hub is rate-limiting requests. IDs that aren't `author/name` pairs aren't fetched and get a 400 item. "
+        "With `stream=true`, returns NDJSON: one `ModelBatchItem` per line, in completion order, as soon as each resolves."
+    ),
+)
+async def get_model_details_batch(
+    batch_request: ModelBatchRequest,
+    stream: bool = Query(False, description="Stream results as NDJSON instead of one JSON document."),
+):
+    model_ids = batch_request.model_ids  # Stripped by ModelBatchRequest
+    logger.debug("Batch details request for %d models (stream=%s)", len(model_ids), stream)
+    # Same constraint as the `/{author}/{name}` routes: anything else would reach other Hub endpoints. One bad ID
+    # only fails its own item, so a page comparing models still shows the others.
+    invalid_items = {
+        model_id: ModelBatchItem(model_id=model_id, status=400, error="Model IDs must have the form 'author/name'.")
+        for model_id in model_ids if not is_valid_model_id(model_id)
+    }
+    valid_ids = [model_id for model_id in model_ids if model_id not in invalid_items]
+
+    if stream:
+        async def ndjson_lines():
+            for item in invalid_items.values():
+                yield item.model_dump_json(by_alias=True) + "\n"
+            async for model_id, details, error in hf_service.iter_model_details_batch(valid_ids):
+                yield _batch_item(model_id, details, error).model_dump_json(by_alias=True) + "\n"
+
+        return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+    items_by_id: Dict[str, ModelBatchItem] = dict(invalid_items)
+    async for model_id, details, error in hf_service.iter_model_details_batch(valid_ids):
+        items_by_id[model_id] = _batch_item(model_id, details, error)
+    return ModelBatchResponse(results=[items_by_id[model_id] for model_id in dict.fromkeys(model_ids)])
+
+
 # If you want to support model IDs with more than one slash, like 'a/b/c'
 # you'd use a path converter in the route:
 # @router.get("/{model_repo_id:path}", ...)
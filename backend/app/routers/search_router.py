@@ -1,83 +1,226 @@
+import asyncio
 import logging
-from typing import Optional, List
+import math
+from typing import Optional, List, Literal
 
-from fastapi import APIRouter, Query, HTTPException, Depends
-from fastapi.concurrency import run_in_threadpool # Moved import higher as it's used
+import orjson
+from fastapi import APIRouter, BackgroundTasks, Query, HTTPException, Depends, Request
+from fastapi.responses import Response, StreamingResponse
 
+from ..core import config, http_cache
 from ..services import hf_service # Relative import to services package
+from ..services import autocomplete, facets, metrics, prefetch
+from ..services.hub_client import HubRateLimitedError
 from ..schemas.search_schemas import HFModelSearchResponsePaginated, AutocompleteSuggestion
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+
+def _rate_limited(e: HubRateLimitedError) -> HTTPException:
+    """503 with Retry-After for searches the Hub throttled and no cached copy could answer."""
+    logger.warning(f"Search rate-limited upstream: {e}")
+    retry_after = math.ceil(e.retry_after_seconds) if e.retry_after_seconds else 1
+    return HTTPException(
+        status_code=503, detail="The Hugging Face Hub is rate-limiting searches; try again shortly.",
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
 @router.get(
     "/models",
     response_model=HFModelSearchResponsePaginated, # Use the new paginated response schema
     summary="Search Hugging Face Models (Paginated)",
-    description="Performs a search on the Hugging Face Hub based on query, filters, and sorting.",
+    description=(
+        "Performs a search on the Hugging Face Hub based on query, filters, and sorting. "
+        "Responses carry an ETag (send it back as If-None-Match to get a 304 when unchanged) and Cache-Control."
+    ),
 )
 async def search_hf_models_paginated(
+    request: Request,
+    background_tasks: BackgroundTasks,
     query: Optional[str] = Query(None, description="Search query string."),
     sort_by: str = Query("downloads", description="Sort by ('downloads', 'likes', 'lastModified')."),
     page: int = Query(1, ge=1, description="Page number (1-indexed)."),
     page_size: int = Query(20, ge=1, le=50, description="Items per page (min 1, max 50)."), # Limit page_size
     pipeline_tag: Optional[str] = Query(None, description="Filter by pipeline tag."),
-    library: Optional[str] = Query(None, description="Filter by library.")
+    library: Optional[str] = Query(None, description="Filter by library."),
+    cursor: Optional[str] = Query(None, description="Continuation cursor (`next_cursor` from the previous page)."),
+    lean: bool = Query(False, description="Lean mode: fetch only rendered fields from the Hub and serialize results without per-item validation."),
+    facet_filter: Optional[List[str]] = Query(None, description="Facet filter as `facet:value` (repeatable), e.g. `license:mit`. Values of one facet are ORed, facets are ANDed. Several values of one facet need the local catalogue mirror."),
+    facet: Optional[List[Literal["task", "library", "license", "language", "quantization"]]] = Query(None, description="Facets to count for this search (repeatable). Needs the local catalogue mirror."),
+    facet_limit: int = Query(20, ge=1, le=200, description="Values returned per counted facet."),
 ):
     """
     Endpoint to search for models on the Hugging Face Hub.
     It allows filtering by various criteria and sorting the results.
     """
     try:
-        logger.info(
-            f"Received paginated search: query='{query}', sort='{sort_by}', page={page}, page_size={page_size}, "
-            f"task='{pipeline_tag}', lib='{library}'"
+        logger.debug(
+            "Received paginated search: query=%r, sort=%r, page=%d, page_size=%d, task=%r, lib=%r, cursor=%s, lean=%s, "
+            "facet_filter=%r, facets=%r",
+            query, sort_by, page, page_size, pipeline_tag, library, "yes" if cursor else "no", lean, facet_filter, facet,
         )
-        
-        # hf_service.search_models_on_hub_paginated is synchronous due to the loop over the generator
-        results, _, has_more = await run_in_threadpool( # _ for total_items_processed
-            hf_service.search_models_on_hub_paginated,
+        facet_filters = facets.parse_facet_filters(facet_filter) or None
+
+        # Served from the result cache when possible; misses call the Hub through the shared async client.
+        # Facet counts come from the in-memory facet index and are computed alongside the page.
+        search = hf_service.search_models_cached(
             query=query,
             sort_by=sort_by,
             page=page,
             page_size=page_size,
             pipeline_tag=pipeline_tag,
-            library=library
+            library=library,
+            cursor=cursor,
+            lean=lean,
+            facet_filters=facet_filters,
         )
-        # `list_models` can be blocking, so run it in a threadpool
-        # to avoid blocking FastAPI's event loop for synchronous I/O bound tasks.
-        # However, huggingface_hub's list_models itself might be doing async HTTP requests internally
-        # if it uses something like httpx. If it's purely synchronous (like using `requests`),
-        # then threadpool is good. For now, let's assume it could be blocking.
-        # A simpler way if you are sure it's not overly blocking or if HF_HUB is async:
-        # results, total_approx = hf_service.search_models_on_hub(
-        #     query=query, sort_by=sort_by, limit=limit,
-        #     pipeline_tag=pipeline_tag, library=library
-        # )
-
-        return HFModelSearchResponsePaginated(
-            query=query,
-            sort_by=sort_by,
-            page=page,
-            page_size=page_size,
-            results=results,
-            # total_items_processed_for_has_more=total_processed,
-            has_more=has_more
+        if facet:
+            (results, total_results, has_more, next_cursor), facet_counts = await asyncio.gather(
+                search,
+                hf_service.get_facet_counts_cached(
+                    query, pipeline_tag, library, facet_filters, list(dict.fromkeys(facet)), facet_limit
+                ),
+            )
+        else:
+            (results, total_results, has_more, next_cursor), facet_counts = await search, None
+        # The service is natively async (pooled httpx client), so no threadpool hop is needed here
+        # and concurrency isn't capped by the threadpool size.
+
+        # Once the response is sent, warm the cache for the next page and the top results' detail pages.
+        background_tasks.add_task(
+            prefetch.prefetch_after_search,
+            query, sort_by, page, page_size, pipeline_tag, library, lean, results, has_more, next_cursor, facet_filters,
+        )
+
+        # Serialized here rather than by FastAPI so the time shows up as the search "serialization" stage.
+        with metrics.stage("search", "serialization"):
+            if lean:
+                # Results are already plain dicts in the response schema's JSON shape; serialize them directly
+                # to bytes instead of validating a response model per item.
+                content = orjson.dumps({
+                    "query": query, "sort_by": sort_by, "page": page, "page_size": page_size,
+                    "results": results, "has_more": has_more,
+                    "total_results_available": total_results, "next_cursor": next_cursor, "facets": facet_counts,
+                })
+            else:
+                content = HFModelSearchResponsePaginated(
+                    query=query,
+                    sort_by=sort_by,
+                    page=page,
+                    page_size=page_size,
+                    results=results,
+                    # total_items_processed_for_has_more=total_processed,
+                    has_more=has_more,
+                    total_results_available=total_results,
+                    next_cursor=next_cursor,
+                    facets=facet_counts,
+                ).model_dump_json(by_alias=True).encode("utf-8")
+        # ETag/Cache-Control let browsers and the CDN revalidate; a matching If-None-Match gets a bodyless 304
+        return http_cache.cached_json_response(
+            request, content, config.SEARCH_CACHE_TTL_SECONDS, config.SEARCH_CACHE_STALE_TTL_SECONDS
         )
+    except hf_service.InvalidCursorError as e:
+        logger.warning(f"Rejected search cursor: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except facets.InvalidFacetFilterError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HubRateLimitedError as e:
+        raise _rate_limited(e)
     except Exception as e:
         logger.error(f"Error in paginated search request: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error during paginated search.")
 
 
-# --- Autocomplete Endpoint (Placeholder for now, can be expanded) ---
-# @router.get("/autocomplete", response_model=List[AutocompleteSuggestion])
-# async def get_autocomplete_suggestions(
-#     q: str = Query(..., min_length=2, description="Partial query for autocomplete.")
-# ):
-#     # This would call a simplified version of search_models_on_hub or a dedicated autocomplete function
-#     # For now, let's just return a placeholder
-#     logger.info(f"Autocomplete request for query: '{q}'")
-#     # Example:
-#     # suggestions = await run_in_threadpool(hf_service.get_autocomplete_suggestions_from_hub, query=q, limit=5)
-#     # return suggestions
-#     return [{"id": "ExampleModel/suggestion1"}, {"id": "ExampleQuery/suggestion2"}]
+def _stream_frame(kind: str, payload: dict, stream_format: str) -> bytes:
+    """Encodes one streamed frame: an NDJSON line, or an SSE event named after the frame type."""
+    if stream_format == "sse":
+        return b"event: " + kind.encode("ascii") + b"\ndata: " + orjson.dumps(payload) + b"\n\n"
+    if kind == "item":
+        return orjson.dumps({"type": kind, "data": payload}) + b"\n"
+    return orjson.dumps({"type": kind, **payload}) + b"\n"
+
+
+@router.get(
+    "/models/stream",
+    summary="Search Hugging Face Models (Streaming)",
+    description=(
+        "Streams search results as they arrive from the Hub instead of waiting for a whole page. "
+        "NDJSON (default): one `{\"type\": \"item\", \"data\": <result>}` line per model, then "
+        "`{\"type\": \"end\", \"count\", \"has_more\", \"next_cursor\"}`. "
+        "SSE (`format=sse`): `item` events, then one `end` event. "
+        "Pass `next_cursor` back as `cursor` to continue where the stream stopped."
+    ),
+)
+async def stream_hf_models(
+    request: Request,
+    query: Optional[str] = Query(None, description="Search query string."),
+    sort_by: str = Query("downloads", description="Sort by ('downloads', 'likes', 'lastModified')."),
+    pipeline_tag: Optional[str] = Query(None, description="Filter by pipeline tag."),
+    library: Optional[str] = Query(None, description="Filter by library."),
+    limit: int = Query(200, ge=1, le=5000, description="Maximum number of models to stream (max 5000)."),
+    cursor: Optional[str] = Query(None, description="Continuation cursor (`next_cursor` from a previous stream's end frame)."),
+    format: Literal["ndjson", "sse"] = Query("ndjson", description="Stream format."),
+):
+    logger.debug(
+        "Received streaming search: query=%r, sort=%r, task=%r, lib=%r, limit=%d, cursor=%s, format=%s",
+        query, sort_by, pipeline_tag, library, limit, "yes" if cursor else "no", format,
+    )
+    results = hf_service.stream_search_results(
+        query=query, sort_by=sort_by, pipeline_tag=pipeline_tag, library=library, limit=limit, cursor=cursor
+    )
+    # Pull the first frame before sending headers, so bad cursors and upstream failures still get a proper status code.
+    try:
+        first_frame = await results.__anext__()
+    except hf_service.InvalidCursorError as e:
+        logger.warning(f"Rejected search cursor: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except HubRateLimitedError as e:
+        raise _rate_limited(e)
+    except Exception as e:
+        logger.error(f"Error in streaming search request: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error during streaming search.")
+
+    async def frames():
+        # Each frame is only produced after the previous one was sent, so upstream chunks are requested
+        # at the client's pace. If the client goes away, stop and close the upstream iteration.
+        try:
+            kind, payload = first_frame
+            yield _stream_frame(kind, payload, format)
+            sent = 0
+            async for kind, payload in results:
+                sent += 1
+                if sent % 50 == 0 and await request.is_disconnected():
+                    logger.info("Streaming search client disconnected; stopping upstream iteration.")
+                    return
+                yield _stream_frame(kind, payload, format)
+        except Exception as e:
+            logger.error(f"Error while streaming search results: {e}", exc_info=True)
+            yield _stream_frame("error", {"detail": "Upstream error while streaming search results."}, format)
+        finally:
+            await results.aclose()
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(frames(), media_type=media_type, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# --- Autocomplete Endpoint ---
+@router.get(
+    "/autocomplete",
+    response_model=List[AutocompleteSuggestion],
+    summary="Autocomplete Model IDs, Authors and Tags",
+    description=(
+        "Prefix suggestions ranked by downloads, then likes. Matches the start of model IDs, model names "
+        "(the part after the author), authors and tags. Served from an in-memory index that is rebuilt in the "
+        "background; returns an empty list until the first build finishes."
+    ),
+)
+async def get_autocomplete_suggestions(
+    q: str = Query(..., min_length=2, max_length=200, description="Partial query for autocomplete."),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of suggestions."),
+    types: Optional[List[Literal["model", "author", "tag"]]] = Query(None, description="Only these suggestion types (repeatable)."),
+):
+    # Hot path: no per-request logging, and suggestions are plain dicts serialized with orjson
+    suggestions = autocomplete.suggest(q, limit=limit, types=types)
+    return Response(orjson.dumps(suggestions), media_type="application/json")
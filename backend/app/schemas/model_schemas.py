@@ -1,13 +1,31 @@
-from pydantic import BaseModel, Field
+import re
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
+# One part (author or name) of a Hub model ID: letters, digits, '-', '_' and single dots between them, as the Hub
+# allows. This also keeps out '.' and '..', which HTTP clients would resolve as path segments in the Hub URLs built
+# from IDs (e.g. '../whoami-v2' -> /api/whoami-v2). No look-ahead: FastAPI's `pattern` doesn't support it.
+MODEL_ID_PART_PATTERN = r"^[A-Za-z0-9_][A-Za-z0-9_-]*(?:\.[A-Za-z0-9_-]+)*$"
+_MODEL_ID_PART = re.compile(MODEL_ID_PART_PATTERN)
+
+
+def is_valid_model_id(model_id: str) -> bool:
+    """True for exactly one `author/name` pair of valid parts."""
+    parts = model_id.split("/")
+    return len(parts) == 2 and all(_MODEL_ID_PART.match(part) for part in parts)
+
+
 class GGUFFileDetail(BaseModel):
     name: str
     url: str # This will be the direct download URL
     size_bytes: Optional[int] = None
-    # Add parsed info later like quantization, variant
+    # Parsed from the GGUF header when available; quantization falls back to a guess from the file name
     quantization: Optional[str] = None 
+    architecture: Optional[str] = None
+    context_length: Optional[int] = None
+    parameter_count: Optional[int] = None
+    tensor_count: Optional[int] = None
 
 class ModelCardData(BaseModel): # A simplified representation
     license: Optional[str] = None
@@ -20,6 +38,12 @@ class ModelCardData(BaseModel): # A simplified representation
     # card_data_raw: Optional[Dict[str, Any]] = None
 
 
+class ReadmeInfo(BaseModel):
+    size_bytes: int = Field(..., description="Size of README.md in bytes.")
+    sha256: str = Field(..., description="SHA-256 of README.md; also its ETag at `url`.")
+    url: str = Field(..., description="API path serving README.md: streamed, with HTTP Range support; add ?format=html for sanitized HTML.")
+
+
 class ModelDetailResponse(BaseModel):
     id: str
     author: Optional[str] = None
@@ -29,14 +53,36 @@ class ModelDetailResponse(BaseModel):
     downloads: Optional[int] = 0
     likes: Optional[int] = 0
     
-    readme_content: Optional[str] = "README not found."
+    readme_content: Optional[str] = "README not found." # null in lean mode; see `readme`
+    readme: Optional[ReadmeInfo] = None # None when the model has no README
     gguf_files: List[GGUFFileDetail] = []
     card_data: Optional[ModelCardData] = None # Using our simplified card data schema
     # Or for full card data:
     # card_data_raw: Optional[Dict[str, Any]] = None
 
     siblings: Optional[List[Dict[str, Any]]] = [] # List of all files in the repo with basic info
+    siblings_total: Optional[int] = Field(None, description="Siblings matching the requested extensions, before siblings_offset/siblings_limit.")
 
     class Config:
         populate_by_name = True
         from_attributes = True 
+
+
+class ModelBatchRequest(BaseModel):
+    model_ids: List[str] = Field(..., min_length=1, max_length=100, description="Full model IDs, e.g. 'openai-community/gpt2'. Duplicates are fetched once; IDs that aren't `author/name` pairs get a 400 item.")
+
+    @field_validator("model_ids")
+    @classmethod
+    def _strip_model_ids(cls, model_ids: List[str]) -> List[str]:
+        return [model_id.strip() for model_id in model_ids]
+
+
+class ModelBatchItem(BaseModel):
+    model_id: str
+    status: int = Field(..., description="HTTP-style status for this item: 200, 400 for an ID that isn't an `author/name` pair, 404, 500, or 503 when the Hub is rate-limiting requests (retry later).")
+    data: Optional[ModelDetailResponse] = None
+    error: Optional[str] = None
+
+
+class ModelBatchResponse(BaseModel):
+    results: List[ModelBatchItem] # In the same order as the requested (de-duplicated) model IDs
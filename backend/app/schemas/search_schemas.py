@@ -1,5 +1,5 @@
 from pydantic import BaseModel, HttpUrl, Field
-from typing import List, Optional, Any
+from typing import Dict, List, Optional, Any
 from datetime import datetime
 
 class HFModelSearchResultItem(BaseModel):
@@ -17,6 +17,10 @@ class HFModelSearchResultItem(BaseModel):
         populate_by_name = True # Allows using alias names for populating the model
         from_attributes = True # Allows creating Pydantic models from ORM objects or other attribute-based objects
 
+class FacetValueCount(BaseModel):
+    value: str = Field(..., description="Facet value, e.g. 'text-generation', 'apache-2.0' or 'Q4_K_M'.")
+    count: int = Field(..., description="Models matching the search with this value, given the filters on the other facets.")
+
 class HFModelSearchResponsePaginated(BaseModel): # New or updated schema
     query: Optional[str]
     sort_by: str
@@ -25,8 +29,12 @@ class HFModelSearchResponsePaginated(BaseModel): # New or updated schema
     results: List[HFModelSearchResultItem]
     # total_items_processed_for_has_more: int # Count of items iterated to determine has_more
     has_more: bool # Indicates if there are more pages available
-    # total_results_available: Optional[int] = None # True total is hard to get without full iteration
+    next_cursor: Optional[str] = Field(None, description="Opaque cursor for fetching the next page directly. Pass it back with page+1 and the same search parameters.")
+    total_results_available: Optional[int] = Field(None, description="Exact number of matching models. Only known when served from the local catalogue mirror.")
+    facets: Optional[Dict[str, List[FacetValueCount]]] = Field(None, description="Top values per requested facet with their counts. Only available with the local catalogue mirror.")
 
 class AutocompleteSuggestion(BaseModel):
-    id: str
-    # name: str # Or just use id if it's descriptive enough for autocomplete 
+    id: str = Field(..., description="The suggested model ID, author or tag.")
+    type: str = Field("model", description="What the suggestion is: 'model', 'author' or 'tag'.")
+    downloads: int = Field(0, description="Downloads of the model (summed over their models for authors and tags).")
+    likes: int = Field(0, description="Likes of the model (summed over their models for authors and tags).")
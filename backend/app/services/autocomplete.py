@@ -0,0 +1,315 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..core import config
+from . import catalog_mirror
+from .hf_service import aiter_hub_model_listing
+from .hub_scheduler import Priority, use_priority
+
+logger = logging.getLogger(__name__)
+
+SUGGESTION_TYPES = ("model", "author", "tag")
+_MODEL, _AUTHOR, _TAG = range(3)
+
+# Tags that are unique per model (paper ids) or the same for almost every model; they'd only crowd out useful ones.
+SKIPPED_TAG_PREFIXES = ("arxiv:", "region:", "doi:")
+
+# Prefixes matching more entries than this get their top suggestions precomputed at build time, so a lookup never
+# ranks more than this many candidates. Short prefixes ("l", "ll", "lla") are the ones typed most.
+_SCAN_LIMIT = 2048
+# Precomputed lists hold more than a request can ask for, so dropping duplicates still leaves enough.
+_PRECOMPUTED_PER_PREFIX = 64
+_MAX_KEY_CHAR = "\U0010ffff"
+
+
+def _rank(downloads: int, likes: int) -> int:
+    # Downloads first, likes break ties; one int so candidates compare with a single array lookup
+    return min(max(downloads, 0), 2 ** 40) * 2 ** 22 + min(max(likes, 0), 2 ** 22 - 1)
+
+
+class PrefixIndex:
+    """
+    Immutable prefix index over model ids, model names (the part after the author), authors and tags.
+    Keys are lowercased and kept in one sorted list; a lookup is two bisects for the key range plus a top-k over
+    the candidates' ranks (or a precomputed top-k for very common prefixes).
+    """
+
+    def __init__(
+        self,
+        keys: List[str],
+        entry_suggestions: array,
+        values: List[str],
+        types: bytes,
+        downloads: array,
+        likes: array,
+        memory_bytes: int,
+    ):
+        self.keys = keys                            # sorted, lowercased lookup keys
+        self.entry_suggestions = entry_suggestions  # keys[i] -> suggestion number
+        self.values = values                        # suggestion number -> display value (model id, author, tag)
+        self.types = types                          # suggestion number -> _MODEL / _AUTHOR / _TAG
+        self.downloads = downloads
+        self.likes = likes
+        self.ranks = array("q", (_rank(d, l) for d, l in zip(downloads, likes)))
+        self.memory_bytes = memory_bytes
+        self.built_at = time.time()
+        self._entry_ranks = array("q", (self.ranks[s] for s in entry_suggestions))
+        # (prefix, type or None for any type) -> best suggestions, for prefixes too common to rank per request
+        self._top_by_prefix: Dict[Tuple[str, Optional[int]], List[int]] = {}
+        self._precompute_common_prefixes(0, len(keys), 0)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _best_suggestions(self, lo: int, hi: int, limit: int, wanted_types: Optional[bytes] = None) -> List[int]:
+        # Same model can sit under two keys (full id and name); ask for extra candidates and de-duplicate
+        if wanted_types is None:
+            candidates = heapq.nlargest(limit * 2, range(lo, hi), key=self._entry_ranks.__getitem__)
+        else:
+            types, entry_suggestions = self.types, self.entry_suggestions
+            candidates = heapq.nlargest(
+                limit * 2,
+                (i for i in range(lo, hi) if types[entry_suggestions[i]] in wanted_types),
+                key=self._entry_ranks.__getitem__,
+            )
+        best = list(dict.fromkeys(self.entry_suggestions[i] for i in candidates))
+        return best[:limit]
+
+    def _precompute_common_prefixes(self, lo: int, hi: int, depth: int) -> Optional[List[int]]:
+        """
+        Walks the key list like a trie, storing the top suggestions (overall and per type) of every prefix whose
+        range exceeds _SCAN_LIMIT. Bottom-up: a prefix ranks only its children's precomputed lists plus the entries
+        of its small children, so each entry is ranked once rather than once per prefix length.
+        Returns this prefix's candidates (best first), or None for a small range.
+        """
+        if hi - lo <= _SCAN_LIMIT:
+            return None
+        keys, entry_suggestions = self.keys, self.entry_suggestions
+        candidates = set()
+        start = lo
+        while start < hi and len(keys[start]) <= depth:
+            candidates.add(entry_suggestions[start])  # Keys equal to the prefix itself sort first and have no children
+            start += 1
+        while start < hi:
+            child = keys[start][:depth + 1]
+            end = bisect_left(keys, child + _MAX_KEY_CHAR, start, hi)
+            child_best = self._precompute_common_prefixes(start, end, depth + 1)
+            candidates.update(entry_suggestions[start:end] if child_best is None else child_best)
+            start = end
+        if depth == 0:
+            return None
+
+        ranked = sorted(candidates, key=self.ranks.__getitem__, reverse=True)
+        prefix = keys[lo][:depth]
+        self._top_by_prefix[(prefix, None)] = ranked[:_PRECOMPUTED_PER_PREFIX]
+        best = set(ranked[:_PRECOMPUTED_PER_PREFIX])
+        for kind in range(len(SUGGESTION_TYPES)):
+            top = list(itertools.islice((s for s in ranked if self.types[s] == kind), _PRECOMPUTED_PER_PREFIX))
+            self._top_by_prefix[(prefix, kind)] = top
+            best.update(top)
+        return list(best)
+
+    def lookup(self, prefix: str, limit: int = 10, types: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Top `limit` suggestions whose key starts with `prefix` (case-insensitive), best ranked first."""
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        wanted_types = bytes(sorted({SUGGESTION_TYPES.index(t) for t in types})) if types else None
+        if wanted_types is not None and len(wanted_types) == len(SUGGESTION_TYPES):
+            wanted_types = None
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + _MAX_KEY_CHAR, lo)
+        if hi - lo > _SCAN_LIMIT and limit <= _PRECOMPUTED_PER_PREFIX:
+            if wanted_types is None:
+                best = self._top_by_prefix[(prefix, None)]
+            else:
+                best = sorted(
+                    (s for kind in wanted_types for s in self._top_by_prefix[(prefix, kind)]),
+                    key=self.ranks.__getitem__, reverse=True,
+                )
+            return [self._suggestion(s) for s in best[:limit]]
+        return [self._suggestion(s) for s in self._best_suggestions(lo, hi, limit, wanted_types)]
+
+    def _suggestion(self, s: int) -> Dict[str, Any]:
+        return {
+            "id": self.values[s], "type": SUGGESTION_TYPES[self.types[s]],
+            "downloads": self.downloads[s], "likes": self.likes[s],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "suggestions": len(self.values), "keys": len(self.keys), "precomputed_prefixes": len(self._top_by_prefix),
+            "memory_bytes": self.memory_bytes, "built_at": self.built_at,
+        }
+
+
+def build_prefix_index(records: Iterable[Dict[str, Any]], memory_budget_bytes: int = config.AUTOCOMPLETE_MEMORY_BUDGET_BYTES) -> PrefixIndex:
+    """
+    Builds a PrefixIndex from Hub-listing-shaped model dicts (id, author, tags, downloads, likes).
+    Authors and tags are ranked by the summed downloads/likes of their models. When the estimated size exceeds
+    `memory_budget_bytes`, the lowest ranked suggestions are left out.
+    """
+    # suggestion (type, value) -> [downloads, likes]
+    totals: Dict[Tuple[int, str], List[int]] = {}
+
+    def add(kind: int, value: str, downloads: int, likes: int) -> None:
+        total = totals.get((kind, value))
+        if total is None:
+            totals[(kind, value)] = [downloads, likes]
+        else:
+            total[0] += downloads
+            total[1] += likes
+
+    for record in records:
+        model_id = record.get("id") or record.get("modelId")
+        if not model_id or record.get("private"):
+            continue
+        downloads, likes = record.get("downloads") or 0, record.get("likes") or 0
+        add(_MODEL, model_id, downloads, likes)
+        author = record.get("author") or (model_id.split("/", 1)[0] if "/" in model_id else None)
+        if author:
+            add(_AUTHOR, author, downloads, likes)
+        for tag in record.get("tags") or []:
+            tag = str(tag)
+            if tag and not tag.startswith(SKIPPED_TAG_PREFIXES):
+                add(_TAG, tag, downloads, likes)
+
+    # Admit suggestions best-first until the budget is spent
+    ranked = sorted(totals.items(), key=lambda item: _rank(*item[1]), reverse=True)
+    del totals
+    values: List[str] = []
+    types = bytearray()
+    downloads_col = array("q")
+    likes_col = array("q")
+    entries: List[Tuple[str, int]] = []
+    used_bytes = 0
+    for (kind, value), (downloads, likes) in ranked:
+        lowered = value.lower()
+        keys = [lowered]
+        if kind == _MODEL and "/" in lowered:
+            keys.append(lowered.split("/", 1)[1])  # "llama" should find "meta-llama/Llama-3.1-8B"
+        # Per suggestion: the value string plus its slots in values/types/downloads/likes/ranks.
+        # Per key: the key string, its list slot, its suggestion number and its rank.
+        cost = sys.getsizeof(value) + 8 + 1 + 8 + 8 + 8 + sum(sys.getsizeof(k) + 8 + 4 + 8 for k in keys)
+        if used_bytes + cost > memory_budget_bytes:
+            logger.info(f"Autocomplete memory budget reached; keeping the top {len(values)} of {len(ranked)} suggestions.")
+            break
+        used_bytes += cost
+        s = len(values)
+        values.append(value)
+        types.append(kind)
+        downloads_col.append(downloads)
+        likes_col.append(likes)
+        entries.extend((k, s) for k in keys)
+    del ranked
+
+    entries.sort()
+    return PrefixIndex(
+        keys=[k for k, _ in entries],
+        entry_suggestions=array("I", (s for _, s in entries)),
+        values=values,
+        types=bytes(types),
+        downloads=downloads_col,
+        likes=likes_col,
+        memory_bytes=used_bytes,
+    )
+
+
+# --- Module-level index and background rebuild ---
+# Lookups read whatever index `_index` points at; a rebuild builds a complete new index off the event loop and
+# swaps it in with one assignment, so requests never see a half-built index.
+
+_index: Optional[PrefixIndex] = None
+_rebuild_task: Optional["asyncio.Task[None]"] = None
+
+
+def get_index() -> Optional[PrefixIndex]:
+    return _index
+
+
+def suggest(prefix: str, limit: int = 10, types: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+    """Autocomplete suggestions for `prefix`; empty until the first index build finishes."""
+    index = _index
+    if index is None:
+        return []
+    return index.lookup(prefix, limit=limit, types=types)
+
+
+async def _load_hub_records() -> List[Dict[str, Any]]:
+    """Most downloaded models from the Hub listing, for when the catalogue mirror isn't available."""
+    params = {"sort": "downloads", "direction": -1, "expand": ["author", "downloads", "likes", "tags"]}
+    records: List[Dict[str, Any]] = []
+    async for page in aiter_hub_model_listing(params):
+        records.extend(page)
+        if len(records) >= config.AUTOCOMPLETE_HUB_MODEL_LIMIT:
+            break
+    return records[:config.AUTOCOMPLETE_HUB_MODEL_LIMIT]
+
+
+def _build_from_mirror(mirror: catalog_mirror.CatalogMirror) -> PrefixIndex:
+    return build_prefix_index(mirror.iter_model_records())
+
+
+async def rebuild_index() -> PrefixIndex:
+    """Builds a fresh index (from the mirror when it's ready, otherwise from the top of the Hub listing) and swaps it in."""
+    global _index
+    started = time.perf_counter()
+    mirror = catalog_mirror.get_ready_mirror()
+    if mirror is not None:
+        index = await asyncio.to_thread(_build_from_mirror, mirror)
+        source = "mirror"
+    else:
+        records = await _load_hub_records()
+        index = await asyncio.to_thread(build_prefix_index, records)
+        source = "hub"
+    _index = index
+    logger.info(
+        f"Autocomplete index rebuilt from {source}: {len(index)} suggestions, "
+        f"~{index.memory_bytes / 1e6:.1f} MB, {time.perf_counter() - started:.1f}s"
+    )
+    return index
+
+
+async def _background_rebuild_loop() -> None:
+    with use_priority(Priority.BACKGROUND):
+        while True:
+            try:
+                await rebuild_index()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Autocomplete index rebuild failed: {e}", exc_info=True)
+            await asyncio.sleep(config.AUTOCOMPLETE_REBUILD_INTERVAL_SECONDS)
+
+
+def start_background_rebuild() -> None:
+    """Builds the index now and then periodically. Called on app startup."""
+    global _rebuild_task
+    if not config.AUTOCOMPLETE_ENABLED or _rebuild_task is not None:
+        return
+    _rebuild_task = asyncio.get_running_loop().create_task(_background_rebuild_loop())
+
+
+async def stop_background_rebuild() -> None:
+    """Cancels the periodic rebuild. Called on app shutdown."""
+    global _rebuild_task
+    if _rebuild_task is None:
+        return
+    _rebuild_task.cancel()
+    try:
+        await _rebuild_task
+    except asyncio.CancelledError:
+        pass
+    _rebuild_task = None
+
+
+def get_index_stats() -> Optional[Dict[str, Any]]:
+    index = _index
+    return index.stats() if index is not None else None
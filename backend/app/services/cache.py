@@ -0,0 +1,319 @@
+import asyncio
+import logging
+import pickle
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+from .hub_scheduler import PriorityScope, current_scope, join_scope
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size_bytes(value: Any) -> int:
+    """
+    Rough size of a cached value, used for the memory cap.
+    Pickled length is a stable proxy for Pydantic models and plain containers; it's only computed on insert.
+    """
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 1024  # Unpicklable values still count towards the cap
+
+
+def _retrieve_exception(task: "asyncio.Task[Any]") -> None:
+    if not task.cancelled():
+        task.exception()  # Marks it retrieved; waiters, if any, already got it
+
+
+class CacheEntry:
+    __slots__ = ("value", "size", "fresh_until", "stale_until", "error_until")
+
+    def __init__(self, value: Any, size: int, fresh_until: float, stale_until: float, error_until: Optional[float] = None):
+        self.value = value
+        self.size = size
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+        # Past stale_until the entry is only kept as a fallback for when reloading it fails (stale-if-error)
+        self.error_until = stale_until if error_until is None else error_until
+
+
+class CacheBackend:
+    """
+    Storage interface for `AsyncResultCache`. Backends only store and evict entries;
+    freshness, coalescing and refreshes are handled by the cache in front of them.
+
+    Shared backends (`shared = True`) are seen by several processes. They also provide an expiring lock per key,
+    which the cache uses so that only one process at a time loads a missing entry.
+    Storage calls are coroutines, so that shared backends do their I/O without blocking the event loop; `stats`
+    is synchronous and must not do any I/O.
+    """
+
+    shared = False
+    lock_timeout_seconds = 0.0
+    lock_poll_seconds = 0.0
+
+    async def get(self, key: Hashable) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    async def set(self, key: Hashable, entry: CacheEntry) -> None:
+        raise NotImplementedError
+
+    async def delete(self, key: Hashable) -> None:
+        raise NotImplementedError
+
+    async def clear(self) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+    async def acquire_lock(self, key: Hashable) -> Optional[str]:
+        """A token if this process now holds `key`'s load lock (for up to lock_timeout_seconds), else None."""
+        raise NotImplementedError
+
+    async def release_lock(self, key: Hashable, token: str) -> None:
+        raise NotImplementedError
+
+
+class MemoryLRUBackend(CacheBackend):
+    """
+    In-process LRU store capped by entry count and approximate total size in bytes.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._total_bytes = 0
+        self.evictions = 0
+
+    async def get(self, key: Hashable) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: Hashable, entry: CacheEntry) -> None:
+        if entry.size > self.max_bytes:
+            return  # Never let a single oversized value flush the whole cache
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._total_bytes -= old.size
+        self._entries[key] = entry
+        self._total_bytes += entry.size
+        while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._total_bytes -= evicted.size
+            self.evictions += 1
+
+    async def delete(self, key: Hashable) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._total_bytes -= old.size
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+class AsyncResultCache:
+    """
+    Read-through cache for async loaders with:
+    - TTL freshness, then a stale window served while a background refresh runs (stale-while-revalidate).
+    - Request coalescing: concurrent misses for the same key share a single loader call.
+    - Stale-if-error: for `stale_if_error_seconds` past the stale window, an expired entry is still returned when
+      reloading it fails with an error `serve_stale_on` accepts (e.g. upstream throttling), instead of the error.
+    Loader errors are never cached; otherwise they propagate to every caller waiting on that load.
+    A caller that coalesces onto a load started by lower-priority work (e.g. a prefetch) promotes that load's
+    Hub calls to its own priority, so it doesn't wait behind background slots.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: float,
+        stale_ttl_seconds: float = 0.0,
+        backend: Optional[CacheBackend] = None,
+        sizer: Callable[[Any], int] = estimate_size_bytes,
+        stale_if_error_seconds: float = 0.0,
+        serve_stale_on: Optional[Callable[[BaseException], bool]] = None,
+    ):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.stale_ttl_seconds = stale_ttl_seconds
+        self.backend = backend if backend is not None else MemoryLRUBackend(max_entries=1024, max_bytes=64 * 1024 * 1024)
+        self.sizer = sizer
+        self.stale_if_error_seconds = stale_if_error_seconds
+        self.serve_stale_on = serve_stale_on
+        self._inflight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self._inflight_scopes: Dict[Hashable, PriorityScope] = {}  # Loads started under use_priority
+        self._background_tasks: Set["asyncio.Task[Any]"] = set()
+        self._counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "expired": 0,
+            "refreshes": 0,
+            "load_errors": 0,
+            "stale_on_error": 0,
+            # Shared backends only: loads that waited for another process, and those it then answered
+            "lock_waits": 0,
+            "loaded_elsewhere": 0,
+        }
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        now = time.monotonic()
+        entry = await self.backend.get(key)
+        if entry is not None:
+            if now < entry.fresh_until:
+                self._counters["hits"] += 1
+                return entry.value
+            if now < entry.stale_until:
+                self._counters["stale_hits"] += 1
+                if key not in self._inflight:
+                    self._counters["refreshes"] += 1
+                    task = self._start_load(key, loader)
+                    self._background_tasks.add(task)
+                    task.add_done_callback(self._finish_background_refresh)
+                return entry.value
+            self._counters["expired"] += 1
+            if now >= entry.error_until or self.serve_stale_on is None:
+                await self.backend.delete(key)
+                entry = None
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._counters["coalesced"] += 1
+            join_scope(self._inflight_scopes.get(key))
+        else:
+            self._counters["misses"] += 1
+            inflight = self._start_load(key, loader)
+        # Shield so one client disconnecting doesn't cancel a load other callers are waiting on.
+        try:
+            return await asyncio.shield(inflight)
+        except Exception as e:
+            if entry is not None and self.serve_stale_on(e):
+                self._counters["stale_on_error"] += 1
+                logger.warning(f"Serving expired '{self.name}' entry because reloading it failed: {e}")
+                return entry.value
+            raise
+
+    def _start_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> "asyncio.Task[Any]":
+        task = asyncio.ensure_future(self._load(key, loader))
+        self._inflight[key] = task
+        scope = current_scope()  # The task runs in a copy of this context, with the same scope object
+        if scope is not None:
+            self._inflight_scopes[key] = scope
+        # Callers await the load through a shield: if they were all cancelled, nothing else retrieves its error
+        task.add_done_callback(_retrieve_exception)
+        return task
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            if self.backend.shared:
+                return await self._load_single_flight(key, loader)
+            value = await loader()
+        except BaseException:
+            self._counters["load_errors"] += 1
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            self._inflight_scopes.pop(key, None)
+        await self.set(key, value)
+        return value
+
+    async def _load_single_flight(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Loads through a shared backend: the process holding the key's lock calls the loader and stores the value;
+        the others poll the backend for it. If the lock is still held after lock_timeout_seconds (a stuck or dead
+        holder), they load it themselves.
+        """
+        deadline = time.monotonic() + self.backend.lock_timeout_seconds
+        waited = False
+        while True:
+            token = await self.backend.acquire_lock(key)
+            entry = await self.backend.get(key)
+            if entry is not None and time.monotonic() < entry.fresh_until:
+                if token is not None:
+                    await self.backend.release_lock(key, token)
+                if waited:
+                    self._counters["loaded_elsewhere"] += 1
+                return entry.value
+            if token is not None or time.monotonic() >= deadline:
+                break
+            if not waited:
+                waited = True
+                self._counters["lock_waits"] += 1
+            await asyncio.sleep(self.backend.lock_poll_seconds)
+        try:
+            value = await loader()
+            await self.set(key, value)
+            return value
+        finally:
+            if token is not None:
+                await self.backend.release_lock(key, token)
+
+    def _finish_background_refresh(self, task: "asyncio.Task[Any]") -> None:
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            # The stale entry keeps being served until its stale window ends.
+            logger.warning(f"Background refresh failed in cache '{self.name}': {task.exception()}")
+
+    async def get_fresh(self, key: Hashable) -> Optional[Any]:
+        """
+        The value of `key`'s fresh entry (counted as a hit), or None without loading anything. For callers that
+        fetch the value themselves, e.g. to be able to cancel the fetch, and store it with `set`.
+        """
+        entry = await self.backend.get(key)
+        if entry is None or time.monotonic() >= entry.fresh_until:
+            return None
+        self._counters["hits"] += 1
+        return entry.value
+
+    async def is_fresh_or_loading(self, key: Hashable) -> bool:
+        """True if `key` has a fresh entry or a load in flight. Doesn't count as a lookup in the stats."""
+        if key in self._inflight:
+            return True
+        entry = await self.backend.get(key)
+        return entry is not None and time.monotonic() < entry.fresh_until
+
+    async def set(self, key: Hashable, value: Any) -> None:
+        now = time.monotonic()
+        entry = CacheEntry(
+            value=value,
+            size=0 if self.backend.shared else self.sizer(value),  # Shared backends measure the serialized value
+            fresh_until=now + self.ttl_seconds,
+            stale_until=now + self.ttl_seconds + self.stale_ttl_seconds,
+            error_until=now + self.ttl_seconds + self.stale_ttl_seconds + self.stale_if_error_seconds,
+        )
+        await self.backend.set(key, entry)
+
+    async def invalidate(self, key: Hashable) -> None:
+        await self.backend.delete(key)
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._counters["hits"] + self._counters["stale_hits"] + self._counters["misses"] + self._counters["coalesced"]
+        served_from_cache = self._counters["hits"] + self._counters["stale_hits"]
+        return {
+            **self._counters,
+            "hit_ratio": round(served_from_cache / lookups, 4) if lookups else None,
+            "inflight": len(self._inflight),
+            "ttl_seconds": self.ttl_seconds,
+            "stale_ttl_seconds": self.stale_ttl_seconds,
+            "stale_if_error_seconds": self.stale_if_error_seconds,
+            **self.backend.stats(),
+        }
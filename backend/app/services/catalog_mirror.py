@@ -0,0 +1,491 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..core import config, file_lock
+from ..schemas.search_schemas import HFModelSearchResultItem
+from . import facets
+from .hub_scheduler import Priority, use_priority
+
+logger = logging.getLogger(__name__)
+
+# Columns we can sort by, keyed by the API's `sort_by` values.
+SORT_COLUMNS = {
+    "downloads": "downloads",
+    "likes": "likes",
+    "lastModified": "last_modified",
+}
+
+# Page size used when pulling the catalogue from the Hub listing API.
+SYNC_PAGE_SIZE = 1000
+# How often a mirror that hasn't completed a full sync yet is checked again (another worker may be syncing it).
+READY_RECHECK_SECONDS = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    author TEXT,
+    pipeline_tag TEXT,
+    library_name TEXT,
+    tags TEXT NOT NULL DEFAULT '',      -- newline-delimited, with leading/trailing newline for exact matching
+    siblings TEXT NOT NULL DEFAULT '',  -- newline-delimited sibling filenames, same framing as tags
+    downloads INTEGER NOT NULL DEFAULT 0,
+    likes INTEGER NOT NULL DEFAULT 0,
+    last_modified TEXT,                 -- ISO-8601 UTC as sent by the Hub, so it sorts lexicographically
+    private INTEGER NOT NULL DEFAULT 0,
+    has_gguf INTEGER NOT NULL DEFAULT 0,
+    sync_generation INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_models_downloads ON models(downloads DESC);
+CREATE INDEX IF NOT EXISTS idx_models_likes ON models(likes DESC);
+CREATE INDEX IF NOT EXISTS idx_models_last_modified ON models(last_modified DESC);
+CREATE INDEX IF NOT EXISTS idx_models_pipeline_tag ON models(pipeline_tag, downloads DESC);
+CREATE INDEX IF NOT EXISTS idx_models_library ON models(library_name, downloads DESC);
+
+-- Trigram tokenizer gives substring matching on model ids, like the Hub's `search` parameter.
+CREATE VIRTUAL TABLE IF NOT EXISTS models_fts USING fts5(id, content='models', content_rowid='rowid', tokenize='trigram');
+CREATE TRIGGER IF NOT EXISTS models_ai AFTER INSERT ON models BEGIN
+    INSERT INTO models_fts(rowid, id) VALUES (new.rowid, new.id);
+END;
+CREATE TRIGGER IF NOT EXISTS models_ad AFTER DELETE ON models BEGIN
+    INSERT INTO models_fts(models_fts, rowid, id) VALUES ('delete', old.rowid, old.id);
+END;
+CREATE TRIGGER IF NOT EXISTS models_au AFTER UPDATE OF id ON models BEGIN
+    INSERT INTO models_fts(models_fts, rowid, id) VALUES ('delete', old.rowid, old.id);
+    INSERT INTO models_fts(rowid, id) VALUES (new.rowid, new.id);
+END;
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_UPSERT = """
+INSERT INTO models (id, author, pipeline_tag, library_name, tags, siblings, downloads, likes,
+                    last_modified, private, has_gguf, sync_generation)
+VALUES (:id, :author, :pipeline_tag, :library_name, :tags, :siblings, :downloads, :likes,
+        :last_modified, :private, :has_gguf, :sync_generation)
+ON CONFLICT(id) DO UPDATE SET
+    author=excluded.author, pipeline_tag=excluded.pipeline_tag, library_name=excluded.library_name,
+    tags=excluded.tags, siblings=excluded.siblings, downloads=excluded.downloads, likes=excluded.likes,
+    last_modified=excluded.last_modified, private=excluded.private, has_gguf=excluded.has_gguf,
+    sync_generation=excluded.sync_generation
+"""
+
+
+def _join_lines(values: Iterable[str]) -> str:
+    values = [v for v in values if v]
+    return "\n" + "\n".join(values) + "\n" if values else ""
+
+
+def _like_contains(term: str) -> str:
+    """LIKE pattern matching `term` anywhere, with LIKE wildcards escaped (use with ESCAPE '\\')."""
+    return "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def model_record_to_row(record: Dict[str, Any], sync_generation: int) -> Dict[str, Any]:
+    """
+    Converts a raw model dict from the Hub listing API (`/api/models?full=true`) into a `models` row.
+    """
+    model_id = record.get("id") or record.get("modelId")
+    sibling_names = [s.get("rfilename", "") for s in record.get("siblings") or []]
+    return {
+        "id": model_id,
+        "author": record.get("author") or (model_id.split("/", 1)[0] if "/" in model_id else None),
+        "pipeline_tag": record.get("pipeline_tag"),
+        "library_name": record.get("library_name"),
+        "tags": _join_lines(str(t) for t in record.get("tags") or []),
+        "siblings": _join_lines(sibling_names),
+        "downloads": record.get("downloads") or 0,
+        "likes": record.get("likes") or 0,
+        "last_modified": record.get("lastModified") or record.get("last_modified"),
+        "private": 1 if record.get("private") else 0,
+        "has_gguf": 1 if any(name.lower().endswith(".gguf") for name in sibling_names) else 0,
+        "sync_generation": sync_generation,
+    }
+
+
+def iter_catalogue_fixture(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Reads a recorded catalogue (JSON lines of raw Hub model dicts) so sync can run without network access.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+async def record_catalogue_fixture(path: str, limit: int, sort_by: str = "downloads") -> int:
+    """
+    Records the first `limit` models of the Hub listing to a JSON-lines fixture for offline sync/query testing.
+    """
+    from . import hf_service  # Local import: hf_service imports this module
+
+    written = 0
+    params = {"sort": sort_by, "direction": -1, "full": True}
+    with open(path, "w", encoding="utf-8") as f:
+        async for items in hf_service.aiter_hub_model_listing(params, page_size=min(limit, SYNC_PAGE_SIZE)):
+            for record in items[: limit - written]:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                written += 1
+            if written >= limit:
+                break
+    return written
+
+
+class CatalogMirror:
+    """
+    Local SQLite copy of the Hub model catalogue (metadata only) with an FTS5 index on model ids.
+    Reads use one connection per thread; WAL mode lets searches run while a sync is writing.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._sync_lock = threading.Lock()
+        # Readiness only ever goes from False to True, so once seen it's kept in memory instead of queried per search
+        self._ready = False
+        self._next_ready_check = 0.0
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    # --- Sync state ---
+
+    def _get_state(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    @staticmethod
+    def _set_state(conn: sqlite3.Connection, key: str, value: str) -> None:
+        conn.execute(
+            "INSERT INTO sync_state (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+            (key, value),
+        )
+
+    def is_ready(self) -> bool:
+        """
+        True once at least one full sync has completed, i.e. the mirror can answer searches. Until then (the
+        sync may be running in another worker), the mirror is checked at most every READY_RECHECK_SECONDS.
+        """
+        if not self._ready and time.monotonic() >= self._next_ready_check:
+            self._ready = self._get_state("last_full_sync") is not None
+            self._next_ready_check = time.monotonic() + READY_RECHECK_SECONDS
+        return self._ready
+
+    def last_full_sync_age_seconds(self) -> Optional[float]:
+        value = self._get_state("last_full_sync")
+        return time.time() - float(value) if value else None
+
+    # --- Sync ---
+
+    def sync(self, records: Iterable[Dict[str, Any]], incremental: bool = True, batch_size: int = 1000) -> int:
+        """
+        Upserts model records into the mirror.
+
+        Incremental sync expects `records` sorted by lastModified (newest first) and stops at the first record
+        older than the newest one already stored. A full sync (incremental=False) consumes every record and then
+        deletes models that weren't seen, so removed or now-private repos drop out of the mirror.
+        Returns the number of records written.
+        """
+        with self._sync_lock:
+            conn = self._connect()
+            try:
+                watermark = None
+                if incremental:
+                    row = conn.execute("SELECT MAX(last_modified) AS lm FROM models").fetchone()
+                    watermark = row["lm"] if row else None
+                generation = int(conn.execute("SELECT COALESCE(MAX(sync_generation), 0) FROM models").fetchone()[0])
+                if not incremental:
+                    generation += 1
+
+                written = 0
+                batch: List[Dict[str, Any]] = []
+                for record in records:
+                    row = model_record_to_row(record, generation)
+                    if not row["id"]:
+                        continue
+                    if watermark and row["last_modified"] and row["last_modified"] < watermark:
+                        break  # Everything after this is already in the mirror
+                    batch.append(row)
+                    if len(batch) >= batch_size:
+                        with conn:
+                            conn.executemany(_UPSERT, batch)
+                        written += len(batch)
+                        batch = []
+                with conn:
+                    if batch:
+                        conn.executemany(_UPSERT, batch)
+                        written += len(batch)
+                    if not incremental:
+                        deleted = conn.execute("DELETE FROM models WHERE sync_generation < ?", (generation,)).rowcount
+                        logger.info(f"Full catalogue sync removed {deleted} models no longer listed on the Hub.")
+                        self._set_state(conn, "last_full_sync", str(time.time()))
+                    self._set_state(conn, "last_sync", str(time.time()))
+                if not incremental:
+                    self._ready = True
+                logger.info(f"Catalogue sync ({'incremental' if incremental else 'full'}) wrote {written} models.")
+                return written
+            finally:
+                conn.close()
+
+    def sync_from_hub(self, loop: asyncio.AbstractEventLoop, incremental: bool = True) -> int:
+        """
+        Pulls the catalogue from the Hub listing API, newest lastModified first.
+        Runs in a worker thread; listing pages are fetched by the shared async Hub client on `loop`.
+        """
+        from . import hf_service  # Local import: hf_service imports this module
+
+        params = {"sort": "lastModified", "direction": -1, "full": True}
+        return self.sync(hf_service.iter_hub_model_listing(params, loop, page_size=SYNC_PAGE_SIZE), incremental=incremental)
+
+    # --- Query ---
+
+    @staticmethod
+    def _where_clause(
+        search: Optional[str] = None,
+        pipeline_tags: Optional[List[str]] = None,
+        libraries: Optional[List[str]] = None,
+        authors: Optional[List[str]] = None,
+        quantizations: Optional[List[str]] = None,
+        facet_filters: Optional[Dict[str, List[str]]] = None,
+    ) -> Tuple[str, List[Any]]:
+        """SQL condition and parameters for search(); see there for the matching rules."""
+        where: List[str] = ["private = 0"]
+        params: List[Any] = []
+        fts_terms: List[str] = []
+        for term in (search or "").split():
+            if len(term) >= 3:
+                fts_terms.append('"' + term.replace('"', '""') + '"')
+            else:
+                # The trigram index can't match terms shorter than 3 characters
+                where.append("id LIKE ? ESCAPE '\\'")
+                params.append(_like_contains(term))
+        if fts_terms:
+            where.append("rowid IN (SELECT rowid FROM models_fts WHERE models_fts MATCH ?)")
+            params.append(" AND ".join(fts_terms))
+        if pipeline_tags:
+            where.append(f"pipeline_tag IN ({', '.join('?' * len(pipeline_tags))})")
+            params.extend(pipeline_tags)
+        for library in libraries or []:
+            # Hub's `filter=<library>` matches tags; library_name covers records with sparse tags
+            where.append("(library_name = ? OR instr(tags, ?) > 0)")
+            params.extend([library, f"\n{library}\n"])
+        if authors:
+            where.append(f"author IN ({', '.join('?' * len(authors))})")
+            params.extend(authors)
+        for quantization in quantizations or []:
+            # LIKE is case-insensitive for ASCII; GGUF file names spell quant types in either case
+            where.append("has_gguf = 1 AND siblings LIKE ? ESCAPE '\\'")
+            params.append(_like_contains(quantization))
+        for facet, values in (facet_filters or {}).items():
+            if values:
+                condition, condition_params = facets.facet_filter_sql(facet, values)
+                where.append(condition)
+                params.extend(condition_params)
+        return " AND ".join(where), params
+
+    def search(
+        self,
+        search: Optional[str] = None,
+        sort_by: str = "downloads",
+        offset: int = 0,
+        limit: int = 20,
+        pipeline_tags: Optional[List[str]] = None,
+        libraries: Optional[List[str]] = None,
+        authors: Optional[List[str]] = None,
+        quantizations: Optional[List[str]] = None,
+        lean: bool = False,
+        facet_filters: Optional[Dict[str, List[str]]] = None,
+    ) -> Tuple[List[Any], int]:
+        """
+        Returns one page of matching models, sorted descending by `sort_by`, and the exact total match count.
+        Every whitespace-separated search term must appear somewhere in the model id (case-insensitive).
+        The model must have one of `pipeline_tags` and one of `authors` (ORed within each).
+        Every library must match, and at least one GGUF file name must contain each quantization.
+        `facet_filters` (facet -> values) match any value within a facet and every facet, with the same value
+        rules as the facet index (see facets.py).
+        With lean=True, rows are returned as JSON-ready dicts in HFModelSearchResultItem's by-alias shape.
+        """
+        where_sql, params = self._where_clause(search, pipeline_tags, libraries, authors, quantizations, facet_filters)
+        sort_column = SORT_COLUMNS.get(sort_by, "downloads")
+        total = self._conn.execute(f"SELECT COUNT(*) FROM models WHERE {where_sql}", params).fetchone()[0]
+        rows = self._conn.execute(
+            f"SELECT id, author, pipeline_tag, tags, downloads, likes, last_modified, private, has_gguf "
+            f"FROM models WHERE {where_sql} ORDER BY {sort_column} DESC, rowid LIMIT ? OFFSET ?",
+            [*params, limit, offset],
+        ).fetchall()
+
+        if lean:
+            return [
+                {
+                    "id": row["id"], "author": row["author"], "lastModified": row["last_modified"],
+                    "likes": row["likes"], "private": bool(row["private"]), "downloads": row["downloads"],
+                    "tags": [t for t in row["tags"].split("\n") if t], "pipelineTag": row["pipeline_tag"],
+                    "has_gguf": bool(row["has_gguf"]),
+                }
+                for row in rows
+            ], total
+
+        results = [
+            HFModelSearchResultItem.model_validate({
+                "id": row["id"], "author": row["author"],
+                "last_modified": row["last_modified"] or datetime.fromtimestamp(0, tz=timezone.utc),
+                "likes": row["likes"], "private": bool(row["private"]), "downloads": row["downloads"],
+                "tags": [t for t in row["tags"].split("\n") if t], "pipeline_tag": row["pipeline_tag"],
+                "has_gguf": bool(row["has_gguf"]),
+            })
+            for row in rows
+        ]
+        return results, total
+
+    def iter_model_records(self) -> Iterator[Dict[str, Any]]:
+        """
+        Public models as Hub-listing-shaped dicts (id, author, tags, downloads, likes), most downloaded first.
+        Used to build in-memory indexes without another pass over the Hub.
+        """
+        cursor = self._conn.execute(
+            "SELECT id, author, tags, downloads, likes FROM models WHERE private = 0 ORDER BY downloads DESC, rowid"
+        )
+        for row in cursor:
+            yield {
+                "id": row["id"], "author": row["author"], "tags": [t for t in row["tags"].split("\n") if t],
+                "downloads": row["downloads"], "likes": row["likes"],
+            }
+
+    def matching_rowids(
+        self,
+        search: Optional[str] = None,
+        pipeline_tags: Optional[List[str]] = None,
+        libraries: Optional[List[str]] = None,
+        authors: Optional[List[str]] = None,
+        quantizations: Optional[List[str]] = None,
+    ) -> List[int]:
+        """Rowids of the public models search() would match with these filters, for combining with the facet index."""
+        where_sql, params = self._where_clause(search, pipeline_tags, libraries, authors, quantizations)
+        return [row[0] for row in self._conn.execute(f"SELECT rowid FROM models WHERE {where_sql}", params)]
+
+    def iter_facet_rows(self) -> Iterator[Tuple[int, Optional[str], Optional[str], str, str]]:
+        """(rowid, pipeline_tag, library_name, tags, siblings) of every public model, for building the facet index."""
+        yield from self._conn.execute(
+            "SELECT rowid, pipeline_tag, library_name, tags, siblings FROM models WHERE private = 0"
+        )
+
+    def iter_compact_rows(self) -> Iterator[Tuple[str, Optional[str], Optional[str], str, int, int, Optional[str], int]]:
+        """
+        (id, author, pipeline_tag, tags, downloads, likes, last_modified, has_gguf) of every public model in rowid
+        order, for building the compact catalogue.
+        """
+        yield from self._conn.execute(
+            "SELECT id, author, pipeline_tag, tags, downloads, likes, last_modified, has_gguf "
+            "FROM models WHERE private = 0 ORDER BY rowid"
+        )
+
+    def get_sibling_filenames(self, model_id: str) -> Optional[List[str]]:
+        """Sibling filenames recorded for a model, or None if the model isn't mirrored."""
+        row = self._conn.execute("SELECT siblings FROM models WHERE id = ?", (model_id,)).fetchone()
+        if row is None:
+            return None
+        return [name for name in row["siblings"].split("\n") if name]
+
+
+# --- Module-level mirror and background sync ---
+# The mirror is enabled by setting HF_MIRROR_DB_PATH. Until the first full sync completes,
+# search keeps proxying to the Hub.
+
+_mirror: Optional[CatalogMirror] = None
+_sync_task: Optional["asyncio.Task[None]"] = None
+
+
+def get_mirror() -> Optional[CatalogMirror]:
+    """The configured mirror, or None when HF_MIRROR_DB_PATH isn't set."""
+    global _mirror
+    if _mirror is None and config.MIRROR_DB_PATH:
+        db_dir = os.path.dirname(os.path.abspath(config.MIRROR_DB_PATH))
+        os.makedirs(db_dir, exist_ok=True)
+        _mirror = CatalogMirror(config.MIRROR_DB_PATH)
+    return _mirror
+
+
+def get_ready_mirror() -> Optional[CatalogMirror]:
+    """The mirror if it's enabled and has completed a full sync, otherwise None."""
+    mirror = get_mirror()
+    return mirror if mirror is not None and mirror.is_ready() else None
+
+
+def _sync_unless_running_elsewhere(mirror: CatalogMirror, loop: asyncio.AbstractEventLoop) -> Optional[int]:
+    """
+    One sync cycle, unless another worker process is syncing this mirror (None then; its sync serves every
+    worker). Full or incremental is decided under the lock, so a sync that just finished elsewhere counts. Blocking.
+    """
+    lock_fd = file_lock.open_lock_file(f"{mirror.db_path}.sync.lock")
+    try:
+        if not file_lock.try_lock(lock_fd):
+            return None
+        try:
+            age = mirror.last_full_sync_age_seconds()
+            incremental = age is not None and age < config.MIRROR_FULL_SYNC_INTERVAL_SECONDS
+            return mirror.sync_from_hub(loop, incremental)
+        finally:
+            file_lock.unlock(lock_fd)
+    finally:
+        os.close(lock_fd)
+
+
+async def _background_sync_loop(mirror: CatalogMirror) -> None:
+    # Sync traffic queues behind user requests when the Hub rate limit is tight
+    with use_priority(Priority.BACKGROUND):
+        while True:
+            try:
+                await asyncio.to_thread(_sync_unless_running_elsewhere, mirror, asyncio.get_running_loop())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Catalogue sync failed: {e}", exc_info=True)
+            await asyncio.sleep(config.MIRROR_SYNC_INTERVAL_SECONDS)
+
+
+def start_background_sync() -> None:
+    """Starts the periodic catalogue sync if the mirror is enabled. Called on app startup."""
+    global _sync_task
+    mirror = get_mirror()
+    if mirror is None or not config.MIRROR_SYNC_ENABLED or _sync_task is not None:
+        return
+    logger.info(f"Starting background catalogue sync into {mirror.db_path}")
+    _sync_task = asyncio.get_running_loop().create_task(_background_sync_loop(mirror))
+
+
+async def stop_background_sync() -> None:
+    """Cancels the periodic catalogue sync. Called on app shutdown."""
+    global _sync_task
+    if _sync_task is None:
+        return
+    _sync_task.cancel()
+    try:
+        await _sync_task
+    except asyncio.CancelledError:
+        pass
+    _sync_task = None
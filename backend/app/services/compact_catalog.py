@@ -0,0 +1,355 @@
+import asyncio
+import json
+import logging
+import mmap
+import os
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..core import config, file_lock
+from ..schemas.search_schemas import HFModelSearchResultItem
+from . import catalog_mirror
+
+logger = logging.getLogger(__name__)
+
+# --- File format ---
+# MAGIC, the directory length (u64, little-endian), a JSON directory, then 8-byte aligned sections, each a flat
+# array of one typecode. Columns are used straight out of the mapping (memoryview.cast), so the file is shared
+# read-only by every worker process through the page cache, and a worker only pays for the pages it touches.
+#
+# Row i is the i-th public model of the mirror by rowid. Sections:
+#   strings_blob/strings_offsets   interned strings (authors, pipeline tags, tags); string 0 is "" (none)
+#   ids_blob/ids_offsets           model ids (UTF-8)
+#   author, pipeline_tag           string id per row
+#   tag_offsets/tag_ids            tags as string ids; row i's are tag_ids[tag_offsets[i]:tag_offsets[i + 1]]
+#   downloads, likes               per row
+#   last_modified                  Unix milliseconds per row, -1 when unknown
+#   flags                          bit 0: has_gguf
+#   order_<sort_by>                rows sorted descending for each API sort_by (ties by rowid, like the mirror)
+#   task_order_<sort_by>           the same rows grouped by pipeline tag, each group still in sort order
+#   task_keys/task_starts          pipeline tag (string id) of each group and where it starts in task_order_*
+MAGIC = b"HFCCAT01"
+SORT_COLUMNS = ("downloads", "likes", "lastModified")
+_ALIGNMENT = 8
+_HAS_GGUF = 1
+
+CompactRow = Tuple[str, Optional[str], Optional[str], str, int, int, Optional[str], int]
+
+
+def _aligned(size: int) -> int:
+    return -(-size // _ALIGNMENT) * _ALIGNMENT
+
+
+def _parse_last_modified(value: Optional[str]) -> int:
+    if not value:
+        return -1
+    try:
+        return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() * 1000)
+    except ValueError:
+        return -1
+
+
+def _format_last_modified(millis: int) -> Optional[str]:
+    """Back to the Hub's lastModified format (ISO-8601 UTC with milliseconds)."""
+    if millis < 0:
+        return None
+    moment = datetime.fromtimestamp(millis // 1000, tz=timezone.utc)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{millis % 1000:03d}Z"
+
+
+class _StringTable:
+    """Interns strings while building: each distinct author, pipeline tag and tag is stored once."""
+
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {"": 0}
+        self.blob = bytearray()
+        self.offsets = array("I", [0, 0])
+
+    def add(self, value: Optional[str]) -> int:
+        if not value:
+            return 0
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.ids)
+            self.blob += value.encode("utf-8")
+            self.offsets.append(len(self.blob))
+        return string_id
+
+
+def build_compact_catalog(rows: Iterable[CompactRow], path: str) -> int:
+    """
+    Writes a compact catalogue file from (id, author, pipeline_tag, tags, downloads, likes, last_modified, has_gguf)
+    rows in rowid order (see CatalogMirror.iter_compact_rows). The file is written beside `path` and renamed over
+    it, so readers never see a partial file. Returns the number of rows.
+    """
+    strings = _StringTable()
+    ids_blob = bytearray()
+    ids_offsets = array("I", [0])
+    authors, pipeline_tags = array("I"), array("I")
+    tag_offsets, tag_ids = array("I", [0]), array("I")
+    downloads, likes, last_modified = array("q"), array("q"), array("q")
+    flags = array("B")
+    for model_id, author, pipeline_tag, tags, row_downloads, row_likes, row_last_modified, has_gguf in rows:
+        ids_blob += model_id.encode("utf-8")
+        ids_offsets.append(len(ids_blob))
+        authors.append(strings.add(author))
+        pipeline_tags.append(strings.add(pipeline_tag))
+        tag_ids.extend(strings.add(tag) for tag in tags.split("\n") if tag)
+        tag_offsets.append(len(tag_ids))
+        downloads.append(row_downloads or 0)
+        likes.append(row_likes or 0)
+        last_modified.append(_parse_last_modified(row_last_modified))
+        flags.append(_HAS_GGUF if has_gguf else 0)
+
+    sections: Dict[str, Any] = {
+        "strings_blob": strings.blob, "strings_offsets": strings.offsets,
+        "ids_blob": ids_blob, "ids_offsets": ids_offsets,
+        "author": authors, "pipeline_tag": pipeline_tags,
+        "tag_offsets": tag_offsets, "tag_ids": tag_ids,
+        "downloads": downloads, "likes": likes, "last_modified": last_modified, "flags": flags,
+    }
+    group_sizes: Dict[int, int] = {}
+    for tag in pipeline_tags:
+        group_sizes[tag] = group_sizes.get(tag, 0) + 1
+    task_keys = array("I", sorted(group_sizes))
+    task_starts = array("I", [0])
+    for tag in task_keys:
+        task_starts.append(task_starts[-1] + group_sizes[tag])
+    sections["task_keys"], sections["task_starts"] = task_keys, task_starts
+    for sort_by, keys in (("downloads", downloads), ("likes", likes), ("lastModified", last_modified)):
+        # Both sorts are stable (reverse=True included), so equal keys keep rowid order
+        order = array("I", sorted(range(len(keys)), key=keys.__getitem__, reverse=True))
+        sections[f"order_{sort_by}"] = order
+        sections[f"task_order_{sort_by}"] = array("I", sorted(order, key=pipeline_tags.__getitem__))
+
+    _write_sections(path, sections, {"rows": len(downloads), "strings": len(strings.ids), "built_at": time.time()})
+    return len(downloads)
+
+
+def _write_sections(path: str, sections: Dict[str, Any], meta: Dict[str, Any]) -> None:
+    layout: Dict[str, List[Any]] = {}
+    offset = 0  # Relative to the end of the header
+    for name, data in sections.items():
+        typecode, itemsize = (data.typecode, data.itemsize) if isinstance(data, array) else ("B", 1)
+        layout[name] = [typecode, itemsize, offset, len(data)]
+        offset += _aligned(len(data) * itemsize)
+    directory = json.dumps({**meta, "sections": layout}).encode("utf-8")
+    header = MAGIC + len(directory).to_bytes(8, "little") + directory
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(header + b"\0" * (_aligned(len(header)) - len(header)))
+            for name, data in sections.items():
+                if isinstance(data, array):
+                    data.tofile(f)
+                else:
+                    f.write(data)
+                size = len(data) * layout[name][1]
+                f.write(b"\0" * (_aligned(size) - size))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class CompactCatalog:
+    """
+    Read-only view of a compact catalogue file: a few bytes per model per column instead of a ModelInfo or
+    HFModelSearchResultItem per model. Sorting is precomputed, so a page of any sort order (optionally within one
+    pipeline tag) is a slice of a row-number array, and items are only decoded for the rows of the page.
+    """
+    __slots__ = (
+        "path", "rows", "built_at", "file_bytes", "_mmap", "_strings_blob", "_strings_offsets", "_ids_blob",
+        "_ids_offsets", "_author", "_pipeline_tag", "_tag_offsets", "_tag_ids", "_downloads", "_likes",
+        "_last_modified", "_flags", "_orders", "_task_orders", "_task_groups",
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a compact catalogue file")
+        directory_size = int.from_bytes(self._mmap[len(MAGIC):len(MAGIC) + 8], "little")
+        directory_end = len(MAGIC) + 8 + directory_size
+        directory = json.loads(self._mmap[len(MAGIC) + 8:directory_end])
+        data_start = _aligned(directory_end)
+        view = memoryview(self._mmap)
+        sections: Dict[str, memoryview] = {}
+        for name, (typecode, itemsize, offset, length) in directory["sections"].items():
+            if array(typecode).itemsize != itemsize:
+                raise ValueError(f"{path} was written on a platform with different {typecode!r} item sizes")
+            start = data_start + offset
+            sections[name] = view[start:start + length * itemsize].cast(typecode)
+
+        self.rows: int = directory["rows"]
+        self.built_at: float = directory["built_at"]
+        self.file_bytes = len(self._mmap)
+        self._strings_blob, self._strings_offsets = sections["strings_blob"], sections["strings_offsets"]
+        self._ids_blob, self._ids_offsets = sections["ids_blob"], sections["ids_offsets"]
+        self._author, self._pipeline_tag = sections["author"], sections["pipeline_tag"]
+        self._tag_offsets, self._tag_ids = sections["tag_offsets"], sections["tag_ids"]
+        self._downloads, self._likes = sections["downloads"], sections["likes"]
+        self._last_modified, self._flags = sections["last_modified"], sections["flags"]
+        self._orders = {sort_by: sections[f"order_{sort_by}"] for sort_by in SORT_COLUMNS}
+        self._task_orders = {sort_by: sections[f"task_order_{sort_by}"] for sort_by in SORT_COLUMNS}
+        task_keys, task_starts = sections["task_keys"], sections["task_starts"]
+        self._task_groups = {
+            self._string(key): (task_starts[i], task_starts[i + 1]) for i, key in enumerate(task_keys) if key
+        }
+
+    def _string(self, string_id: int) -> Optional[str]:
+        if not string_id:
+            return None
+        return str(self._strings_blob[self._strings_offsets[string_id]:self._strings_offsets[string_id + 1]], "utf-8")
+
+    def page(self, sort_by: str, offset: int, limit: int, pipeline_tag: Optional[str] = None) -> Tuple[List[int], int]:
+        """Row numbers of one page sorted descending by `sort_by`, and the exact number of matching rows."""
+        if pipeline_tag is None:
+            order, start, end = self._orders.get(sort_by, self._orders["downloads"]), 0, self.rows
+        else:
+            group = self._task_groups.get(pipeline_tag)
+            if group is None:
+                return [], 0
+            order, (start, end) = self._task_orders.get(sort_by, self._task_orders["downloads"]), group
+        first = min(end, start + offset)
+        return order[first:min(end, first + limit)].tolist(), end - start
+
+    def lean_item(self, row: int) -> Dict[str, Any]:
+        """One row in HFModelSearchResultItem's by-alias JSON shape (as CatalogMirror.search(lean=True) returns it)."""
+        author = self._string(self._author[row])
+        return {
+            "id": str(self._ids_blob[self._ids_offsets[row]:self._ids_offsets[row + 1]], "utf-8"),
+            "author": author,
+            "lastModified": _format_last_modified(self._last_modified[row]),
+            "likes": self._likes[row],
+            "private": False,
+            "downloads": self._downloads[row],
+            "tags": [self._string(t) for t in self._tag_ids[self._tag_offsets[row]:self._tag_offsets[row + 1]]],
+            "pipelineTag": self._string(self._pipeline_tag[row]),
+            "has_gguf": bool(self._flags[row] & _HAS_GGUF),
+        }
+
+    def search_items(self, rows: List[int], lean: bool = False) -> List[Any]:
+        """Items for the given rows; Pydantic objects are only built here, for the rows of the page."""
+        items = [self.lean_item(row) for row in rows]
+        if lean:
+            return items
+        epoch = datetime.fromtimestamp(0, tz=timezone.utc)
+        return [
+            HFModelSearchResultItem.model_validate({**item, "lastModified": item["lastModified"] or epoch})
+            for item in items
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "rows": self.rows,
+            "file_bytes": self.file_bytes,
+            "age_seconds": round(time.time() - self.built_at, 1),
+        }
+
+
+# --- Module-level catalogue ---
+# Rebuilt from the catalogue mirror into COMPACT_CATALOG_PATH in the background. With several uvicorn workers,
+# a lock file makes one of them rebuild while every worker maps whichever file is newest, so all workers share
+# one copy in the page cache. Pages served from it can lag the mirror by up to COMPACT_CATALOG_REBUILD_INTERVAL_SECONDS.
+
+_catalog: Optional[CompactCatalog] = None
+_catalog_signature: Optional[Tuple[int, int]] = None  # (inode, mtime_ns) of the mapped file
+_refresh_task: Optional["asyncio.Task[None]"] = None
+
+
+def get_catalog() -> Optional[CompactCatalog]:
+    return _catalog
+
+
+def catalog_path() -> Optional[str]:
+    if config.COMPACT_CATALOG_PATH:
+        return config.COMPACT_CATALOG_PATH
+    return f"{config.MIRROR_DB_PATH}.compact" if config.MIRROR_DB_PATH else None
+
+
+def _rebuild_if_stale(mirror: "catalog_mirror.CatalogMirror", path: str) -> bool:
+    """Rebuilds the file if it's older than the rebuild interval and no other worker is rebuilding it. Blocking."""
+    lock_fd = file_lock.open_lock_file(f"{path}.lock")
+    try:
+        if not file_lock.try_lock(lock_fd):
+            return False  # Another worker is rebuilding; pick its file up on the next check
+        try:
+            # Checked under the lock: another worker may have just finished a rebuild
+            if os.path.exists(path) and time.time() - os.path.getmtime(path) < config.COMPACT_CATALOG_REBUILD_INTERVAL_SECONDS:
+                return False
+            started = time.perf_counter()
+            rows = build_compact_catalog(mirror.iter_compact_rows(), path)
+            logger.info(f"Compact catalogue rebuilt: {rows} models in {path}, {time.perf_counter() - started:.1f}s")
+            return True
+        finally:
+            file_lock.unlock(lock_fd)
+    finally:
+        os.close(lock_fd)
+
+
+def _load_if_changed(path: str) -> None:
+    """Maps the file if it changed since it was last mapped. The previous mapping is released once unused."""
+    global _catalog, _catalog_signature
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return
+    signature = (stat.st_ino, stat.st_mtime_ns)
+    if signature != _catalog_signature:
+        _catalog = CompactCatalog(path)
+        _catalog_signature = signature
+
+
+async def refresh() -> Optional[CompactCatalog]:
+    """Rebuilds the file if it's stale and the mirror is ready, then maps the newest file."""
+    path = catalog_path()
+    if path is None:
+        return None
+    mirror = catalog_mirror.get_ready_mirror()
+    if mirror is not None:
+        await asyncio.to_thread(_rebuild_if_stale, mirror, path)
+    _load_if_changed(path)
+    return _catalog
+
+
+async def _background_refresh_loop() -> None:
+    while True:
+        try:
+            await refresh()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Compact catalogue refresh failed: {e}", exc_info=True)
+        await asyncio.sleep(config.COMPACT_CATALOG_CHECK_INTERVAL_SECONDS)
+
+
+def start_background_refresh() -> None:
+    """Builds or maps the catalogue file, then keeps it fresh. Called on app startup."""
+    global _refresh_task
+    if not config.COMPACT_CATALOG_ENABLED or catalog_path() is None or _refresh_task is not None:
+        return
+    _refresh_task = asyncio.get_running_loop().create_task(_background_refresh_loop())
+
+
+async def stop_background_refresh() -> None:
+    """Cancels the periodic refresh. Called on app shutdown."""
+    global _refresh_task
+    if _refresh_task is None:
+        return
+    _refresh_task.cancel()
+    try:
+        await _refresh_task
+    except asyncio.CancelledError:
+        pass
+    _refresh_task = None
+
+
+def get_catalog_stats() -> Optional[Dict[str, Any]]:
+    return _catalog.stats() if _catalog is not None else None
@@ -0,0 +1,339 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import re
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from ..core import config
+from . import catalog_mirror
+
+logger = logging.getLogger(__name__)
+
+# Facets the search API can filter on and count, and where each value comes from in the mirror's `models` row:
+# task: pipeline_tag; library: library_name; license: `license:<x>` tags; language: two-letter ISO 639-1 tags;
+# quantization: quant type in the names of .gguf files (e.g. model-Q4_K_M.gguf, model.Q8_0-00001-of-00002.gguf).
+FACETS = ("task", "library", "license", "language", "quantization")
+
+_LANGUAGE_TAG = re.compile(r"^[a-z]{2}$")
+_GGUF_QUANTIZATION = re.compile(
+    r"[-_.]((?:I?Q\d\w*?)|BF16|F16|F32)(?:-\d{5}-of-\d{5})?\.gguf$", re.IGNORECASE
+)
+_QUANTIZATION_VALUE = re.compile(r"^(?:I?Q\d\w*|BF16|F16|F32)$")
+# Separators the quantization pattern accepts before the quant type, as LIKE patterns ('_' escaped)
+_QUANTIZATION_SEPARATORS = ("-", "\\_", ".")
+
+Postings = Union[int, "array[int]"]  # Bitmap (bit i set for rowid i) or sorted array of rowids
+
+
+class InvalidFacetFilterError(ValueError):
+    """Raised for facet filters that name an unknown facet or can't be applied."""
+
+
+def parse_facet_filters(raw_filters: Optional[Iterable[str]]) -> Dict[str, List[str]]:
+    """
+    Parses `facet:value` strings (e.g. "license:mit") into facet -> values, de-duplicated and sorted so that
+    equal selections give equal cache keys and cursors. Quantizations are upper-cased.
+    """
+    selected: Dict[str, List[str]] = {}
+    for raw in raw_filters or ():
+        facet, sep, value = raw.partition(":")
+        facet, value = facet.strip().lower(), value.strip()
+        if not sep or facet not in FACETS or not value:
+            raise InvalidFacetFilterError(
+                f"Invalid facet filter '{raw}'; expected <facet>:<value> with facet one of {', '.join(FACETS)}."
+            )
+        if facet == "quantization":
+            value = value.upper()
+            if not _QUANTIZATION_VALUE.match(value):
+                raise InvalidFacetFilterError(f"Invalid GGUF quantization '{value}' (e.g. Q4_K_M, IQ4_XS, F16).")
+        values = selected.setdefault(facet, [])
+        if value not in values:
+            values.append(value)
+    return {facet: sorted(values) for facet, values in sorted(selected.items())}
+
+
+def facet_filters_key(facet_filters: Optional[Dict[str, List[str]]]) -> Optional[Tuple[Tuple[str, Tuple[str, ...]], ...]]:
+    """Hashable form of parsed facet filters, for cache keys (None when there are none)."""
+    if not facet_filters:
+        return None
+    return tuple((facet, tuple(values)) for facet, values in facet_filters.items())
+
+
+def row_facet_values(
+    pipeline_tag: Optional[str], library_name: Optional[str], tags: str, siblings: str
+) -> Dict[str, List[str]]:
+    """Facet values of one mirror row (tags and siblings in the mirror's newline-framed form)."""
+    licenses: List[str] = []
+    languages: List[str] = []
+    for tag in tags.split("\n"):
+        if tag.startswith("license:"):
+            licenses.append(tag[len("license:"):])
+        elif _LANGUAGE_TAG.match(tag):
+            languages.append(tag)
+    quantizations: List[str] = []
+    if ".gguf" in siblings.lower():
+        for name in siblings.split("\n"):
+            match = _GGUF_QUANTIZATION.search(name)
+            if match and match.group(1).upper() not in quantizations:
+                quantizations.append(match.group(1).upper())
+    return {
+        "task": [pipeline_tag] if pipeline_tag else [],
+        "library": [library_name] if library_name else [],
+        "license": licenses,
+        "language": languages,
+        "quantization": quantizations,
+    }
+
+
+def facet_filter_sql(facet: str, values: Sequence[str]) -> Tuple[str, List[Any]]:
+    """SQL condition on the `models` table matching any of `values` of `facet`, with row_facet_values' rules."""
+    if facet == "task":
+        return f"pipeline_tag IN ({', '.join('?' * len(values))})", list(values)
+    if facet == "library":
+        return f"library_name IN ({', '.join('?' * len(values))})", list(values)
+    if facet in ("license", "language"):
+        prefix = "license:" if facet == "license" else ""
+        return "(" + " OR ".join("instr(tags, ?) > 0" for _ in values) + ")", [f"\n{prefix}{v}\n" for v in values]
+    if facet == "quantization":
+        # Same anchoring as _GGUF_QUANTIZATION: a separator before the quant type, `.gguf` (or a split-file
+        # suffix) and the end of the file name after it. LIKE is case-insensitive for ASCII.
+        patterns: List[str] = []
+        for value in values:
+            escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            for separator in _QUANTIZATION_SEPARATORS:
+                patterns.append(f"%{separator}{escaped}.gguf\n%")
+                patterns.append(f"%{separator}{escaped}-_____-of-_____.gguf\n%")
+        return "(has_gguf = 1 AND (" + " OR ".join("siblings LIKE ? ESCAPE '\\'" for _ in patterns) + "))", patterns
+    raise InvalidFacetFilterError(f"Unknown facet '{facet}'.")
+
+
+def bitmap_from_rowids(rowids: Iterable[int], size_bits: int) -> int:
+    """
+    Bitmap (as a Python int) with bit i set for every rowid i. Rowids at or past `size_bits` are dropped:
+    rows a sync added after the index was built aren't in it until the next rebuild.
+    """
+    buffer = bytearray((size_bits >> 3) + 1)
+    for rowid in rowids:
+        if rowid < size_bits:
+            buffer[rowid >> 3] |= 1 << (rowid & 7)
+    return int.from_bytes(buffer, "little")
+
+
+# Numbers each FacetIndex, so cached counts are keyed to the index they came from (id() is reused once freed).
+_generations = itertools.count(1)
+
+
+class FacetIndex:
+    """
+    Immutable per-value posting lists over mirror rowids, for counting facet values under arbitrary filters.
+    Values held by at least 1/256 of the rows are stored as bitmaps (Python ints: AND and popcount run in C over
+    machine words, far faster than checking rowids one by one in Python, so worth up to 8x the memory of a rowid
+    array); rarer values as sorted uint32 rowid arrays.
+    Counting follows the usual multi-select rules: each facet is counted under every filter except its own,
+    so the other values of a facet being filtered on keep their counts.
+    """
+
+    def __init__(self, postings: Dict[str, Dict[str, Postings]], sizes: Dict[str, Dict[str, int]], universe: int, size_bits: int):
+        self._postings = postings
+        self._sizes = sizes  # facet -> value -> number of rows, for ordering and upper bounds
+        self._universe = universe  # All indexed (public) rows
+        self.size_bits = size_bits
+        self.generation = next(_generations)
+        self.row_count = universe.bit_count()
+        self.memory_bytes = sum(
+            (p.bit_length() + 7) // 8 if isinstance(p, int) else p.itemsize * len(p)
+            for values in postings.values() for p in values.values()
+        ) + (universe.bit_length() + 7) // 8
+        # Values of each facet from most to least rows
+        self._by_size = {facet: sorted(values, key=values.__getitem__, reverse=True) for facet, values in sizes.items()}
+
+    def _bitmap(self, facet: str, value: str) -> int:
+        postings = self._postings[facet].get(value)
+        if postings is None:
+            return 0
+        return postings if isinstance(postings, int) else bitmap_from_rowids(postings, self.size_bits)
+
+    def selection_bitmap(self, facet: str, values: Sequence[str]) -> int:
+        """Rows holding any of `values` of `facet`."""
+        bitmap = 0
+        for value in values:
+            bitmap |= self._bitmap(facet, value)
+        return bitmap
+
+    def _count_facet(self, facet: str, base: Optional[int], limit: int, always: Sequence[str]) -> List[Dict[str, Any]]:
+        sizes = self._sizes[facet]
+        if base is None:  # Unfiltered: the counts are the value sizes
+            top = self._by_size[facet][:limit]
+            counts = {value: sizes[value] for value in top}
+        else:
+            base_bytes: Optional[bytes] = None
+            best: List[Tuple[int, str]] = []  # Min-heap of the `limit` largest counts so far
+            for value in self._by_size[facet]:
+                if len(best) >= limit and best[0][0] >= sizes[value]:
+                    break  # Values are in descending size order, and a count can't exceed its value's size
+                postings = self._postings[facet][value]
+                if isinstance(postings, int):
+                    count = (postings & base).bit_count()
+                else:
+                    if base_bytes is None:
+                        base_bytes = base.to_bytes((self.size_bits >> 3) + 1, "little")
+                    count = sum((base_bytes[r >> 3] >> (r & 7)) & 1 for r in postings)
+                if count and (len(best) < limit or count > best[0][0]):
+                    if len(best) >= limit:
+                        heapq.heapreplace(best, (count, value))
+                    else:
+                        heapq.heappush(best, (count, value))
+            counts = {value: count for count, value in best}
+            for value in always:  # Selected values are listed even when they're outside the top `limit`
+                if value not in counts:
+                    counts[value] = (self._bitmap(facet, value) & base).bit_count()
+        if base is None:
+            for value in always:
+                counts.setdefault(value, sizes.get(value, 0))
+        return [{"value": value, "count": count} for value, count in sorted(counts.items(), key=lambda vc: (-vc[1], vc[0]))]
+
+    def counts(
+        self,
+        base: Optional[int],
+        facet_filters: Dict[str, List[str]],
+        facets: Sequence[str] = FACETS,
+        limit: int = 20,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Top `limit` values and their counts for each of `facets`, over the rows in `base` (None: every row)
+        narrowed by `facet_filters`. Each facet ignores its own filter; its selected values are always listed.
+        """
+        selections = {facet: self.selection_bitmap(facet, values) for facet, values in facet_filters.items() if values}
+        result: Dict[str, List[Dict[str, Any]]] = {}
+        for facet in facets:
+            facet_base = base
+            for other, bitmap in selections.items():
+                if other != facet:
+                    facet_base = (self._universe if facet_base is None else facet_base) & bitmap
+            result[facet] = self._count_facet(facet, facet_base, limit, facet_filters.get(facet, ()))
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rows": self.row_count,
+            "values": {facet: len(values) for facet, values in self._sizes.items()},
+            "bitmaps": sum(isinstance(p, int) for values in self._postings.values() for p in values.values()),
+            "memory_bytes": self.memory_bytes,
+        }
+
+
+def build_facet_index(rows: Iterable[Tuple[int, Optional[str], Optional[str], str, str]]) -> FacetIndex:
+    """Builds a FacetIndex from (rowid, pipeline_tag, library_name, tags, siblings) rows."""
+    lists: Dict[str, Dict[str, "array[int]"]] = {facet: {} for facet in FACETS}
+    rowids = array("I")
+    for rowid, pipeline_tag, library_name, tags, siblings in rows:
+        rowids.append(rowid)
+        for facet, values in row_facet_values(pipeline_tag, library_name, tags, siblings).items():
+            facet_lists = lists[facet]
+            for value in values:
+                postings = facet_lists.get(value)
+                if postings is None:
+                    postings = facet_lists[value] = array("I")
+                postings.append(rowid)
+
+    size_bits = max(rowids) + 1 if rowids else 1
+    dense_threshold = size_bits // 256  # Below this many rows, walking a uint32 array beats a full-width bitmap AND
+    postings_by_facet: Dict[str, Dict[str, Postings]] = {}
+    sizes: Dict[str, Dict[str, int]] = {}
+    for facet, facet_lists in lists.items():
+        postings_by_facet[facet] = {}
+        sizes[facet] = {}
+        for value, postings in facet_lists.items():
+            sizes[facet][value] = len(postings)
+            postings_by_facet[facet][value] = (
+                bitmap_from_rowids(postings, size_bits) if len(postings) >= dense_threshold else postings
+            )
+    return FacetIndex(postings_by_facet, sizes, bitmap_from_rowids(rowids, size_bits), size_bits)
+
+
+# --- Module-level index ---
+# Built from the catalogue mirror in the background (after the mirror is ready, then periodically) and swapped in
+# with one assignment. Rowids added or removed by syncs since the last build are counted from the previous
+# snapshot until the next rebuild.
+
+_index: Optional[FacetIndex] = None
+_rebuild_task: Optional["asyncio.Task[None]"] = None
+
+
+def get_index() -> Optional[FacetIndex]:
+    return _index
+
+
+def compute_facet_counts(
+    mirror: "catalog_mirror.CatalogMirror",
+    index: FacetIndex,
+    base_filters: Dict[str, Any],
+    facet_filters: Dict[str, List[str]],
+    facets: Sequence[str],
+    limit: int,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Facet counts for a search: rows matching the non-facet filters (`base_filters`, as for
+    CatalogMirror.matching_rowids; all rows when there are none) narrowed by `facet_filters`. Blocking.
+    """
+    base = None
+    if any(base_filters.values()):
+        base = bitmap_from_rowids(mirror.matching_rowids(**base_filters), index.size_bits)
+    return index.counts(base, facet_filters, facets, limit)
+
+
+async def rebuild_index() -> Optional[FacetIndex]:
+    """Builds a fresh index from the mirror and swaps it in. Returns None if the mirror isn't ready yet."""
+    global _index
+    mirror = catalog_mirror.get_ready_mirror()
+    if mirror is None:
+        return None
+    started = time.perf_counter()
+    index = await asyncio.to_thread(lambda: build_facet_index(mirror.iter_facet_rows()))
+    _index = index
+    logger.info(
+        f"Facet index rebuilt: {index.row_count} models, ~{index.memory_bytes / 1e6:.1f} MB, "
+        f"{time.perf_counter() - started:.1f}s"
+    )
+    return index
+
+
+async def _background_rebuild_loop() -> None:
+    while True:
+        try:
+            index = await rebuild_index()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Facet index rebuild failed: {e}", exc_info=True)
+            index = None
+        # Until the mirror's first full sync finishes, check back soon instead of waiting a whole interval
+        await asyncio.sleep(config.FACETS_REBUILD_INTERVAL_SECONDS if index is not None or _index is not None else 60.0)
+
+
+def start_background_rebuild() -> None:
+    """Builds the index once the mirror is ready, then periodically. Called on app startup."""
+    global _rebuild_task
+    if not config.FACETS_ENABLED or catalog_mirror.get_mirror() is None or _rebuild_task is not None:
+        return
+    _rebuild_task = asyncio.get_running_loop().create_task(_background_rebuild_loop())
+
+
+async def stop_background_rebuild() -> None:
+    """Cancels the periodic rebuild. Called on app shutdown."""
+    global _rebuild_task
+    if _rebuild_task is None:
+        return
+    _rebuild_task.cancel()
+    try:
+        await _rebuild_task
+    except asyncio.CancelledError:
+        pass
+    _rebuild_task = None
+
+
+def get_index_stats() -> Optional[Dict[str, Any]]:
+    return _index.stats() if _index is not None else None
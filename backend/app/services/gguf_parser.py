@@ -0,0 +1,264 @@
+import struct
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# GGUF layout (https://github.com/ggml-org/ggml/blob/master/docs/gguf.md):
+#   magic "GGUF" | uint32 version | tensor_count | metadata_kv_count | metadata KVs | tensor infos | (aligned) tensor data
+# Everything this module needs is in the header, in front of the tensor data, so callers only have to
+# supply the first few MB of a file (usually far less) no matter how large the file is.
+
+GGUF_MAGIC = b"GGUF"
+
+# Metadata value types
+_UINT8, _INT8, _UINT16, _INT16, _UINT32, _INT32, _FLOAT32, _BOOL, _STRING, _ARRAY, _UINT64, _INT64, _FLOAT64 = range(13)
+_SCALAR_FORMATS = {
+    _UINT8: "B", _INT8: "b", _UINT16: "H", _INT16: "h", _UINT32: "I", _INT32: "i", _FLOAT32: "f",
+    _BOOL: "?", _UINT64: "Q", _INT64: "q", _FLOAT64: "d",
+}
+
+# `general.file_type` (llama_ftype) -> the quantization name used in llama.cpp and GGUF file names
+FILE_TYPE_NAMES = {
+    0: "F32", 1: "F16", 2: "Q4_0", 3: "Q4_1", 7: "Q8_0", 8: "Q5_0", 9: "Q5_1", 10: "Q2_K",
+    11: "Q3_K_S", 12: "Q3_K_M", 13: "Q3_K_L", 14: "Q4_K_S", 15: "Q4_K_M", 16: "Q5_K_S", 17: "Q5_K_M",
+    18: "Q6_K", 19: "IQ2_XXS", 20: "IQ2_XS", 21: "Q2_K_S", 22: "IQ3_XS", 23: "IQ3_XXS", 24: "IQ1_S",
+    25: "IQ4_NL", 26: "IQ3_S", 27: "IQ3_M", 28: "IQ2_S", 29: "IQ2_M", 30: "IQ4_XS", 31: "IQ1_M",
+    32: "BF16", 33: "Q4_0_4_4", 34: "Q4_0_4_8", 35: "Q4_0_8_8", 36: "TQ1_0", 37: "TQ2_0",
+}
+
+# Tensor types (ggml_type); used when a file has no `general.file_type`
+TENSOR_TYPE_NAMES = {
+    0: "F32", 1: "F16", 2: "Q4_0", 3: "Q4_1", 6: "Q5_0", 7: "Q5_1", 8: "Q8_0", 9: "Q8_1", 10: "Q2_K",
+    11: "Q3_K", 12: "Q4_K", 13: "Q5_K", 14: "Q6_K", 15: "Q8_K", 16: "IQ2_XXS", 17: "IQ2_XS", 18: "IQ3_XXS",
+    19: "IQ1_S", 20: "IQ4_NL", 21: "IQ3_S", 22: "IQ2_S", 23: "IQ4_XS", 24: "I8", 25: "I16", 26: "I32",
+    27: "I64", 28: "F64", 29: "IQ1_M", 30: "BF16", 34: "TQ1_0", 35: "TQ2_0",
+}
+
+
+class GGUFFormatError(ValueError):
+    """Raised when the bytes are not a GGUF header this parser understands."""
+
+
+class GGUFTruncatedError(Exception):
+    """Raised when the header continues past the end of the supplied bytes. `needed` is a lower bound on the total length."""
+
+    def __init__(self, needed: int):
+        super().__init__(f"GGUF header needs at least {needed} bytes")
+        self.needed = needed
+
+
+@dataclass
+class GGUFHeaderInfo:
+    """The parts of a GGUF header shown in model details."""
+    version: int
+    tensor_count: int
+    quantization: Optional[str] = None
+    architecture: Optional[str] = None
+    context_length: Optional[int] = None
+    parameter_count: Optional[int] = None
+    header_bytes: int = 0  # Where the header ends (start of tensor data padding)
+
+
+class _Reader:
+    """Cursor over a bytes buffer; raises GGUFTruncatedError instead of reading past the end."""
+
+    __slots__ = ("data", "pos", "endian", "_u32", "_u64", "count", "_count_size")
+
+    def __init__(self, data: bytes, endian: str = "<", version: int = 3):
+        self.data = data
+        self.pos = 0
+        self.endian = endian
+        self._u32 = struct.Struct(endian + "I").unpack_from
+        self._u64 = struct.Struct(endian + "Q").unpack_from
+        # Counts, string lengths and tensor dims: 32-bit in GGUF v1, 64-bit since v2
+        self.count = self.u32 if version == 1 else self.u64
+        self._count_size = 4 if version == 1 else 8
+
+    def _need(self, n: int) -> int:
+        start = self.pos
+        end = start + n
+        if end > len(self.data):
+            raise GGUFTruncatedError(end)
+        self.pos = end
+        return start
+
+    def u32(self) -> int:
+        return self._u32(self.data, self._need(4))[0]
+
+    def u64(self) -> int:
+        return self._u64(self.data, self._need(8))[0]
+
+    def skip(self, n: int) -> None:
+        self._need(n)
+
+    def string(self) -> str:
+        length = self.count()
+        start = self._need(length)
+        return self.data[start:start + length].decode("utf-8", errors="replace")
+
+    def skip_string(self) -> None:
+        self._need(self.count())
+
+    def skip_strings(self, n: int) -> None:
+        # Hot loop for tokenizer vocabularies (100k+ strings): locals only, no per-item method calls
+        data, pos, size, end = self.data, self.pos, self._count_size, len(self.data)
+        unpack_length = self._u32 if size == 4 else self._u64
+        for _ in range(n):
+            if pos + size > end:
+                raise GGUFTruncatedError(pos + size)
+            pos += size + unpack_length(data, pos)[0]
+        if pos > end:
+            raise GGUFTruncatedError(pos)
+        self.pos = pos
+
+    def scalar(self, value_type: int) -> Any:
+        fmt = self.endian + _SCALAR_FORMATS[value_type]
+        return struct.unpack_from(fmt, self.data, self._need(struct.calcsize(fmt)))[0]
+
+
+def _read_value(reader: _Reader, value_type: int, keep: bool) -> Any:
+    """
+    Reads one metadata value. With keep=False the value is skipped: fixed-size arrays (token scores, token types)
+    are jumped over in one step, and string arrays (the tokenizer vocabulary) are walked without decoding.
+    """
+    if value_type == _STRING:
+        if keep:
+            return reader.string()
+        reader.skip_string()
+        return None
+    if value_type == _ARRAY:
+        item_type = reader.u32()
+        count = reader.count()
+        if not keep and item_type in _SCALAR_FORMATS:
+            reader.skip(count * struct.calcsize(_SCALAR_FORMATS[item_type]))
+            return None
+        if not keep and item_type == _STRING:
+            reader.skip_strings(count)
+            return None
+        items = [_read_value(reader, item_type, keep) for _ in range(count)]
+        return items if keep else None
+    if value_type in _SCALAR_FORMATS:
+        return reader.scalar(value_type)
+    raise GGUFFormatError(f"Unknown GGUF metadata value type {value_type}")
+
+
+def _is_wanted_key(key: str) -> bool:
+    # Architecture-specific keys are prefixed with the architecture name (llama.context_length, qwen2.context_length).
+    # Everything else, notably the tokenizer vocabulary, is skipped rather than decoded.
+    return key.startswith("general.") or key.endswith(".context_length")
+
+
+def parse_gguf_header(data: bytes, key_filter: Callable[[str], bool] = _is_wanted_key) -> Tuple[GGUFHeaderInfo, Dict[str, Any]]:
+    """
+    Parses a GGUF header from the first bytes of a file.
+    Returns the summary plus the metadata values accepted by `key_filter`. Raises GGUFTruncatedError when `data`
+    stops before the end of the tensor infos (fetch more and call again), GGUFFormatError for non-GGUF data.
+    """
+    if len(data) < 8:
+        raise GGUFTruncatedError(24)
+    if data[:4] != GGUF_MAGIC:
+        raise GGUFFormatError("Not a GGUF file (bad magic)")
+
+    # Version 3 allows big-endian files; the version field then reads as a huge little-endian number.
+    endian = "<"
+    version = struct.unpack_from("<I", data, 4)[0]
+    if version > 0xFFFF:
+        endian = ">"
+        version = struct.unpack_from(">I", data, 4)[0]
+    if version not in (1, 2, 3):
+        raise GGUFFormatError(f"Unsupported GGUF version {version}")
+
+    reader = _Reader(data, endian, version)
+    reader.pos = 8
+    tensor_count = reader.count()
+    kv_count = reader.count()
+
+    metadata: Dict[str, Any] = {}
+    for _ in range(kv_count):
+        key = reader.string()
+        value_type = reader.u32()
+        keep = key_filter(key)
+        value = _read_value(reader, value_type, keep)
+        if keep:
+            metadata[key] = value
+
+    # Tensor infos: name, n_dims, dims[n_dims], ggml_type, data offset
+    parameter_count = 0
+    elements_by_type: Dict[int, int] = {}
+    for _ in range(tensor_count):
+        reader.skip_string()
+        n_dims = reader.u32()
+        elements = 1
+        for _ in range(n_dims):
+            elements *= reader.count()
+        tensor_type = reader.u32()
+        reader.u64()
+        parameter_count += elements
+        elements_by_type[tensor_type] = elements_by_type.get(tensor_type, 0) + elements
+
+    architecture = metadata.get("general.architecture")
+    context_length = metadata.get(f"{architecture}.context_length") if architecture else None
+
+    file_type = metadata.get("general.file_type")
+    quantization = FILE_TYPE_NAMES.get(file_type) if isinstance(file_type, int) else None
+    if quantization is None and elements_by_type:
+        # No (known) file type: name the file after the tensor type holding most of the weights
+        dominant_type = max(elements_by_type, key=elements_by_type.get)
+        quantization = TENSOR_TYPE_NAMES.get(dominant_type)
+
+    info = GGUFHeaderInfo(
+        version=version,
+        tensor_count=tensor_count,
+        quantization=quantization,
+        architecture=architecture,
+        context_length=int(context_length) if isinstance(context_length, int) else None,
+        parameter_count=parameter_count if tensor_count else None,
+        header_bytes=reader.pos,
+    )
+    return info, metadata
+
+
+def write_gguf_header(metadata: Dict[str, Any], tensors: Dict[str, Tuple[Tuple[int, ...], int]], version: int = 3) -> bytes:
+    """
+    Builds the header of a synthetic GGUF file (no tensor data), for local fixtures and benchmarks.
+    `metadata` values: str, bool, int (stored as uint32 below 2**32, else uint64), float (float32), or lists of
+    one of those. `tensors` maps tensor name -> (dims, ggml_type).
+    """
+    count_fmt = "<I" if version == 1 else "<Q"
+
+    def pack_string(s: str) -> bytes:
+        raw = s.encode("utf-8")
+        return struct.pack(count_fmt, len(raw)) + raw
+
+    def type_of(value: Any) -> int:
+        if isinstance(value, bool):
+            return _BOOL
+        if isinstance(value, int):
+            return _UINT32 if 0 <= value < 2 ** 32 else _UINT64
+        if isinstance(value, float):
+            return _FLOAT32
+        if isinstance(value, str):
+            return _STRING
+        if isinstance(value, (list, tuple)):
+            return _ARRAY
+        raise TypeError(f"Unsupported GGUF metadata value {value!r}")
+
+    def pack_value(value: Any, value_type: int) -> bytes:
+        if value_type == _STRING:
+            return pack_string(value)
+        if value_type == _ARRAY:
+            item_type = type_of(value[0]) if value else _UINT32
+            return (struct.pack("<I", item_type) + struct.pack(count_fmt, len(value))
+                    + b"".join(pack_value(v, item_type) for v in value))
+        return struct.pack("<" + _SCALAR_FORMATS[value_type], value)
+
+    out = [GGUF_MAGIC, struct.pack("<I", version), struct.pack(count_fmt, len(tensors)), struct.pack(count_fmt, len(metadata))]
+    for key, value in metadata.items():
+        value_type = type_of(value)
+        out.append(pack_string(key) + struct.pack("<I", value_type) + pack_value(value, value_type))
+    offset = 0
+    for name, (dims, tensor_type) in tensors.items():
+        out.append(pack_string(name) + struct.pack("<I", len(dims)))
+        out.append(b"".join(struct.pack(count_fmt, d) for d in dims))
+        out.append(struct.pack("<I", tensor_type) + struct.pack("<Q", offset))
+        offset += 32  # Placeholder offsets; no tensor data follows
+    return b"".join(out)
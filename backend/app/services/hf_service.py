@@ -1,118 +1,368 @@
+import asyncio
+import base64
+import dataclasses
+import hashlib
+import json
 import logging
-from typing import List, Optional, Tuple
-from huggingface_hub import list_models, HfApi
-from huggingface_hub.hf_api import ModelInfo
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from huggingface_hub.hf_api import ModelInfo, RepoSibling
 from ..schemas.search_schemas import HFModelSearchResultItem # Corrected relative import
-from huggingface_hub import hf_hub_download, model_info as hf_model_info # Alias to avoid conflict
-from ..schemas.model_schemas import ModelDetailResponse, GGUFFileDetail, ModelCardData # Corrected relative import
+from ..schemas.model_schemas import ModelDetailResponse, GGUFFileDetail, ModelCardData, ReadmeInfo # Corrected relative import
+from ..core import config
+from .cache import AsyncResultCache, MemoryLRUBackend
+from .shared_cache import Codec, make_backend
+from . import catalog_mirror, compact_catalog, facets, metrics, readme_render
+from .gguf_parser import GGUFFormatError, GGUFHeaderInfo, GGUFTruncatedError, parse_gguf_header
+from .hub_client import HubNotFoundError, get_hub_client, is_upstream_unavailable
+from .query_parser import (
+    TASK_KEYWORD_TO_PIPELINE_TAG, ParsedQuery, describe as describe_query, first_filters_only, parse_query,
+)
 import re # For regex-based keyword extraction
 
 logger = logging.getLogger(__name__)
 
-# Define known task keywords and their corresponding pipeline_tags
-# This list can be expanded. Keys are lowercase.
-TASK_KEYWORD_TO_PIPELINE_TAG = {
-    "text generation": "text-generation",
-    "summarization": "summarization",
-    "translation": "translation",
-    "question answering": "question-answering",
-    "fill mask": "fill-mask",
-    "fill-mask": "fill-mask",
-    "text classification": "text-classification",
-    "token classification": "token-classification",
-    "image classification": "image-classification",
-    "object detection": "object-detection",
-    "image segmentation": "image-segmentation",
-    "text to image": "text-to-image",
-    "text-to-image": "text-to-image",
-    "image to text": "image-to-text",
-    "image-to-text": "image-to-text",
-    "text to speech": "text-to-speech",
-    "text-to-speech": "text-to-speech",
-    "audio to audio": "audio-to-audio",
-    "automatic speech recognition": "automatic-speech-recognition",
-    "asr": "automatic-speech-recognition",
-    "voice activity detection": "voice-activity-detection",
-    "reinforcement learning": "reinforcement-learning",
-    "robotics": "robotics",
-    "tabular classification": "tabular-classification",
-    "tabular regression": "tabular-regression",
-    "table question answering": "table-question-answering",
-    "visual question answering": "visual-question-answering",
-    "vqa": "visual-question-answering",
-    "document question answering": "document-question-answering",
-    "zero shot classification": "zero-shot-classification",
-    "zero-shot-classification": "zero-shot-classification",
-    "zero shot image classification": "zero-shot-image-classification",
-    "conversational": "conversational",
-    "feature extraction": "feature-extraction",
-    # Add more mappings as needed
-}
-
-
-def search_models_on_hub_paginated(
+# Task keywords (TASK_KEYWORD_TO_PIPELINE_TAG), library names and `key:value` filters are extracted
+# from search queries by the precompiled parser in query_parser.
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor is malformed or was issued for a different search."""
+
+
+# The Hub caps `limit` per listing request; used when walking forward to an offset without a cursor.
+HUB_MAX_PAGE_SIZE = 1000
+SEARCH_CURSOR_VERSION = 1
+
+# Lean search asks the Hub only for the fields a result row renders, instead of full=True.
+LEAN_SEARCH_EXPAND = ["author", "downloads", "likes", "lastModified", "private", "tags", "pipeline_tag", "siblings"]
+
+
+def _search_fingerprint(
+    query: Optional[str], sort_by: str, page_size: int, pipeline_tag: Optional[str], library: Optional[str],
+    facet_filters: Optional[Dict[str, List[str]]] = None,
+) -> str:
+    """
+    Short, stable hash of the search parameters a cursor is bound to.
+    A cursor is only valid for the exact query it was issued for.
+    """
+    params: List[Any] = [query or None, sort_by, page_size, pipeline_tag or None, library or None]
+    if facet_filters:  # Only when present, so cursors issued before facets existed stay valid
+        params.append(facet_filters)
+    raw = json.dumps(params, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_search_cursor(fingerprint: str, page: int, hub_cursor: str) -> str:
+    """
+    Packs the Hub's continuation token into an opaque, URL-safe cursor for our API.
+    Only the Hub's `cursor` token is stored (not the full next-page URL), so clients can't make us fetch arbitrary URLs.
+    """
+    payload = {"v": SEARCH_CURSOR_VERSION, "fp": fingerprint, "p": page, "c": hub_cursor}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor_payload(cursor: str, fingerprint: str) -> Tuple[int, str]:
+    """
+    Validates a cursor against the current search and returns its (position, Hub continuation token).
+    Position is the page number for paged search and the item offset for streamed search.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        version, cursor_fp, cursor_page, hub_cursor = payload["v"], payload["fp"], payload["p"], payload["c"]
+    except Exception as e:
+        raise InvalidCursorError("Malformed pagination cursor.") from e
+
+    if version != SEARCH_CURSOR_VERSION or not isinstance(hub_cursor, str):
+        raise InvalidCursorError("Unsupported pagination cursor.")
+    if cursor_fp != fingerprint:
+        raise InvalidCursorError("Pagination cursor does not match the current search parameters.")
+    return cursor_page, hub_cursor
+
+
+def decode_search_cursor(cursor: str, fingerprint: str, page: int) -> str:
+    """
+    Validates a cursor against the current search and page, and returns the Hub continuation token it holds.
+    """
+    cursor_page, hub_cursor = _decode_cursor_payload(cursor, fingerprint)
+    if cursor_page != page:
+        raise InvalidCursorError(f"Pagination cursor is for page {cursor_page}, not page {page}.")
+    return hub_cursor
+
+
+def _normalize_sort(sort_by: str) -> str:
+    valid_sort_fields = ["downloads", "likes", "lastModified"]
+    return sort_by if sort_by in valid_sort_fields else "downloads"
+
+
+def _resolve_search_filters(query: Optional[str], pipeline_tag: Optional[str], library: Optional[str]) -> ParsedQuery:
+    """
+    One pass over the query extracts task keywords, library names and key:value filters.
+    With an explicit pipeline_tag, bare task keywords stay in the search text and `task:` filters are added
+    after it; an explicit library is likewise added to any library filters found in the query.
+    """
+    parsed = parse_query(query, extract_tasks=not pipeline_tag)
+    if pipeline_tag:
+        parsed.pipeline_tags = [pipeline_tag] + [tag for tag in parsed.pipeline_tags if tag != pipeline_tag]
+    if library:
+        parsed.libraries = [library] + [lib for lib in parsed.libraries if lib != library]
+    if query and logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Parsed query %r: %s", query, describe_query(parsed))
+    return parsed
+
+
+def _list_models_params(parsed: ParsedQuery, sort_by: str) -> Dict[str, Any]:
+    """
+    Query parameters for the Hub's /api/models listing, mirroring what `huggingface_hub.list_models` sends.
+    The Hub takes a single pipeline_tag and author, so the first of each is applied and any others stay in the
+    search text (the mirror ORs them instead). It can't filter by quantization either; that narrows to GGUF
+    repos, and the mirror applies the exact match.
+    """
+    parsed = first_filters_only(parsed, ("pipeline_tags", "authors"))
+    params: Dict[str, Any] = {"sort": sort_by, "direction": -1}
+    if parsed.text:
+        params["search"] = parsed.text
+    if parsed.pipeline_tags:
+        params["pipeline_tag"] = parsed.pipeline_tags[0]
+    if parsed.authors:
+        params["author"] = parsed.authors[0]
+    filters = list(parsed.libraries)
+    if parsed.quantizations and "gguf" not in filters:
+        filters.append("gguf")
+    if filters:
+        params["filter"] = filters
+    return params
+
+
+def _apply_facet_filters_to_hub_params(params: Dict[str, Any], facet_filters: Dict[str, List[str]]) -> None:
+    """
+    Narrows Hub listing parameters by facet filters, as far as the Hub can: one value per facet, ANDed as tags.
+    Quantization filters can only narrow to GGUF repos. Several values of a facet (OR) need the mirror.
+    """
+    tag_filters = list(params.get("filter", []))
+    for facet, values in facet_filters.items():
+        if len(values) > 1:
+            raise facets.InvalidFacetFilterError(
+                f"Filtering on several {facet} values needs the local catalogue mirror (HF_MIRROR_DB_PATH)."
+            )
+        value = values[0]
+        if facet == "task":
+            if params.get("pipeline_tag", value) != value:
+                raise facets.InvalidFacetFilterError("The Hub can only filter on one task at a time.")
+            params["pipeline_tag"] = value
+        elif facet == "license":
+            tag_filters.append(f"license:{value}")
+        elif facet == "quantization":
+            tag_filters.append("gguf")
+        else:  # library, language
+            tag_filters.append(value)
+    if tag_filters:
+        params["filter"] = list(dict.fromkeys(tag_filters))
+
+
+async def _fetch_models_listing_page(params: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Fetches a single page of the Hub's model listing through the shared async client.
+    Returns the raw model dicts and the Hub's continuation token for the next page (None on the last page).
+    """
+    return await get_hub_client().list_models_page(params)
+
+
+async def _seek_hub_cursor(base_params: Dict[str, Any], offset: int) -> Tuple[Optional[str], bool]:
+    """
+    Walks the listing forward `offset` items without requesting full model info, and returns the Hub cursor
+    positioned at `offset`. Only used when a deep page is requested without a cursor (e.g. a bookmarked URL).
+    Returns (hub_cursor, exhausted).
+    """
+    hub_cursor = None
+    remaining = offset
+    while remaining > 0:
+        step = min(remaining, HUB_MAX_PAGE_SIZE)
+        params = {**base_params, "limit": step}
+        if hub_cursor:
+            params["cursor"] = hub_cursor
+        items, hub_cursor = await _fetch_models_listing_page(params)
+        remaining -= len(items)
+        if remaining > 0 and not hub_cursor:
+            return None, True  # Listing ended before reaching the requested offset
+    return hub_cursor, False
+
+
+async def aiter_hub_model_listing(
+    params: Dict[str, Any], page_size: int = HUB_MAX_PAGE_SIZE
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Yields pages of raw model dicts from the Hub listing, following continuation cursors.
+    """
+    hub_cursor = None
+    while True:
+        page_params = {**params, "limit": page_size}
+        if hub_cursor:
+            page_params["cursor"] = hub_cursor
+        items, hub_cursor = await _fetch_models_listing_page(page_params)
+        yield items
+        if not hub_cursor:
+            return
+
+
+def iter_hub_model_listing(
+    params: Dict[str, Any], loop: asyncio.AbstractEventLoop, page_size: int = HUB_MAX_PAGE_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """
+    Blocking iterator over the Hub listing for worker threads (the catalogue mirror sync).
+    Pages are fetched by the shared async client on `loop`, so sync traffic uses the same connection pool.
+    """
+    pages = aiter_hub_model_listing(params, page_size=page_size)
+    try:
+        while True:
+            try:
+                items = asyncio.run_coroutine_threadsafe(pages.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+            yield from items
+    finally:
+        asyncio.run_coroutine_threadsafe(pages.aclose(), loop).result()
+
+
+def lean_search_item(raw_model: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Projects a raw Hub listing record straight to the JSON shape of HFModelSearchResultItem (by alias),
+    without building ModelInfo or Pydantic objects. has_gguf is a plain filename-suffix scan.
+    """
+    siblings = raw_model.get("siblings") or ()
+    return {
+        "id": raw_model.get("id") or raw_model.get("modelId"),
+        "author": raw_model.get("author"),
+        "lastModified": raw_model.get("lastModified"),
+        "likes": raw_model.get("likes") or 0,
+        "private": raw_model.get("private") or False,
+        "downloads": raw_model.get("downloads") or 0,
+        "tags": raw_model.get("tags") or [],
+        "pipelineTag": raw_model.get("pipeline_tag"),
+        "has_gguf": any(s.get("rfilename", "").lower().endswith(".gguf") for s in siblings),
+    }
+
+
+def _mirror_search_filters(parsed: ParsedQuery, sort_by: str) -> Dict[str, Any]:
+    """Keyword arguments for CatalogMirror.search matching a parsed query; several tasks or authors are ORed."""
+    return {
+        "search": parsed.text,
+        "sort_by": sort_by,
+        "pipeline_tags": parsed.pipeline_tags,
+        "libraries": parsed.libraries,
+        "authors": parsed.authors,
+        "quantizations": parsed.quantizations,
+    }
+
+
+def _is_browse_query(parsed: ParsedQuery, facet_filters: Optional[Dict[str, List[str]]]) -> bool:
+    """Listing the catalogue in a sort order, optionally within one task: what the compact catalogue can answer."""
+    if parsed.text or parsed.libraries or parsed.authors or parsed.quantizations or facet_filters:
+        return False
+    return len(parsed.pipeline_tags) <= 1
+
+
+async def _search_local_mirror(
+    mirror: "catalog_mirror.CatalogMirror",
+    parsed: ParsedQuery,
+    sort_by: str,
+    page: int,
+    page_size: int,
+    fingerprint: str,
+    lean: bool = False,
+    facet_filters: Optional[Dict[str, List[str]]] = None,
+) -> Tuple[List[Any], Optional[int], bool, Optional[str]]:
+    """
+    Answers a search page from the local catalogue mirror, with real offsets and an exact total.
+    """
+    start_index = (page - 1) * page_size
+    catalog = compact_catalog.get_catalog()
+    if catalog is not None and _is_browse_query(parsed, facet_filters):
+        # Precomputed sort orders: the page is a slice and the total is known, so no SQLite sort or COUNT(*)
+        with metrics.stage("search", "compact_query"):
+            rows, total = catalog.page(
+                sort_by, start_index, page_size, parsed.pipeline_tags[0] if parsed.pipeline_tags else None
+            )
+            results = catalog.search_items(rows, lean=lean)
+    else:
+        # SQLite queries are quick but blocking, so keep them off the event loop.
+        with metrics.stage("search", "mirror_query"):
+            results, total = await asyncio.to_thread(
+                mirror.search, offset=start_index, limit=page_size, lean=lean, facet_filters=facet_filters,
+                **_mirror_search_filters(parsed, sort_by),
+            )
+    has_more = start_index + len(results) < total
+    # Offsets are cheap locally, so the cursor carries no Hub token; it still pins the page to this search.
+    next_cursor = encode_search_cursor(fingerprint, page + 1, "") if has_more else None
+    logger.debug("Page %d from local mirror: %d of %d models. Has more: %s", page, len(results), total, has_more)
+    return results, total, has_more, next_cursor
+
+
+async def search_models_on_hub_paginated(
     query: Optional[str] = None,
     sort_by: str = "downloads",
     page: int = 1,          # New: current page number (1-indexed)
     page_size: int = 20,    # New: items per page
     pipeline_tag: Optional[str] = None,
     library: Optional[str] = None,
-) -> Tuple[List[HFModelSearchResultItem], int, bool]: # Results, total_items_on_this_page_and_before, has_more
+    cursor: Optional[str] = None,  # Opaque continuation cursor from a previous page's `next_cursor`
+    lean: bool = False,  # Return plain JSON-ready dicts (see lean_search_item) instead of HFModelSearchResultItem
+    facet_filters: Optional[Dict[str, List[str]]] = None,  # From facets.parse_facet_filters: OR within, AND across facets
+) -> Tuple[List[Any], Optional[int], bool, Optional[str]]: # Results, total_results_available (None unless exact), has_more, next_cursor
     
-    processed_query = query
-    derived_pipeline_tag = pipeline_tag 
-
-    if query and not pipeline_tag: 
-        query_lower = query.lower()
-        sorted_task_keywords = sorted(TASK_KEYWORD_TO_PIPELINE_TAG.keys(), key=len, reverse=True)
-        for task_keyword in sorted_task_keywords:
-            pt_value = TASK_KEYWORD_TO_PIPELINE_TAG[task_keyword]
-            if re.search(r'\b' + re.escape(task_keyword) + r'\b', query_lower):
-                derived_pipeline_tag = pt_value
-                logger.info(f"Derived pipeline_tag '{derived_pipeline_tag}' from query keyword '{task_keyword}'.")
-                if processed_query:
-                    processed_query = re.sub(r'\b' + re.escape(task_keyword) + r'\b', '', processed_query, flags=re.IGNORECASE).strip()
-                if not processed_query: 
-                    processed_query = None
-                logger.info(f"Removed task keyword '{task_keyword}' from query. New processed_query for search: '{processed_query}'")
-                break 
+    # Each stage is timed into metrics.STAGE_SECONDS{operation="search"}; serialization is timed by the router.
+    with metrics.stage("search", "parse"):
+        sort_by = _normalize_sort(sort_by)
+        fingerprint = _search_fingerprint(query, sort_by, page_size, pipeline_tag, library, facet_filters)
+        hub_cursor = (decode_search_cursor(cursor, fingerprint, page) if cursor else None) or None
+        parsed = _resolve_search_filters(query, pipeline_tag, library)
     
     try:
-        logger.info(
-            f"Searching Hub (paginated): query='{processed_query}', sort='{sort_by}', "
-            f"page={page}, page_size={page_size}, pipeline_tag='{derived_pipeline_tag}', library='{library}'"
-        )
-        
-        valid_sort_fields = ["downloads", "likes", "lastModified"]
-        if sort_by not in valid_sort_fields:
-            sort_by = "downloads"
+        # Once the local catalogue mirror has synced, it answers searches without a Hub round-trip.
+        mirror = catalog_mirror.get_ready_mirror()
+        if mirror is not None:
+            return await _search_local_mirror(
+                mirror, parsed, sort_by, page, page_size, fingerprint, lean=lean, facet_filters=facet_filters
+            )
 
-        # Calculate start and end indices for the current page
         start_index = (page - 1) * page_size
-        end_index = start_index + page_size
-
-        paged_results: List[HFModelSearchResultItem] = []
-        models_iterator = list_models( # This returns a generator
-            search=processed_query if processed_query else None,
-            sort=sort_by,
-            direction=-1,
-            full=True, # Still need full info for each item
-            pipeline_tag=derived_pipeline_tag,
-            library=library,
-            # No 'limit' here, we iterate and stop
+        base_params = _list_models_params(parsed, sort_by)
+        if facet_filters:
+            _apply_facet_filters_to_hub_params(base_params, facet_filters)
+        logger.debug(
+            "Searching Hub (paginated): params=%s, page=%d, page_size=%d, resuming_from_cursor=%s",
+            base_params, page, page_size, hub_cursor is not None,
         )
 
-        current_index = 0
-        items_collected_for_page = 0
-        has_more_items_after_this_page = False
-
-        for model_idx, model in enumerate(models_iterator):
-            if current_index >= end_index: # We have enough for this page and one more to check for has_more
-                has_more_items_after_this_page = True # If we hit this, there was at least one more model
-                break 
-            
-            if current_index >= start_index:
-                # This model falls within the current page
+        # With a cursor we resume exactly where the previous page ended, so page N costs one Hub request like page 1.
+        # Without one (page 1, or a deep link), seek forward using cheap, non-full listing pages.
+        if hub_cursor is None and start_index > 0:
+            metrics.SEARCH_ITEMS_SKIPPED.observe(start_index)
+            with metrics.stage("search", "skip_to_start_index"):
+                hub_cursor, exhausted = await _seek_hub_cursor(base_params, start_index)
+            if exhausted:
+                logger.debug("Page %d: listing ended before offset %d.", page, start_index)
+                return [], None, False, None
+
+        page_params = {**base_params, "limit": page_size}
+        if lean:
+            page_params["expand"] = LEAN_SEARCH_EXPAND
+        else:
+            page_params["full"] = True
+        if hub_cursor:
+            page_params["cursor"] = hub_cursor
+        with metrics.stage("search", "upstream"):
+            raw_models, next_hub_cursor = await _fetch_models_listing_page(page_params)
+
+        paged_results: List[Any] = []
+        validation_started = time.perf_counter()
+        if lean:
+            paged_results = [lean_search_item(raw_model) for raw_model in raw_models[:page_size]]
+        else:
+            for raw_model in raw_models[:page_size]:
+                model = ModelInfo(**raw_model)
                 has_gguf_file = False
                 if model.siblings:
                     for sibling in model.siblings:
@@ -126,67 +376,295 @@ def search_models_on_hub_paginated(
                     "pipeline_tag": model.pipeline_tag, "has_gguf": has_gguf_file,
                 }
                 paged_results.append(HFModelSearchResultItem.model_validate(item_data))
-                items_collected_for_page += 1
-            
-            current_index += 1
-            # Optimization: if we have filled the page and there are no more items from iterator, has_more is false
-            # This is implicitly handled by the loop breaking condition and has_more_items_after_this_page flag
-
-        total_items_processed_up_to_this_page = current_index # if has_more, this is end_index + 1, else total models found
-        if not has_more_items_after_this_page and current_index < end_index: # If iterator exhausted before filling the page or reaching end_index
-             total_items_processed_up_to_this_page = current_index
+        metrics.observe_stage("search", "validation", time.perf_counter() - validation_started)
 
+        # The Hub only sends a next-page link when there are more results after this page.
+        has_more_items_after_this_page = next_hub_cursor is not None
+        next_cursor = encode_search_cursor(fingerprint, page + 1, next_hub_cursor) if next_hub_cursor else None
 
-        logger.info(f"Page {page}: collected {items_collected_for_page} models. Total processed for has_more check: {current_index}. Has more: {has_more_items_after_this_page}")
-        # We can't easily get the *absolute total* number of models without iterating through everything.
-        # For pagination, `has_more_items_after_this_page` is key.
-        # `total_items_processed_up_to_this_page` is not the grand total, but how many we looked at.
-        return paged_results, total_items_processed_up_to_this_page, has_more_items_after_this_page
+        logger.debug("Page %d: collected %d models. Has more: %s", page, len(paged_results), has_more_items_after_this_page)
+        # We can't get the *absolute total* from the Hub without iterating through everything; only the mirror knows it.
+        # For pagination, `has_more_items_after_this_page` and `next_cursor` are key.
+        return paged_results, None, has_more_items_after_this_page, next_cursor
 
+    except facets.InvalidFacetFilterError:
+        raise
     except Exception as e:
         logger.error(f"Error in paginated search on Hugging Face Hub: {e}", exc_info=True)
         raise
 
-def get_model_details_from_hub(model_id: str) -> Optional[ModelDetailResponse]:
+# Streamed searches aren't paged, so their cursors are fingerprinted with this page size and carry an item offset.
+STREAM_CURSOR_PAGE_SIZE = 0
+
+
+async def stream_search_results(
+    query: Optional[str] = None,
+    sort_by: str = "downloads",
+    pipeline_tag: Optional[str] = None,
+    library: Optional[str] = None,
+    limit: int = 200,
+    cursor: Optional[str] = None,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Streams up to `limit` search results as ("item", lean_item) as soon as each upstream chunk arrives,
+    then one ("end", {"count", "has_more", "next_cursor"}) frame. Only one chunk
+    (config.SEARCH_STREAM_CHUNK_SIZE items) is held in memory at a time, and the next chunk is only
+    requested once the consumer has taken the previous one, so a slow client slows the upstream iteration.
+    Closing the generator stops the iteration.
+    """
+    sort_by = _normalize_sort(sort_by)
+    fingerprint = _search_fingerprint(query, sort_by, STREAM_CURSOR_PAGE_SIZE, pipeline_tag, library)
+    offset, hub_cursor = _decode_cursor_payload(cursor, fingerprint) if cursor else (0, "")
+    hub_cursor = hub_cursor or None
+    parsed = _resolve_search_filters(query, pipeline_tag, library)
+    chunk_size = config.SEARCH_STREAM_CHUNK_SIZE
+    sent = 0
+
+    mirror = catalog_mirror.get_ready_mirror()
+    if mirror is not None:
+        filters = _mirror_search_filters(parsed, sort_by)
+        total = 0
+        while sent < limit:
+            rows, total = await asyncio.to_thread(
+                mirror.search, offset=offset + sent, limit=min(chunk_size, limit - sent), lean=True, **filters
+            )
+            for row in rows:
+                yield "item", row
+            sent += len(rows)
+            if not rows or offset + sent >= total:
+                break
+        has_more = offset + sent < total
+        next_cursor = encode_search_cursor(fingerprint, offset + sent, "") if has_more else None
+    else:
+        base_params = _list_models_params(parsed, sort_by)
+        logger.debug("Streaming Hub search: params=%s, offset=%d, limit=%d", base_params, offset, limit)
+        exhausted = False
+        if hub_cursor is None and offset > 0:
+            hub_cursor, exhausted = await _seek_hub_cursor(base_params, offset)
+        while not exhausted and sent < limit:
+            params = {**base_params, "limit": min(chunk_size, limit - sent), "expand": LEAN_SEARCH_EXPAND}
+            if hub_cursor:
+                params["cursor"] = hub_cursor
+            raw_models, hub_cursor = await _fetch_models_listing_page(params)
+            for raw_model in raw_models:
+                yield "item", lean_search_item(raw_model)
+            sent += len(raw_models)
+            exhausted = hub_cursor is None
+        has_more = not exhausted and hub_cursor is not None
+        next_cursor = encode_search_cursor(fingerprint, offset + sent, hub_cursor) if has_more else None
+
+    logger.debug("Streamed %d search results. Has more: %s", sent, has_more)
+    yield "end", {"count": sent, "has_more": has_more, "next_cursor": next_cursor}
+
+
+README_FILENAME = "README.md"
+README_NOT_FOUND_MESSAGE = "README.md not found for this model."
+
+
+async def _known_sibling_filenames(model_id: str) -> Optional[List[str]]:
+    """
+    Sibling filenames from the local catalogue mirror, if it has this model. Lets us skip requests
+    for files we already know don't exist.
+    """
+    mirror = catalog_mirror.get_ready_mirror()
+    if mirror is None:
+        return None
+    return await asyncio.to_thread(mirror.get_sibling_filenames, model_id)
+
+
+class Readme(NamedTuple):
+    content: bytes  # README.md exactly as stored in the repo
+    sha256: str
+
+
+async def _fetch_readme(model_id: str) -> Readme:
+    """
+    Reads README.md straight from the resolve endpoint into memory (no HF disk cache round-trip).
+    """
+    with metrics.stage("model_details", "readme"):
+        content = await get_hub_client().get_file_bytes(model_id, README_FILENAME)
+    return Readme(content, hashlib.sha256(content).hexdigest())
+
+
+def _discard(task: "asyncio.Task[Any]") -> None:
+    """Cancels a task whose result is no longer wanted; if it already failed, retrieves the error so it isn't logged."""
+    task.cancel()
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+def readme_url(model_id: str) -> str:
+    return f"/api/models/{model_id}/readme"
+
+
+async def read_gguf_header(model_id: str, filename: str, revision: str = "main") -> GGUFHeaderInfo:
+    """
+    Parses the header of a GGUF file in a repo using Range requests. Starts with GGUF_HEADER_INITIAL_BYTES and
+    fetches only the missing tail (growing at least 4x, to keep round trips few) until the header parses; tensor
+    data is never downloaded.
+    """
+    client = get_hub_client()
+    data = bytearray()
+    wanted = config.GGUF_HEADER_INITIAL_BYTES
+    while True:
+        requested = wanted - len(data)
+        with metrics.stage("gguf_header", "range_read"):
+            chunk = await client.read_file_range(model_id, filename, len(data), wanted, revision)
+        data += chunk
+        try:
+            # Big vocabularies put several MB of header in front of the tensor infos; parse off the event loop.
+            with metrics.stage("gguf_header", "parse"):
+                info, _ = await asyncio.to_thread(parse_gguf_header, data)
+            return info
+        except GGUFTruncatedError as e:
+            if len(chunk) < requested:
+                raise GGUFFormatError(f"{filename} ends inside its GGUF header")
+            if len(data) >= config.GGUF_HEADER_MAX_BYTES:
+                raise GGUFFormatError(f"{filename} has a GGUF header larger than {config.GGUF_HEADER_MAX_BYTES} bytes")
+            wanted = min(config.GGUF_HEADER_MAX_BYTES, max(e.needed, 4 * len(data)))
+
+
+_gguf_header_semaphore = asyncio.Semaphore(config.GGUF_HEADER_CONCURRENCY)
+_gguf_header_tasks: set = set()  # Header reads a details request stopped waiting for; kept alive until they finish
+
+
+def _gguf_header_cache_key(model_id: str, revision: str, sibling: RepoSibling) -> Tuple[str, str]:
+    # Content hashes identify the file itself, so identical files across repos and revisions are parsed once
+    if sibling.lfs is not None:
+        return ("gguf_header", f"sha256:{sibling.lfs.sha256}")
+    if sibling.blob_id:
+        return ("gguf_header", f"blob:{sibling.blob_id}")
+    return ("gguf_header", f"{model_id}@{revision}/{sibling.rfilename}")
+
+
+async def _read_gguf_header_limited(model_id: str, filename: str, revision: str) -> Optional[GGUFHeaderInfo]:
+    async with _gguf_header_semaphore:
+        try:
+            return await read_gguf_header(model_id, filename, revision)
+        except GGUFFormatError as e:
+            # The file's content is what it is: cache "no header" instead of re-reading it on every request.
+            # Network and Hub errors still propagate and are retried next time.
+            logger.warning(f"Could not parse GGUF header of {model_id}/{filename}: {e}")
+            return None
+
+
+async def _cached_gguf_header(model_id: str, revision: str, sibling: RepoSibling) -> Optional[GGUFHeaderInfo]:
+    """Parsed header of one GGUF sibling (cached by content hash), or None if it can't be read or parsed."""
+    try:
+        return await gguf_header_cache.get_or_load(
+            _gguf_header_cache_key(model_id, revision, sibling),
+            lambda: _read_gguf_header_limited(model_id, sibling.rfilename, revision),
+        )
+    except Exception as e:
+        logger.warning(f"Could not read GGUF header of {model_id}/{sibling.rfilename}: {e}")
+        return None
+
+
+async def _gguf_headers_for(
+    model_id: str, revision: str, siblings: List[RepoSibling], read: bool = True
+) -> Dict[str, GGUFHeaderInfo]:
+    """
+    Parsed headers for a repo's GGUF files, keyed by filename. Waits at most GGUF_HEADER_TIMEOUT_SECONDS;
+    files still being read are left out (and land in the cache for the next request).
+    With read=False, only headers already in the cache are used and nothing is requested from the Hub.
+    """
+    if not config.GGUF_HEADER_PARSING_ENABLED or not siblings:
+        return {}
+    if not read:
+        headers = {s.rfilename: await gguf_header_cache.get_fresh(_gguf_header_cache_key(model_id, revision, s))
+                   for s in siblings}
+        return {filename: header for filename, header in headers.items() if header is not None}
+    tasks = {asyncio.ensure_future(_cached_gguf_header(model_id, revision, s)): s.rfilename for s in siblings}
+    done, pending = await asyncio.wait(tasks, timeout=config.GGUF_HEADER_TIMEOUT_SECONDS)
+    if pending:
+        logger.info("%d GGUF headers of %s still loading; answering with filename info for those.", len(pending), model_id)
+        for task in pending:
+            _gguf_header_tasks.add(task)
+            task.add_done_callback(_gguf_header_tasks.discard)
+    return {tasks[task]: task.result() for task in done if task.result() is not None}
+
+
+def _quantization_from_filename(filename: str) -> str:
+    match = re.search(r"[_-](Q\d(?:[_\wKSM]*)?)\.", filename, re.IGNORECASE)
+    return match.group(1).upper() if match else "Unknown"
+
+
+async def get_model_details_from_hub(model_id: str, read_gguf_headers: bool = True) -> Optional[ModelDetailResponse]:
     """
     Fetches detailed information for a specific model, including README and GGUF files.
+    Model metadata and the README are fetched concurrently. With read_gguf_headers=False (prefetching), GGUF
+    files only get header fields already in the cache, as when their header reads time out.
     """
+    readme_task: Optional["asyncio.Task[Readme]"] = None
     try:
-        logger.info(f"Fetching details for model_id: {model_id}")
-        info = hf_model_info(repo_id=model_id, files_metadata=True) # files_metadata=True gets siblings info
+        logger.debug("Fetching details for model_id: %s", model_id)
+        client = get_hub_client()
 
-        readme_content = "README.md not found for this model."
-        try:
-            readme_path = hf_hub_download(repo_id=model_id, filename="README.md", repo_type="model")
-            with open(readme_path, 'r', encoding='utf-8') as f:
-                readme_content = f.read()
-            logger.info(f"Successfully fetched README.md for {model_id}")
-        except Exception as e_readme:
-            logger.error(f"Error fetching README.md for {model_id}: {e_readme}", exc_info=True)
-            readme_content = f"Error fetching README: {str(e_readme)}"
+        # If the mirror already knows the repo has no README, don't request it at all.
+        readme = await readme_cache.get_fresh(readme_cache_key(model_id))
+        known_siblings = await _known_sibling_filenames(model_id)
+        if readme is None and (known_siblings is None or README_FILENAME in known_siblings):
+            # Fetched directly rather than through readme_cache, whose shielded loads can't be cancelled below;
+            # stored in the cache once the siblings show the README exists.
+            readme_task = asyncio.ensure_future(_fetch_readme(model_id))
+
+        # files_metadata=True gets siblings info (sizes, LFS)
+        with metrics.stage("model_details", "metadata"):
+            info = ModelInfo(**await client.model_info(model_id, files_metadata=True))
+
+        # The authoritative sibling list arrived: if there's no README, drop the in-flight request
+        # instead of waiting for its 404.
+        if not any(s.rfilename == README_FILENAME for s in info.siblings or []):
+            readme = None
+            if readme_task is not None:
+                _discard(readme_task)
+                readme_task = None
+
+        readme_content = README_NOT_FOUND_MESSAGE
+        if readme_task is not None:
+            try:
+                # The fetch itself is timed as the "readme" stage; this is only what's left after the metadata
+                with metrics.stage("model_details", "readme_wait"):
+                    readme = await readme_task
+                await readme_cache.set(readme_cache_key(model_id), readme)
+                logger.debug("Successfully fetched README.md for %s", model_id)
+            except HubNotFoundError:
+                logger.debug("README.md not found for %s", model_id)
+            except Exception as e_readme:
+                logger.error(f"Error fetching README.md for {model_id}: {e_readme}", exc_info=True)
+                readme_content = f"Error fetching README: {str(e_readme)}"
+            finally:
+                readme_task = None
+        readme_info = None
+        if readme is not None:
+            readme_content = readme.content.decode("utf-8", errors="replace")
+            readme_info = ReadmeInfo(size_bytes=len(readme.content), sha256=readme.sha256, url=readme_url(model_id))
 
         gguf_files_details: List[GGUFFileDetail] = []
         raw_siblings_info = []
 
         if info.siblings:
+            gguf_siblings = [s for s in info.siblings if s.rfilename.lower().endswith(".gguf")]
+            # Read at the commit the metadata describes, so the header matches the hash it's cached under
+            with metrics.stage("model_details", "gguf_headers"):
+                gguf_headers = await _gguf_headers_for(model_id, info.sha or "main", gguf_siblings, read_gguf_headers)
             for file_info in info.siblings:
                 raw_siblings_info.append({"name": file_info.rfilename, "size": file_info.size, "lfs": file_info.lfs is not None})
                 if file_info.rfilename.lower().endswith(".gguf"):
                     # For direct download URL construction:
-                    download_url = f"https://huggingface.co/{model_id}/resolve/main/{file_info.rfilename}"
-                    # Basic GGUF name parsing (can be expanded)
-                    quant = "Unknown"
-                    match = re.search(r"[_-](Q\d(?:[_\wKSM]*)?)\.", file_info.rfilename, re.IGNORECASE)
-                    if match:
-                        quant = match.group(1).upper()
-                    
+                    download_url = client.resolve_url(model_id, file_info.rfilename)
+                    # Header fields when the header was parsed; otherwise only a quantization guess from the name
+                    header = gguf_headers.get(file_info.rfilename)
                     gguf_files_details.append(GGUFFileDetail(
                         name=file_info.rfilename,
                         url=download_url,
                         size_bytes=file_info.size,
-                        quantization=quant
+                        quantization=(header and header.quantization) or _quantization_from_filename(file_info.rfilename),
+                        architecture=header.architecture if header else None,
+                        context_length=header.context_length if header else None,
+                        parameter_count=header.parameter_count if header else None,
+                        tensor_count=header.tensor_count if header else None,
                     ))
-            logger.info(f"Found {len(gguf_files_details)} GGUF files for {model_id}.")
+            logger.debug("Found %d GGUF files for %s (%d headers parsed).", len(gguf_files_details), model_id, len(gguf_headers))
 
         # Process cardData
         parsed_card_data = None
@@ -201,11 +679,12 @@ def get_model_details_from_hub(model_id: str) -> Optional[ModelDetailResponse]:
                     model_index=card_dict.get('model-index') # Common key for eval results
                     # card_data_raw = card_dict # If you want to pass everything
                 )
-                logger.info(f"Processed model card data for {model_id}")
+                logger.debug("Processed model card data for %s", model_id)
             except Exception as e_card:
                 logger.error(f"Error processing cardData for {model_id}: {e_card}", exc_info=True)
 
 
+        build_started = time.perf_counter()
         response_data = ModelDetailResponse(
             id=info.id,
             author=info.author,
@@ -215,12 +694,231 @@ def get_model_details_from_hub(model_id: str) -> Optional[ModelDetailResponse]:
             downloads=info.downloads,
             likes=info.likes,
             readme_content=readme_content,
+            readme=readme_info,
             gguf_files=gguf_files_details,
             card_data=parsed_card_data,
             siblings=raw_siblings_info
         )
+        metrics.observe_stage("model_details", "validation", time.perf_counter() - build_started)
         return response_data
     except Exception as e:
         logger.error(f"An unexpected error occurred fetching details for {model_id}: {e}", exc_info=True)
         # In a real app, you might want to raise an HTTPException that the router can catch
-        raise # Re-raise for now, router will handle with 500 or specific mapping
\ No newline at end of file
+        raise # Re-raise for now, router will handle with 500 or specific mapping
+    finally:
+        if readme_task is not None:  # Metadata fetch failed while the README was still in flight
+            _discard(readme_task)
+
+
+# --- Shared cache codecs ---
+# Plain-data forms of cached values, msgpack-encoded when a shared HF_CACHE_BACKEND is configured.
+
+def _encode_search_page(page: Tuple[List[Any], Optional[int], bool, Optional[str]]) -> List[Any]:
+    results, total, has_more, next_cursor = page
+    lean = bool(results) and isinstance(results[0], dict)  # Lean results are JSON-ready dicts already
+    items = results if lean else [item.model_dump(mode="json", by_alias=True) for item in results]
+    return [lean, items, total, has_more, next_cursor]
+
+
+def _decode_search_page(data: List[Any]) -> Tuple[List[Any], Optional[int], bool, Optional[str]]:
+    lean, items, total, has_more, next_cursor = data
+    results = items if lean else [HFModelSearchResultItem.model_validate(item) for item in items]
+    return results, total, has_more, next_cursor
+
+
+SEARCH_PAGE_CODEC = Codec(_encode_search_page, _decode_search_page)
+DETAILS_CODEC = Codec(
+    lambda details: None if details is None else details.model_dump(mode="json", by_alias=True),
+    lambda data: None if data is None else ModelDetailResponse.model_validate(data),
+)
+README_CODEC = Codec(lambda readme: [readme.content, readme.sha256], lambda data: Readme(*data))
+BYTES_CODEC = Codec(lambda value: value, lambda data: data)
+GGUF_HEADER_CODEC = Codec(
+    lambda header: None if header is None else dataclasses.asdict(header),
+    lambda data: None if data is None else GGUFHeaderInfo(**data),
+)
+
+
+# --- Cached entry points ---
+# Routers call these instead of the Hub-facing functions above. Each endpoint gets its own TTLs and memory cap.
+# When the Hub throttles us or is down, expired search and detail entries are served instead of an error.
+# With a shared HF_CACHE_BACKEND, all but the facet counts (keyed by this process's index) are shared by workers.
+search_cache = AsyncResultCache(
+    "search",
+    ttl_seconds=config.SEARCH_CACHE_TTL_SECONDS,
+    stale_ttl_seconds=config.SEARCH_CACHE_STALE_TTL_SECONDS,
+    backend=make_backend("search", config.SEARCH_CACHE_MAX_ENTRIES, config.SEARCH_CACHE_MAX_BYTES, SEARCH_PAGE_CODEC),
+    stale_if_error_seconds=config.SEARCH_CACHE_STALE_IF_ERROR_SECONDS,
+    serve_stale_on=is_upstream_unavailable,
+)
+details_cache = AsyncResultCache(
+    "model_details",
+    ttl_seconds=config.DETAILS_CACHE_TTL_SECONDS,
+    stale_ttl_seconds=config.DETAILS_CACHE_STALE_TTL_SECONDS,
+    backend=make_backend("model_details", config.DETAILS_CACHE_MAX_ENTRIES, config.DETAILS_CACHE_MAX_BYTES, DETAILS_CODEC),
+    stale_if_error_seconds=config.DETAILS_CACHE_STALE_IF_ERROR_SECONDS,
+    serve_stale_on=is_upstream_unavailable,
+)
+readme_cache = AsyncResultCache(
+    "readme",
+    ttl_seconds=config.DETAILS_CACHE_TTL_SECONDS,
+    stale_ttl_seconds=config.DETAILS_CACHE_STALE_TTL_SECONDS,
+    backend=make_backend("readme", config.README_CACHE_MAX_ENTRIES, config.README_CACHE_MAX_BYTES, README_CODEC),
+    stale_if_error_seconds=config.DETAILS_CACHE_STALE_IF_ERROR_SECONDS,
+    serve_stale_on=is_upstream_unavailable,
+)
+# Keyed by README content hash: an entry can't go out of date, so it only leaves through the LRU
+readme_html_cache = AsyncResultCache(
+    "readme_html",
+    ttl_seconds=365 * 24 * 3600.0,
+    stale_ttl_seconds=0.0,
+    backend=make_backend("readme_html", config.README_HTML_CACHE_MAX_ENTRIES, config.README_HTML_CACHE_MAX_BYTES, BYTES_CODEC),
+)
+facet_counts_cache = AsyncResultCache(
+    "facet_counts",
+    ttl_seconds=config.SEARCH_CACHE_TTL_SECONDS,
+    stale_ttl_seconds=config.SEARCH_CACHE_STALE_TTL_SECONDS,
+    backend=MemoryLRUBackend(max_entries=config.FACET_COUNTS_CACHE_MAX_ENTRIES, max_bytes=config.FACET_COUNTS_CACHE_MAX_ENTRIES * 16 * 1024),
+)
+gguf_header_cache = AsyncResultCache(
+    "gguf_headers",
+    ttl_seconds=config.GGUF_HEADER_CACHE_TTL_SECONDS,
+    stale_ttl_seconds=0.0,
+    backend=make_backend("gguf_headers", config.GGUF_HEADER_CACHE_MAX_ENTRIES, config.GGUF_HEADER_CACHE_MAX_ENTRIES * 1024, GGUF_HEADER_CODEC),
+)
+
+
+def search_cache_key(
+    query: Optional[str], sort_by: str, page: int, page_size: int,
+    pipeline_tag: Optional[str], library: Optional[str], cursor: Optional[str], lean: bool,
+    facet_filters: Optional[Dict[str, List[str]]] = None,
+) -> Tuple[Any, ...]:
+    return (
+        "search", query or None, sort_by, page, page_size, pipeline_tag or None, library or None, cursor or None, lean,
+        facets.facet_filters_key(facet_filters),
+    )
+
+
+def details_cache_key(model_id: str) -> Tuple[str, str]:
+    return ("model_details", model_id)
+
+
+def readme_cache_key(model_id: str) -> Tuple[str, str]:
+    return ("readme", model_id)
+
+
+async def search_models_cached(
+    query: Optional[str] = None,
+    sort_by: str = "downloads",
+    page: int = 1,
+    page_size: int = 20,
+    pipeline_tag: Optional[str] = None,
+    library: Optional[str] = None,
+    cursor: Optional[str] = None,
+    lean: bool = False,
+    facet_filters: Optional[Dict[str, List[str]]] = None,
+) -> Tuple[List[Any], Optional[int], bool, Optional[str]]:
+    """
+    Cached, coalesced wrapper around `search_models_on_hub_paginated`.
+    """
+    key = search_cache_key(query, sort_by, page, page_size, pipeline_tag, library, cursor, lean, facet_filters)
+    return await search_cache.get_or_load(
+        key,
+        lambda: search_models_on_hub_paginated(
+            query=query, sort_by=sort_by, page=page, page_size=page_size,
+            pipeline_tag=pipeline_tag, library=library, cursor=cursor, lean=lean, facet_filters=facet_filters,
+        ),
+    )
+
+
+async def get_facet_counts_cached(
+    query: Optional[str],
+    pipeline_tag: Optional[str],
+    library: Optional[str],
+    facet_filters: Optional[Dict[str, List[str]]],
+    facet_names: List[str],
+    limit: int = 20,
+) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """
+    Counts of the top `limit` values of each facet in `facet_names` for a search (cached, coalesced).
+    None until the facet index has been built from the catalogue mirror.
+    """
+    mirror = catalog_mirror.get_ready_mirror()
+    index = facets.get_index()
+    if mirror is None or index is None or not facet_names:
+        return None
+    parsed = _resolve_search_filters(query, pipeline_tag, library)
+    base_filters = _mirror_search_filters(parsed, "downloads")
+    del base_filters["sort_by"]
+    key = ("facet_counts", index.generation, query or None, pipeline_tag or None, library or None,
+           facets.facet_filters_key(facet_filters), tuple(facet_names), limit)
+
+    async def load() -> Dict[str, List[Dict[str, Any]]]:
+        with metrics.stage("search", "facet_counts"):
+            return await asyncio.to_thread(
+                facets.compute_facet_counts, mirror, index, base_filters, facet_filters or {}, facet_names, limit
+            )
+
+    return await facet_counts_cache.get_or_load(key, load)
+
+
+async def get_model_details_cached(model_id: str) -> Optional[ModelDetailResponse]:
+    """
+    Cached, coalesced wrapper around `get_model_details_from_hub`.
+    """
+    return await details_cache.get_or_load(
+        details_cache_key(model_id),
+        lambda: get_model_details_from_hub(model_id=model_id),
+    )
+
+
+async def get_readme_cached(model_id: str) -> Readme:
+    """README.md of a model (cached, coalesced). Raises HubNotFoundError if the model or README doesn't exist."""
+    return await readme_cache.get_or_load(readme_cache_key(model_id), lambda: _fetch_readme(model_id))
+
+
+async def get_readme_html_cached(model_id: str) -> Tuple[bytes, str]:
+    """
+    README.md rendered to sanitized HTML, and the README's SHA-256. Rendering runs in a thread and is cached by
+    the README's hash, so it happens once per README version. Requires readme_render.is_available().
+    """
+    readme = await get_readme_cached(model_id)
+    html = await readme_html_cache.get_or_load(
+        ("readme_html", readme.sha256), lambda: asyncio.to_thread(readme_render.render_html, readme.content)
+    )
+    return html, readme.sha256
+
+
+async def iter_model_details_batch(
+    model_ids: List[str], concurrency: int = config.BATCH_DETAILS_CONCURRENCY
+) -> AsyncIterator[Tuple[str, Optional[ModelDetailResponse], Optional[Exception]]]:
+    """
+    Fetches details for many models concurrently (at most `concurrency` Hub fetches at once), reusing cached
+    entries. Yields (model_id, details, error) as each model resolves; one failure doesn't stop the others.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_one(model_id: str) -> Tuple[str, Optional[ModelDetailResponse], Optional[Exception]]:
+        async with semaphore:
+            try:
+                return model_id, await get_model_details_cached(model_id), None
+            except Exception as e:
+                return model_id, None, e
+
+    tasks = [asyncio.ensure_future(fetch_one(model_id)) for model_id in dict.fromkeys(model_ids)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:  # Consumer stopped early (e.g. streaming client disconnected)
+            task.cancel()
+
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Hit/miss/eviction counters for every result cache, keyed by cache name.
+    """
+    return {
+        cache.name: cache.stats()
+        for cache in (search_cache, details_cache, readme_cache, readme_html_cache, facet_counts_cache, gguf_header_cache)
+    }
@@ -0,0 +1,386 @@
+import asyncio
+import json
+import logging
+import random
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlparse
+
+import httpx
+from huggingface_hub import constants
+from huggingface_hub.utils import build_hf_headers
+
+from ..core import config
+from . import metrics
+from .hub_scheduler import HubScheduler, Priority, SchedulerOverloadedError, effective_priority
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying: throttling and transient upstream failures.
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class HubRequestError(Exception):
+    """Raised when the Hub answers with an error status (after retries, where applicable)."""
+
+    def __init__(self, status_code: int, url: str, message: str = ""):
+        super().__init__(f"Hub request to {url} failed with HTTP {status_code}. {message}".strip())
+        self.status_code = status_code
+        self.url = url
+
+
+class HubNotFoundError(HubRequestError):
+    """Raised when the requested repo or file doesn't exist (or isn't visible with the current token)."""
+
+
+class HubRateLimitedError(HubRequestError):
+    """Raised when the Hub kept answering 429, or the call was shed because it waited too long for a rate-limit slot."""
+
+    def __init__(self, status_code: int, url: str, message: str = "", retry_after_seconds: Optional[float] = None):
+        super().__init__(status_code, url, message)
+        self.retry_after_seconds = retry_after_seconds
+
+
+def is_upstream_unavailable(error: BaseException) -> bool:
+    """True for failures that say nothing about the data (throttling, Hub outages, network), as opposed to e.g. a 404."""
+    if isinstance(error, HubRequestError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, httpx.TransportError)
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None  # HTTP-date form; fall back to exponential backoff
+
+
+@dataclass
+class StoredResponse:
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content: bytes
+
+
+class ConditionalStore:
+    """
+    Validators (ETag, Last-Modified) and bodies of recent Hub responses, so that fetching the same resource again
+    is a conditional request and a 304 is answered from the stored body. LRU, capped by total body size.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, StoredResponse]" = OrderedDict()
+        self._total_bytes = 0
+        self.revalidated = 0  # 304s: the stored body was reused
+        self.refetched = 0    # Conditional requests that got a new body
+
+    def get(self, key: Hashable) -> Optional[StoredResponse]:
+        stored = self._entries.get(key)
+        if stored is not None:
+            self._entries.move_to_end(key)
+        return stored
+
+    def put(self, key: Hashable, stored: StoredResponse) -> None:
+        self.discard(key)
+        if len(stored.content) > self.max_bytes:
+            return
+        self._entries[key] = stored
+        self._total_bytes += len(stored.content)
+        while self._total_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._total_bytes -= len(evicted.content)
+
+    def discard(self, key: Hashable) -> None:
+        stored = self._entries.pop(key, None)
+        if stored is not None:
+            self._total_bytes -= len(stored.content)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "revalidated": self.revalidated,
+            "refetched": self.refetched,
+        }
+
+
+class HubClient:
+    """
+    Shared async HTTP client for the Hugging Face Hub API.
+    One pooled connection set (keep-alive, HTTP/2) serves every request in the worker; concurrency per upstream
+    host is bounded by a semaphore, and transient failures are retried with exponential backoff and jitter.
+    Every attempt is admitted by a HubScheduler first (per-credential rate limit, priority queueing, 429 pauses).
+    Model info and file reads are revalidated with the Hub's ETags (see ConditionalStore).
+    """
+
+    def __init__(
+        self,
+        endpoint: Optional[str] = None,
+        timeout_seconds: float = config.HUB_HTTP_TIMEOUT_SECONDS,
+        connect_timeout_seconds: float = config.HUB_HTTP_CONNECT_TIMEOUT_SECONDS,
+        max_connections: int = config.HUB_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections: int = config.HUB_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        per_host_concurrency: int = config.HUB_HTTP_PER_HOST_CONCURRENCY,
+        max_retries: int = config.HUB_HTTP_MAX_RETRIES,
+        backoff_base_seconds: float = config.HUB_HTTP_RETRY_BACKOFF_SECONDS,
+        http2: bool = config.HUB_HTTP2_ENABLED,
+        scheduler: Optional[HubScheduler] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,  # e.g. an ASGI fake Hub in benchmarks
+        conditional_cache_max_bytes: int = config.HUB_CONDITIONAL_CACHE_MAX_BYTES,
+    ):
+        self.endpoint = (endpoint or constants.ENDPOINT).rstrip("/")
+        self.per_host_concurrency = per_host_concurrency
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.scheduler = scheduler if scheduler is not None else HubScheduler()
+        self.conditional = ConditionalStore(conditional_cache_max_bytes)
+        self._client = httpx.AsyncClient(
+            transport=transport,
+            http2=http2,
+            timeout=httpx.Timeout(timeout_seconds, connect=connect_timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=30.0,
+            ),
+            follow_redirects=True,
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    @property
+    def is_closed(self) -> bool:
+        return self._client.is_closed
+
+    def _semaphore_for(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_concurrency)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        raise_for_status: bool = True,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> httpx.Response:
+        """
+        Sends a request with auth headers, rate-limit scheduling, per-host concurrency limiting and retries.
+        `url` may be absolute or a path relative to the Hub endpoint. `priority` is the call site's class;
+        background work demotes it (see hub_scheduler.use_priority).
+        """
+        response = await self._send(method, url, params=params, headers=headers, priority=priority)
+        if raise_for_status:
+            self._raise_for_status(response)
+        return response
+
+    async def get_revalidated(
+        self, url: str, *, params: Optional[Dict[str, Any]] = None, priority: Priority = Priority.INTERACTIVE
+    ) -> bytes:
+        """
+        GETs a resource's body. If an earlier response carried an ETag or Last-Modified, the request is conditional
+        and a 304 returns the stored body, so an unchanged resource costs no payload.
+        """
+        key = (url, tuple(sorted(params.items())) if params else ())
+        stored = self.conditional.get(key)
+        headers: Dict[str, str] = {}
+        if stored is not None:
+            if stored.etag:
+                headers["If-None-Match"] = stored.etag
+            if stored.last_modified:
+                headers["If-Modified-Since"] = stored.last_modified
+        response = await self._send("GET", url, params=params, headers=headers, priority=priority)
+        if response.status_code == 304 and stored is not None:
+            self.conditional.revalidated += 1
+            return stored.content
+        self._raise_for_status(response)
+        if stored is not None:
+            self.conditional.refetched += 1
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self.conditional.put(key, StoredResponse(etag, last_modified, response.content))
+        else:
+            self.conditional.discard(key)
+        return response.content
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        priority: Priority = Priority.INTERACTIVE,
+        stream: bool = False,
+    ) -> httpx.Response:
+        """
+        Retry loop shared by all calls. Returns the final response; with stream=True its body is not read yet
+        and the caller must close it.
+        """
+        if not url.startswith(("http://", "https://")):
+            url = f"{self.endpoint}{url}"
+        request_headers = build_hf_headers()
+        if headers:
+            request_headers.update(headers)
+        credential = HubScheduler.credential_key(request_headers)
+
+        attempt = 0
+        while True:
+            try:
+                await self.scheduler.acquire(credential, priority)
+            except SchedulerOverloadedError as e:
+                raise HubRateLimitedError(429, url, str(e), e.retry_after_seconds) from e
+            # After the wait: the surrounding work may have been promoted meanwhile (see hub_scheduler.join_scope)
+            call_priority = effective_priority(priority)
+            try:
+                async with self._semaphore_for(url):
+                    request = self._client.build_request(method, url, params=params, headers=request_headers)
+                    response = await self._client.send(request, stream=stream)
+            except httpx.TransportError as e:
+                metrics.record_upstream_call(call_priority.name.lower(), "error")
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff_delay(attempt)
+                logger.warning(f"Hub request {method} {url} failed ({e!r}); retrying in {delay:.2f}s")
+            else:
+                metrics.record_upstream_call(call_priority.name.lower(), str(response.status_code))
+                retry_after = _retry_after_seconds(response)
+                pause = None
+                if response.status_code == 429:
+                    # Throttling is per credential: pause the whole bucket so other calls stop hitting the limit too
+                    pause = self.scheduler.throttled(credential, retry_after)
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+                if stream:
+                    await response.aclose()
+                if pause is not None and self.scheduler.rate_per_second > 0:
+                    delay = 0.0  # The retry waits out the pause in scheduler.acquire
+                    logger.warning(f"Hub request {method} {url} returned HTTP 429; retrying after {pause:.2f}s pause")
+                else:
+                    delay = retry_after if retry_after is not None else self._backoff_delay(attempt)
+                    logger.warning(f"Hub request {method} {url} returned HTTP {response.status_code}; retrying in {delay:.2f}s")
+            attempt += 1
+            if delay:
+                await asyncio.sleep(delay)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        return self.backoff_base_seconds * (2 ** attempt) * (0.5 + random.random())
+
+    @staticmethod
+    def _raise_for_status(response: httpx.Response) -> None:
+        if response.is_success:
+            return
+        url = str(response.request.url)
+        message = response.headers.get("X-Error-Message", "")
+        if response.status_code in (401, 404):
+            # The Hub answers 401 for repos that don't exist when no token is sent
+            raise HubNotFoundError(response.status_code, url, message)
+        if response.status_code == 429:
+            raise HubRateLimitedError(429, url, message, _retry_after_seconds(response))
+        raise HubRequestError(response.status_code, url, message)
+
+    # --- Hub API helpers ---
+
+    async def list_models_page(self, params: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Fetches one page of /api/models. Returns the raw model dicts and the continuation token for the next
+        page, taken from the `Link: rel="next"` header (None on the last page).
+        """
+        response = await self.request("GET", "/api/models", params=params)
+        next_url = response.links.get("next", {}).get("url")
+        next_hub_cursor = None
+        if next_url:
+            next_hub_cursor = parse_qs(urlparse(next_url).query).get("cursor", [None])[0]
+        return response.json(), next_hub_cursor
+
+    async def model_info(self, repo_id: str, files_metadata: bool = False) -> Dict[str, Any]:
+        """
+        Fetches /api/models/{repo_id}. With files_metadata=True, siblings include sizes and LFS info.
+        """
+        params = {"blobs": True} if files_metadata else None
+        content = await self.get_revalidated(
+            f"/api/models/{quote(repo_id, safe='/')}", params=params, priority=Priority.DETAIL
+        )
+        return json.loads(content)
+
+    async def get_file_bytes(self, repo_id: str, filename: str, revision: str = "main") -> bytes:
+        """
+        Reads a (small) repo file fully into memory from the resolve endpoint.
+        """
+        return await self.get_revalidated(self.resolve_url(repo_id, filename, revision), priority=Priority.DETAIL)
+
+    async def read_file_range(self, repo_id: str, filename: str, start: int, end: int, revision: str = "main") -> bytes:
+        """
+        Reads bytes [start, end) of a repo file with an HTTP Range request (follows the redirect to the CDN).
+        The body is streamed and cut off at the requested length, so a server that ignores Range and answers
+        200 with the whole (possibly multi-GB) file never gets read past what was asked for.
+        May return fewer bytes than requested when the file is shorter.
+        """
+        url = self.resolve_url(repo_id, filename, revision)
+        wanted = end - start
+        response = await self._send(
+            "GET", url, headers={"Range": f"bytes={start}-{end - 1}"}, priority=Priority.DETAIL, stream=True
+        )
+        try:
+            self._raise_for_status(response)
+            # 206: exactly the range. 200: the whole file from byte 0; skip to `start`.
+            skip = start if response.status_code == 200 else 0
+            chunks: List[bytes] = []
+            received = 0
+            async for chunk in response.aiter_bytes():
+                if skip:
+                    dropped = min(skip, len(chunk))
+                    chunk = chunk[dropped:]
+                    skip -= dropped
+                chunks.append(chunk)
+                received += len(chunk)
+                if received >= wanted:
+                    break
+            return b"".join(chunks)[:wanted]
+        finally:
+            await response.aclose()
+
+    def resolve_url(self, repo_id: str, filename: str, revision: str = "main") -> str:
+        """Direct download URL for a file in a model repo."""
+        return f"{self.endpoint}/{quote(repo_id, safe='/')}/resolve/{quote(revision, safe='')}/{quote(filename)}"
+
+
+# --- Module-level client ---
+# Created on app startup and closed on shutdown (see main.py). Scripts and background jobs that run
+# outside the app lifespan get a client lazily on first use.
+
+_client: Optional[HubClient] = None
+
+
+def get_hub_client() -> HubClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = HubClient()
+    return _client
+
+
+async def start_hub_client() -> HubClient:
+    logger.info("Starting shared Hub HTTP client.")
+    return get_hub_client()
+
+
+async def close_hub_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        logger.info("Closed shared Hub HTTP client.")
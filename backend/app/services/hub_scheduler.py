@@ -0,0 +1,286 @@
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import heapq
+import itertools
+import logging
+import time
+from enum import IntEnum
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..core import config
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Outbound Hub call classes; lower values are served first when calls have to queue."""
+    INTERACTIVE = 0  # Search pages a user is waiting for
+    DETAIL = 1       # Model details, READMEs, GGUF headers
+    BACKGROUND = 2   # Prefetch, warm-up, catalogue sync, index rebuilds
+
+
+class PriorityScope:
+    """
+    The priority of one piece of work, set with use_priority. Work that other callers join, such as a cache load
+    that several requests coalesce onto, can be promoted to the joiner's priority: its later Hub calls, and the
+    ones it already has queued, are then served at that priority.
+    """
+
+    def __init__(self, priority: Priority):
+        self.priority = priority
+        self._queued: Dict["asyncio.Future[None]", Tuple["TokenBucket", Priority]] = {}
+
+    def applied_to(self, default: Priority) -> Priority:
+        return max(default, self.priority)
+
+    def promote(self, priority: Priority) -> None:
+        if priority >= self.priority:
+            return
+        self.priority = priority
+        for future, (bucket, default) in list(self._queued.items()):
+            bucket.requeue(future, self.applied_to(default))
+
+
+# Scope of the work running in the current task. Background jobs set it once (use_priority) and every Hub call
+# they make is queued as background, however deep in the call stack it happens. Context vars are copied into
+# tasks and asyncio.to_thread workers, so it follows the work; the scope object itself is shared, not copied.
+_current_scope: contextvars.ContextVar[Optional[PriorityScope]] = contextvars.ContextVar("hub_priority", default=None)
+
+
+@contextlib.contextmanager
+def use_priority(priority: Priority) -> Iterator[None]:
+    token = _current_scope.set(PriorityScope(priority))
+    try:
+        yield
+    finally:
+        _current_scope.reset(token)
+
+
+def current_scope() -> Optional[PriorityScope]:
+    return _current_scope.get()
+
+
+def effective_priority(default: Priority) -> Priority:
+    """The call site's own class, demoted to the surrounding work's class if that is lower."""
+    scope = _current_scope.get()
+    return scope.applied_to(default) if scope is not None else default
+
+
+def join_scope(scope: Optional[PriorityScope]) -> None:
+    """
+    Called when the current task starts waiting for work running under `scope`: promotes that work to the
+    current task's priority if it is higher, so a user request never waits behind a background slot.
+    """
+    if scope is not None:
+        current = _current_scope.get()
+        scope.promote(current.priority if current is not None else Priority.INTERACTIVE)
+
+
+class SchedulerOverloadedError(Exception):
+    """Raised when a Hub call can't get a slot within its priority's maximum wait; the caller should shed load."""
+
+    def __init__(self, priority: Priority, waited_seconds: float, retry_after_seconds: float):
+        super().__init__(
+            f"Hub rate limit: {priority.name.lower()} call gave up after waiting {waited_seconds:.1f}s for a slot."
+        )
+        self.priority = priority
+        self.retry_after_seconds = retry_after_seconds
+
+
+class TokenBucket:
+    """
+    Token bucket for one credential, with a priority queue of waiting calls.
+    Tokens refill at `rate` per second up to `burst`. A call takes a token immediately only when nobody of equal
+    or higher priority is queued; otherwise it waits and is released in priority order (FIFO within a class).
+    `pause(seconds)` stops all releases, for when the Hub answered 429 with Retry-After.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters: List[Tuple[int, int, "asyncio.Future[None]"]] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self._queued_as: Dict["asyncio.Future[None]", Priority] = {}  # Class each waiting call is queued under now
+        self.queue_depth: Dict[Priority, int] = {p: 0 for p in Priority}
+        self.granted: Dict[Priority, int] = {p: 0 for p in Priority}
+        self.shed: Dict[Priority, int] = {p: 0 for p in Priority}
+        self.wait_seconds_total: Dict[Priority, float] = {p: 0.0 for p in Priority}
+        self.wait_seconds_max: Dict[Priority, float] = {p: 0.0 for p in Priority}
+        self.throttled = 0
+        self.promoted = 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _try_take(self, now: float) -> bool:
+        if now < self._paused_until:
+            return False
+        self._refill(now)
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+    def _seconds_until_next_token(self, now: float) -> float:
+        if now < self._paused_until:
+            return self._paused_until - now
+        return max(0.0, (1.0 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0.0  # Start from empty after the pause instead of bursting into the rate limit again
+        self._updated = self._paused_until
+        self.throttled += 1
+
+    def _dispatch(self) -> None:
+        self._wakeup = None
+        now = time.monotonic()
+        while self._waiters:
+            future = self._waiters[0][2]
+            if future.done():  # Caller timed out or was cancelled
+                heapq.heappop(self._waiters)
+                continue
+            if not self._try_take(now):
+                break
+            heapq.heappop(self._waiters)
+            future.set_result(None)
+        if self._waiters:
+            self._wakeup = asyncio.get_running_loop().call_later(self._seconds_until_next_token(now), self._dispatch)
+
+    def requeue(self, future: "asyncio.Future[None]", priority: Priority) -> None:
+        """Moves a queued call up to `priority`. Its old entry stays in the heap and is skipped once served."""
+        queued_as = self._queued_as.get(future)
+        if future.done() or queued_as is None or priority >= queued_as:
+            return
+        heapq.heappush(self._waiters, (int(priority), next(self._sequence), future))
+        self._queued_as[future] = priority
+        self.queue_depth[queued_as] -= 1
+        self.queue_depth[priority] += 1
+        self.promoted += 1
+
+    async def acquire(self, priority: Priority, max_wait_seconds: float, scope: Optional[PriorityScope] = None) -> float:
+        """
+        Waits for a token. `priority` is the call site's class, demoted by `scope` (see use_priority); promoting
+        the scope moves the call up the queue. Returns the time waited; raises SchedulerOverloadedError after
+        `max_wait_seconds`. Stats count the call under the class it was queued as; queue_depth follows promotions.
+        """
+        queued_as = scope.applied_to(priority) if scope is not None else priority
+        now = time.monotonic()
+        if not any(w[0] <= queued_as and not w[2].done() for w in self._waiters) and self._try_take(now):
+            self.granted[queued_as] += 1
+            return 0.0
+
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(queued_as), next(self._sequence), future))
+        self._queued_as[future] = queued_as
+        self.queue_depth[queued_as] += 1
+        if scope is not None:
+            scope._queued[future] = (self, priority)
+        if self._wakeup is None:
+            self._wakeup = asyncio.get_running_loop().call_later(self._seconds_until_next_token(now), self._dispatch)
+        try:
+            await asyncio.wait_for(future, timeout=max_wait_seconds)
+        except asyncio.TimeoutError:
+            self.shed[queued_as] += 1
+            raise SchedulerOverloadedError(queued_as, time.monotonic() - now, self._seconds_until_next_token(time.monotonic()) + 1.0)
+        finally:
+            self.queue_depth[self._queued_as.pop(future)] -= 1
+            if scope is not None:
+                scope._queued.pop(future, None)
+        waited = time.monotonic() - now
+        self.granted[queued_as] += 1
+        self.wait_seconds_total[queued_as] += waited
+        self.wait_seconds_max[queued_as] = max(self.wait_seconds_max[queued_as], waited)
+        return waited
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        self._refill(max(now, self._updated))
+        return {
+            "tokens_available": round(self._tokens, 2),
+            "paused_for_seconds": round(max(0.0, self._paused_until - now), 2),
+            "throttled_responses": self.throttled,
+            "promoted_calls": self.promoted,
+            "priorities": {
+                p.name.lower(): {
+                    "queue_depth": self.queue_depth[p],
+                    "granted": self.granted[p],
+                    "shed": self.shed[p],
+                    "wait_seconds_total": round(self.wait_seconds_total[p], 3),
+                    "wait_seconds_max": round(self.wait_seconds_max[p], 3),
+                    "wait_seconds_avg": round(self.wait_seconds_total[p] / self.granted[p], 4) if self.granted[p] else 0.0,
+                }
+                for p in Priority
+            },
+        }
+
+
+class HubScheduler:
+    """
+    Admission control for every outbound Hub call: one TokenBucket per credential (the Hub rate-limits per token,
+    or per IP for anonymous calls), priority queueing, pauses on Retry-After, and per-priority maximum waits after
+    which calls are shed instead of piling up.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float = config.HUB_RATE_LIMIT_PER_SECOND,
+        burst: int = config.HUB_RATE_LIMIT_BURST,
+        max_wait_seconds: Optional[Dict[Priority, float]] = None,
+        default_pause_seconds: float = config.HUB_RATE_LIMIT_DEFAULT_PAUSE_SECONDS,
+    ):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_wait_seconds = max_wait_seconds or {
+            Priority.INTERACTIVE: config.HUB_SCHEDULER_MAX_WAIT_INTERACTIVE_SECONDS,
+            Priority.DETAIL: config.HUB_SCHEDULER_MAX_WAIT_DETAIL_SECONDS,
+            Priority.BACKGROUND: config.HUB_SCHEDULER_MAX_WAIT_BACKGROUND_SECONDS,
+        }
+        self.default_pause_seconds = default_pause_seconds
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    @staticmethod
+    def credential_key(headers: Dict[str, str]) -> str:
+        """Stable, non-reversible id for the credential in `headers` ("anonymous" without one)."""
+        authorization = headers.get("authorization") or headers.get("Authorization")
+        if not authorization:
+            return "anonymous"
+        return "token:" + hashlib.sha256(authorization.encode("utf-8")).hexdigest()[:12]
+
+    def _bucket(self, credential: str) -> TokenBucket:
+        bucket = self._buckets.get(credential)
+        if bucket is None:
+            bucket = TokenBucket(self.rate_per_second, self.burst)
+            self._buckets[credential] = bucket
+        return bucket
+
+    async def acquire(self, credential: str, priority: Priority) -> float:
+        """Waits for a slot for a call of the call site's class `priority`, in the current task's scope."""
+        if self.rate_per_second <= 0:  # Scheduling disabled
+            return 0.0
+        scope = _current_scope.get()
+        queued_as = scope.applied_to(priority) if scope is not None else priority
+        return await self._bucket(credential).acquire(priority, self.max_wait_seconds[queued_as], scope)
+
+    def throttled(self, credential: str, retry_after_seconds: Optional[float]) -> float:
+        """Records a 429 for `credential` and pauses its bucket. Returns the pause length."""
+        pause = retry_after_seconds if retry_after_seconds is not None else self.default_pause_seconds
+        self._bucket(credential).pause(pause)
+        logger.warning(f"Hub rate limit hit for {credential}; pausing outbound calls for {pause:.1f}s")
+        return pause
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate_per_second": self.rate_per_second,
+            "burst": self.burst,
+            "max_wait_seconds": {p.name.lower(): s for p, s in self.max_wait_seconds.items()},
+            "credentials": {credential: bucket.stats() for credential, bucket in self._buckets.items()},
+        }
@@ -0,0 +1,84 @@
+import contextlib
+import contextvars
+import time
+from typing import Iterator, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+# --- Prometheus metrics ---
+# Exposed at /metrics (see main.py). Requests are labelled by the name of the route's endpoint function
+# (e.g. search_hf_models_paginated), never the raw path, so label cardinality stays bounded.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "hfsearch_http_request_duration_seconds", "API request latency, by route.",
+    ["method", "handler", "status"], buckets=LATENCY_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "hfsearch_stage_duration_seconds", "Time spent in each stage of a service operation.",
+    ["operation", "stage"], buckets=LATENCY_BUCKETS,
+)
+SEARCH_ITEMS_SKIPPED = Histogram(
+    "hfsearch_search_items_skipped", "Listing items walked past to reach a page's start_index (deep pages without a cursor).",
+    buckets=(0, 100, 1000, 5000, 10000, 50000, 100000),
+)
+UPSTREAM_CALLS = Counter(
+    "hfsearch_upstream_calls_total", "Hub HTTP requests sent (retries included), by priority class and status.",
+    ["priority", "status"],
+)
+UPSTREAM_CALLS_PER_REQUEST = Histogram(
+    "hfsearch_upstream_calls_per_request", "Hub HTTP requests an API request caused (0 when served from cache).",
+    ["handler"], buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+
+
+class RequestUpstreamCounter:
+    """Hub calls made on behalf of one API request."""
+    __slots__ = ("calls",)
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+
+# Set by the request middleware; Hub calls made while handling the request (including in tasks it starts,
+# which copy the context) add to it.
+_request_counter: contextvars.ContextVar[Optional[RequestUpstreamCounter]] = contextvars.ContextVar(
+    "hfsearch_request_upstream_counter", default=None
+)
+
+
+@contextlib.contextmanager
+def count_upstream_calls() -> Iterator[RequestUpstreamCounter]:
+    counter = RequestUpstreamCounter()
+    token = _request_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _request_counter.reset(token)
+
+
+def record_upstream_call(priority: str, status: str) -> None:
+    UPSTREAM_CALLS.labels(priority, status).inc()
+    counter = _request_counter.get()
+    if counter is not None:
+        counter.calls += 1
+
+
+@contextlib.contextmanager
+def stage(operation: str, name: str) -> Iterator[None]:
+    """Times a block as one stage of `operation` (recorded even if the block raises)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(operation, name).observe(time.perf_counter() - started)
+
+
+def observe_stage(operation: str, name: str, seconds: float) -> None:
+    STAGE_SECONDS.labels(operation, name).observe(seconds)
+
+
+def render_latest() -> bytes:
+    return generate_latest()
+
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+
+from ..core import config
+from . import hf_service
+from .cache import AsyncResultCache
+from .hub_scheduler import Priority, use_priority
+
+logger = logging.getLogger(__name__)
+
+
+class Prefetcher:
+    """
+    Speculative background loads into the result caches.
+    Work is skipped when the entry is already fresh or loading, dropped when more than `max_pending` loads wait,
+    and limited to `budget_per_minute` upstream loads; at most `concurrency` run at once. Prefetching never
+    delays or fails a user request: it is scheduled after the response and its errors are only logged.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = config.PREFETCH_CONCURRENCY,
+        max_pending: int = config.PREFETCH_MAX_PENDING,
+        budget_per_minute: int = config.PREFETCH_BUDGET_PER_MINUTE,
+    ):
+        self.max_pending = max_pending
+        self.budget_per_minute = budget_per_minute
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        self._keys: Set[Hashable] = set()
+        self._budget_window_start = time.monotonic()
+        self._budget_used = 0
+        self._counters = {
+            "scheduled": 0,
+            "completed": 0,
+            "failed": 0,
+            "skipped_cached": 0,
+            "dropped_queue_full": 0,
+            "dropped_budget": 0,
+        }
+
+    def _take_budget(self) -> bool:
+        now = time.monotonic()
+        if now - self._budget_window_start >= 60.0:
+            self._budget_window_start = now
+            self._budget_used = 0
+        if self._budget_used >= self.budget_per_minute:
+            return False
+        self._budget_used += 1
+        return True
+
+    async def schedule(self, cache: AsyncResultCache, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> bool:
+        """Queues a background load of `key` through `cache`. Returns False if it was skipped or dropped."""
+        if key in self._keys or await cache.is_fresh_or_loading(key):
+            self._counters["skipped_cached"] += 1
+            return False
+        if len(self._tasks) >= self.max_pending:
+            self._counters["dropped_queue_full"] += 1
+            return False
+        if not self._take_budget():
+            self._counters["dropped_budget"] += 1
+            return False
+        self._counters["scheduled"] += 1
+        self._keys.add(key)
+        task = asyncio.get_running_loop().create_task(self._run(cache, key, loader))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _run(self, cache: AsyncResultCache, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            async with self._semaphore:
+                # A user request may have loaded it while this one waited for a slot
+                if not await cache.is_fresh_or_loading(key):
+                    with use_priority(Priority.BACKGROUND):
+                        await cache.get_or_load(key, loader)
+            self._counters["completed"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._counters["failed"] += 1
+            logger.warning(f"Prefetch of {key!r} failed: {e}")
+        finally:
+            self._keys.discard(key)
+
+    async def cancel_all(self) -> None:
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._counters, "pending": len(self._tasks), "budget_used_this_minute": self._budget_used}
+
+
+_prefetcher: Optional[Prefetcher] = None
+_warmup_task: Optional["asyncio.Task[None]"] = None
+
+
+def get_prefetcher() -> Prefetcher:
+    global _prefetcher
+    if _prefetcher is None:
+        _prefetcher = Prefetcher()
+    return _prefetcher
+
+
+async def prefetch_after_search(
+    query: Optional[str],
+    sort_by: str,
+    page: int,
+    page_size: int,
+    pipeline_tag: Optional[str],
+    library: Optional[str],
+    lean: bool,
+    results: List[Any],
+    has_more: bool,
+    next_cursor: Optional[str],
+    facet_filters: Optional[Dict[str, List[str]]] = None,
+) -> None:
+    """
+    Schedules what a user is likely to open next after seeing a search page: page N+1 (requested with the
+    `next_cursor` the client will send, so it lands under the same cache key) and the details of the top results.
+    Only schedules and returns; run it as a response background task so it starts after the response is sent.
+    """
+    if not config.PREFETCH_ENABLED:
+        return
+    prefetcher = get_prefetcher()
+
+    if has_more:
+        await prefetcher.schedule(
+            hf_service.search_cache,
+            hf_service.search_cache_key(
+                query, sort_by, page + 1, page_size, pipeline_tag, library, next_cursor, lean, facet_filters
+            ),
+            lambda: hf_service.search_models_on_hub_paginated(
+                query=query, sort_by=sort_by, page=page + 1, page_size=page_size,
+                pipeline_tag=pipeline_tag, library=library, cursor=next_cursor, lean=lean, facet_filters=facet_filters,
+            ),
+        )
+
+    # Without GGUF header reads: those are a ranged read per .gguf file, far more Hub traffic than the one budget
+    # unit a details load is charged. GGUF files then carry header fields only if already cached, as when a
+    # details request's header reads time out.
+    for item in results[:config.PREFETCH_TOP_K_DETAILS]:
+        model_id = item["id"] if isinstance(item, dict) else item.id
+        await prefetcher.schedule(
+            hf_service.details_cache,
+            hf_service.details_cache_key(model_id),
+            lambda model_id=model_id: hf_service.get_model_details_from_hub(model_id=model_id, read_gguf_headers=False),
+        )
+
+
+async def warm_up(queries: List[str], page_size: int = config.PREFETCH_WARMUP_PAGE_SIZE) -> None:
+    """
+    Loads page 1 of each query (as the frontend requests it) into the search cache, then lets the usual
+    after-search prefetch pick up page 2 and top results, within the prefetch budget.
+    """
+    started = time.perf_counter()
+    warmed = 0
+    for query in queries:
+        query = query or None
+        try:
+            results, _, has_more, next_cursor = await hf_service.search_models_cached(query=query, page_size=page_size)
+        except Exception as e:
+            logger.warning(f"Warm-up search for '{query}' failed: {e}")
+            continue
+        warmed += 1
+        await prefetch_after_search(query, "downloads", 1, page_size, None, None, False, results, has_more, next_cursor)
+    logger.info(f"Warmed {warmed}/{len(queries)} popular searches in {time.perf_counter() - started:.1f}s.")
+
+
+def start_warmup() -> None:
+    """Warms the configured popular queries in the background. Called on app startup; doesn't delay it."""
+    global _warmup_task
+    if not config.PREFETCH_ENABLED or not config.PREFETCH_WARMUP_QUERIES or _warmup_task is not None:
+        return
+    with use_priority(Priority.BACKGROUND):  # The task copies the context, so its Hub calls queue as background
+        _warmup_task = asyncio.get_running_loop().create_task(warm_up(config.PREFETCH_WARMUP_QUERIES))
+
+
+async def stop() -> None:
+    """Cancels warm-up and pending prefetches. Called on app shutdown."""
+    global _warmup_task
+    if _warmup_task is not None:
+        _warmup_task.cancel()
+        await asyncio.gather(_warmup_task, return_exceptions=True)
+        _warmup_task = None
+    if _prefetcher is not None:
+        await _prefetcher.cancel_all()
+
+
+def get_stats() -> Dict[str, Any]:
+    return get_prefetcher().stats()
@@ -0,0 +1,168 @@
+import re
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterable, List, Optional
+
+# Define known task keywords and their corresponding pipeline_tags
+# This list can be expanded. Keys are lowercase.
+TASK_KEYWORD_TO_PIPELINE_TAG = {
+    "text generation": "text-generation",
+    "summarization": "summarization",
+    "translation": "translation",
+    "question answering": "question-answering",
+    "fill mask": "fill-mask",
+    "fill-mask": "fill-mask",
+    "text classification": "text-classification",
+    "token classification": "token-classification",
+    "image classification": "image-classification",
+    "object detection": "object-detection",
+    "image segmentation": "image-segmentation",
+    "text to image": "text-to-image",
+    "text-to-image": "text-to-image",
+    "image to text": "image-to-text",
+    "image-to-text": "image-to-text",
+    "text to speech": "text-to-speech",
+    "text-to-speech": "text-to-speech",
+    "audio to audio": "audio-to-audio",
+    "automatic speech recognition": "automatic-speech-recognition",
+    "asr": "automatic-speech-recognition",
+    "voice activity detection": "voice-activity-detection",
+    "reinforcement learning": "reinforcement-learning",
+    "robotics": "robotics",
+    "tabular classification": "tabular-classification",
+    "tabular regression": "tabular-regression",
+    "table question answering": "table-question-answering",
+    "visual question answering": "visual-question-answering",
+    "vqa": "visual-question-answering",
+    "document question answering": "document-question-answering",
+    "zero shot classification": "zero-shot-classification",
+    "zero-shot-classification": "zero-shot-classification",
+    "zero shot image classification": "zero-shot-image-classification",
+    "conversational": "conversational",
+    "feature extraction": "feature-extraction",
+    # Add more mappings as needed
+}
+
+# Library names recognised as bare words in a query. Only names that are unambiguous as search terms: models
+# whose ids contain one carry that library's tag. Names that are also model names ("mistral nemo") or that most
+# models are tagged with anyway (pytorch, tensorflow, jax, keras) stay in the free text; anything can still be
+# given explicitly with `lib:<name>`.
+KNOWN_LIBRARIES = {
+    "transformers", "diffusers", "gguf", "sentence-transformers", "peft", "timm", "onnx", "safetensors",
+    "mlx", "spacy", "setfit", "open_clip", "transformers.js", "adapter-transformers", "flair", "fasttext",
+    "espnet", "speechbrain", "stable-baselines3", "ml-agents", "paddlenlp", "llamafile",
+}
+
+# `key:value` filters and the ParsedQuery field they fill.
+FILTER_KEY_TO_FIELD = {
+    "lib": "libraries",
+    "library": "libraries",
+    "quant": "quantizations",
+    "quantization": "quantizations",
+    "author": "authors",
+    "task": "pipeline_tags",
+    "pipeline": "pipeline_tags",
+    "pipeline_tag": "pipeline_tags",
+}
+
+
+def _alternation(words) -> str:
+    # Longest first, so "zero shot image classification" wins over "zero shot classification" at the same position
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+# Token boundaries: hyphens, dots and underscores are part of a term, so "transformers" doesn't match
+# inside "sentence-transformers" and "asr" doesn't match inside "asr-model".
+_B_START = r"(?<![\w.-])"
+_B_END = r"(?![\w.-])"
+
+# One compiled pattern, built once at import: a single left-to-right scan finds every structured filter,
+# task keyword and library name in the query.
+QUERY_TOKEN_RE = re.compile(
+    rf"{_B_START}(?P<key>{_alternation(FILTER_KEY_TO_FIELD)}):(?P<value>\"[^\"]*\"|[^\s\"]+)"
+    rf"|{_B_START}(?P<task>{_alternation(TASK_KEYWORD_TO_PIPELINE_TAG)}){_B_END}"
+    rf"|{_B_START}(?P<lib>{_alternation(KNOWN_LIBRARIES)}){_B_END}",
+    re.IGNORECASE,
+)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+@dataclass
+class ParsedQuery:
+    """Free-text remainder of a search query plus the filters extracted from it (de-duplicated, in query order)."""
+    text: Optional[str] = None
+    pipeline_tags: List[str] = field(default_factory=list)
+    libraries: List[str] = field(default_factory=list)
+    quantizations: List[str] = field(default_factory=list)
+    authors: List[str] = field(default_factory=list)
+    # Field -> value -> the query text it was extracted from, to put back into the free text if it can't be applied
+    filter_terms: Dict[str, Dict[str, str]] = field(default_factory=dict, repr=False)
+
+
+def _append_filter(parsed: ParsedQuery, field_name: str, value: str, term: str) -> None:
+    values = getattr(parsed, field_name)
+    if value and value not in values:
+        values.append(value)
+        parsed.filter_terms.setdefault(field_name, {})[value] = term
+
+
+def parse_query(query: Optional[str], extract_tasks: bool = True) -> ParsedQuery:
+    """
+    Splits a search query into free text and filters in one pass:
+    - `key:value` filters (lib:, quant:, author:, task:), e.g. "llama lib:transformers quant:Q4_K_M"
+    - task keywords mapped to pipeline tags, e.g. "text generation" -> "text-generation"
+    - known library names, e.g. "gguf"
+    With extract_tasks=False (an explicit pipeline_tag was given), task keywords stay in the free text.
+    """
+    parsed = ParsedQuery()
+    if not query:
+        return parsed
+
+    kept: List[str] = []
+    last_end = 0
+    for match in QUERY_TOKEN_RE.finditer(query):
+        key, task, lib = match.group("key"), match.group("task"), match.group("lib")
+        if task is not None and not extract_tasks:
+            continue
+        kept.append(query[last_end:match.start()])
+        last_end = match.end()
+        if key is not None:
+            term = value = match.group("value").strip('"')
+            field_name = FILTER_KEY_TO_FIELD[key.lower()]
+            if field_name == "pipeline_tags":
+                value = TASK_KEYWORD_TO_PIPELINE_TAG.get(value.lower(), value.lower())
+            elif field_name == "quantizations":
+                value = value.upper()
+            elif field_name == "libraries":
+                value = value.lower()
+            _append_filter(parsed, field_name, value, term)
+        elif task is not None:
+            _append_filter(parsed, "pipeline_tags", TASK_KEYWORD_TO_PIPELINE_TAG[task.lower()], task)
+        else:
+            _append_filter(parsed, "libraries", lib.lower(), lib)
+    kept.append(query[last_end:])
+
+    text = _WHITESPACE_RE.sub(" ", "".join(kept)).strip()
+    parsed.text = text or None
+    return parsed
+
+
+def first_filters_only(parsed: ParsedQuery, field_names: Iterable[str]) -> ParsedQuery:
+    """
+    Copy of `parsed` keeping only the first value of each of `field_names`, for searches that take a single value
+    (the Hub's pipeline_tag and author). The query text of the other values goes back into the free text.
+    """
+    changes: Dict[str, object] = {}
+    terms: List[str] = []
+    for field_name in field_names:
+        values = getattr(parsed, field_name)
+        if len(values) > 1:
+            changes[field_name] = values[:1]
+            terms.extend(parsed.filter_terms.get(field_name, {}).get(value, value) for value in values[1:])
+    if not changes:
+        return parsed
+    return replace(parsed, text=" ".join(t for t in [parsed.text, *terms] if t), **changes)
+
+
+def describe(parsed: ParsedQuery) -> Dict[str, object]:
+    """Compact dict of the non-empty parts of a ParsedQuery, for logging."""
+    return {k: v for k, v in parsed.__dict__.items() if v and k != "filter_terms"}
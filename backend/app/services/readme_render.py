@@ -0,0 +1,29 @@
+import re
+from typing import Optional
+
+try:
+    from markdown_it import MarkdownIt
+except ImportError:  # Optional: without it the README endpoint only serves markdown
+    MarkdownIt = None
+
+# Model cards start with YAML metadata between `---` lines; the Hub doesn't render it as part of the card either.
+_FRONT_MATTER = re.compile(rb"\A---\r?\n.*?\r?\n---[ \t]*(?:\r?\n|\Z)", re.DOTALL)
+
+_renderer: Optional["MarkdownIt"] = None
+
+
+def is_available() -> bool:
+    return MarkdownIt is not None
+
+
+def render_html(markdown: bytes) -> bytes:
+    """
+    Renders a model card to an HTML fragment that is safe to embed: raw HTML in the markdown is escaped rather
+    than passed through, and markdown-it rejects javascript:, vbscript:, file: and non-image data: link targets.
+    CPU-bound; run it in a thread.
+    """
+    global _renderer
+    if _renderer is None:
+        _renderer = MarkdownIt("commonmark", {"html": False}).enable(["table", "strikethrough"])
+    text = _FRONT_MATTER.sub(b"", markdown, count=1).decode("utf-8", errors="replace")
+    return _renderer.render(text).encode("utf-8")
@@ -0,0 +1,379 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import struct
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import msgpack
+
+from ..core import config
+from .cache import CacheBackend, CacheEntry, MemoryLRUBackend
+
+try:
+    import redis
+    import redis.asyncio
+except ImportError:  # Optional: only needed for HF_CACHE_BACKEND=redis
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# --- Shared result cache backends ---
+# Let the uvicorn workers of one deployment share search, details and GGUF header entries (and single-flight
+# their loads) instead of each keeping its own copy and asking the Hub for it. See HF_CACHE_BACKEND in config.
+
+# Entry header: fresh/stale/error deadlines as wall-clock times. time.monotonic() values mean nothing to another
+# host, or to this one after a reboot with the SQLite file still on disk.
+_HEADER = struct.Struct("<ddd")
+
+
+class Codec:
+    """
+    Serializes the values of one cache for a shared store: a value is stored as msgpack of the plain data `encode`
+    turns it into (schema dicts, lists, bytes) and rebuilt by `decode`. Decoding only ever builds plain data, so
+    whoever can write to the store can at worst poison entries, not run code in the workers. The first byte marks
+    the format; entries in any other format (such as the pickled ones of earlier versions) are rejected.
+    """
+
+    def __init__(self, encode: Callable[[Any], Any], decode: Callable[[Any], Any]):
+        self.encode = encode
+        self.decode = decode
+
+    def dumps(self, value: Any) -> bytes:
+        return b"m" + msgpack.packb(self.encode(value), use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        if data[:1] != b"m":
+            raise ValueError(f"unsupported entry format {bytes(data[:1])!r}")
+        return self.decode(msgpack.unpackb(data[1:], raw=False))
+
+
+class SQLiteStore:
+    """
+    Shared store in a local SQLite file, for workers on one host. WAL mode lets readers run alongside a writer,
+    and reads go through a memory mapping of the file (mmap_size), so hot entries are served from the page cache
+    shared by all workers. Expired rows are pruned, and the oldest-expiring evicted past `max_bytes`, every
+    `PRUNE_EVERY` writes.
+    sqlite3 calls block (on disk I/O, or for up to the busy timeout while another worker writes), so they run on
+    the store's own threads, each with its own connection, never on the event loop.
+    """
+
+    name = "sqlite"
+    errors: Tuple[type, ...] = (sqlite3.Error,)
+    PRUNE_EVERY = 256
+    THREADS = 4
+
+    def __init__(self, path: str, max_bytes: int, mmap_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.mmap_bytes = mmap_bytes
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=self.THREADS, thread_name_prefix="sqlite-cache")
+        self._writes = 0
+        self.evictions = 0
+        # Whole-file totals as of the last prune; stats() must not query the file from the event loop
+        self._file_entries = 0
+        self._file_bytes = 0
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY, expires_at REAL NOT NULL, size INTEGER NOT NULL, value BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at);
+            CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, token TEXT NOT NULL, expires_at REAL NOT NULL);
+        """)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit: each write is one statement, except prune's transaction
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # A cache can lose its last writes on power loss
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_bytes)}")
+        return conn
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    async def _run(self, function: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._run(self._get, key)
+
+    async def set(self, key: str, value: bytes, expires_at: float) -> None:
+        await self._run(self._set, key, value, expires_at)
+
+    async def delete(self, key: str) -> None:
+        await self._run(self._delete, key)
+
+    async def clear(self, prefix: str) -> None:
+        await self._run(self._clear, prefix)
+
+    async def acquire_lock(self, key: str, ttl_seconds: float) -> Optional[str]:
+        return await self._run(self._acquire_lock, key, ttl_seconds)
+
+    async def release_lock(self, key: str, token: str) -> None:
+        await self._run(self._release_lock, key, token)
+
+    async def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def _get(self, key: str) -> Optional[bytes]:
+        row = self._conn.execute("SELECT value FROM entries WHERE key = ? AND expires_at > ?", (key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def _set(self, key: str, value: bytes, expires_at: float) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO entries (key, expires_at, size, value) VALUES (?, ?, ?, ?)",
+            (key, expires_at, len(value), value),
+        )
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def _delete(self, key: str) -> None:
+        self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def _clear(self, prefix: str) -> None:
+        self._conn.execute("DELETE FROM entries WHERE key >= ? AND key < ?", (prefix, prefix + "\uffff"))
+
+    def prune(self) -> None:
+        conn = self._conn
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+            conn.execute("DELETE FROM locks WHERE expires_at <= ?", (now,))
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            excess = size - self.max_bytes
+            if excess > 0:
+                # Evict the entries closest to expiry, down to 90% of the cap so this doesn't run on every prune
+                excess += self.max_bytes // 10
+                for key, entry_size in conn.execute("SELECT key, size FROM entries ORDER BY expires_at").fetchall():
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self.evictions += 1
+                    entries -= 1
+                    size -= entry_size
+                    excess -= entry_size
+                    if excess <= 0:
+                        break
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._file_entries, self._file_bytes = entries, size
+
+    def _acquire_lock(self, key: str, ttl_seconds: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        now = time.time()
+        # Taking over an expired lock: the primary key lets only one process's insert succeed
+        self._conn.execute("DELETE FROM locks WHERE key = ? AND expires_at <= ?", (key, now))
+        acquired = self._conn.execute(
+            "INSERT OR IGNORE INTO locks (key, token, expires_at) VALUES (?, ?, ?)", (key, token, now + ttl_seconds)
+        ).rowcount
+        return token if acquired else None
+
+    def _release_lock(self, key: str, token: str) -> None:
+        self._conn.execute("DELETE FROM locks WHERE key = ? AND token = ?", (key, token))
+
+    def stats(self, prefix: str) -> Dict[str, Any]:
+        return {
+            "file_entries_at_last_prune": self._file_entries,
+            "file_bytes_at_last_prune": self._file_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "path": self.path,
+        }
+
+
+class RedisStore:
+    """
+    Shared store on a Redis-protocol server (Redis, Valkey, KeyDB...), for workers on one or more hosts. Entries
+    expire with the key (PXAT); evictions past maxmemory are the server's (use an allkeys-lru/volatile-lru policy).
+    Uses the asyncio client, so a slow server delays the requests waiting for it, not the whole worker; each call
+    is one round trip, bounded by a 1 s socket timeout.
+    """
+
+    name = "redis"
+    errors: Tuple[type, ...] = (redis.RedisError,) if redis is not None else ()
+    # Deletes the lock only if this process still holds it (it may have expired and been taken over)
+    _RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+    def __init__(self, url: str):
+        if redis is None:
+            raise RuntimeError("HF_CACHE_BACKEND=redis needs the redis package (pip install redis)")
+        self.url = url
+        self._client = redis.asyncio.Redis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0)
+        self._release = self._client.register_script(self._RELEASE_SCRIPT)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: bytes, expires_at: float) -> None:
+        await self._client.set(key, value, pxat=int(expires_at * 1000))
+
+    async def delete(self, key: str) -> None:
+        await self._client.unlink(key)
+
+    async def clear(self, prefix: str) -> None:
+        keys = [key async for key in self._client.scan_iter(match=f"{prefix}*", count=1000)]
+        for start in range(0, len(keys), 1000):
+            await self._client.unlink(*keys[start:start + 1000])
+
+    async def acquire_lock(self, key: str, ttl_seconds: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        return token if await self._client.set(f"{key}:lock", token, nx=True, px=int(ttl_seconds * 1000)) else None
+
+    async def release_lock(self, key: str, token: str) -> None:
+        await self._release(keys=[f"{key}:lock"], args=[token])
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    def stats(self, prefix: str) -> Dict[str, Any]:
+        return {"url": self.url.split("@")[-1]}  # Without credentials
+
+
+class SharedBackend(CacheBackend):
+    """
+    `CacheBackend` over a shared store: entries are serialized with the cache's codec under a key derived from
+    the cache name, and survive as long as their stale-if-error window. Store errors (e.g. the Redis server being
+    down) are logged and treated as misses, so requests fall back to loading from the Hub; the store is then left
+    alone for RETRY_AFTER_ERROR_SECONDS, so an unreachable server doesn't add its timeout to every request.
+    """
+
+    shared = True
+    RETRY_AFTER_ERROR_SECONDS = 5.0
+
+    def __init__(
+        self, name: str, get_store: Callable[[], Any], codec: Codec, key_prefix: str,
+        lock_timeout_seconds: float, lock_poll_seconds: float,
+    ):
+        self.name = name
+        self._get_store = get_store  # Resolved on every use: the store is reopened after close_store()
+        self.codec = codec
+        self.prefix = f"{key_prefix}{name}:"
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self.lock_poll_seconds = lock_poll_seconds
+        self._failing = False
+        self._retry_at = 0.0
+        self._counters = {"store_errors": 0, "decode_errors": 0, "bytes_written": 0}
+
+    @property
+    def store(self) -> Any:
+        return self._get_store()
+
+    def _key(self, key: Hashable) -> str:
+        # Cache keys are tuples of strings, numbers and None, whose repr is the same in every process
+        return self.prefix + hashlib.blake2b(repr(key).encode("utf-8"), digest_size=16).hexdigest()
+
+    async def _call(self, method: str, *args: Any) -> Any:
+        if self._failing and time.monotonic() < self._retry_at:
+            return None
+        try:
+            result = await getattr(self.store, method)(*args)
+        except self.store.errors as e:
+            self._counters["store_errors"] += 1
+            self._retry_at = time.monotonic() + self.RETRY_AFTER_ERROR_SECONDS
+            if not self._failing:  # Once per outage, not once per request
+                self._failing = True
+                logger.warning(f"Shared cache '{self.name}' ({self.store.name}) unavailable, loading directly: {e}")
+            return None
+        self._failing = False
+        return result
+
+    async def get(self, key: Hashable) -> Optional[CacheEntry]:
+        data = await self._call("get", self._key(key))
+        if data is None:
+            return None
+        try:
+            wall_deadlines = _HEADER.unpack_from(data)
+            value = self.codec.loads(data[_HEADER.size:])
+        except Exception as e:  # Written by an incompatible version, or corrupt: a miss
+            self._counters["decode_errors"] += 1
+            logger.debug("Dropping undecodable '%s' entry: %s", self.name, e)
+            await self._call("delete", self._key(key))
+            return None
+        offset = time.monotonic() - time.time()
+        fresh_until, stale_until, error_until = (deadline + offset for deadline in wall_deadlines)
+        return CacheEntry(value, len(data), fresh_until, stale_until, error_until)
+
+    async def set(self, key: Hashable, entry: CacheEntry) -> None:
+        offset = time.time() - time.monotonic()
+        deadlines = (entry.fresh_until + offset, entry.stale_until + offset, entry.error_until + offset)
+        try:
+            data = _HEADER.pack(*deadlines) + self.codec.dumps(entry.value)
+        except Exception as e:
+            logger.warning(f"Could not serialize '{self.name}' entry, not caching it: {e}")
+            return
+        self._counters["bytes_written"] += len(data)
+        await self._call("set", self._key(key), data, max(deadlines))
+
+    async def delete(self, key: Hashable) -> None:
+        await self._call("delete", self._key(key))
+
+    async def clear(self) -> None:
+        await self._call("clear", self.prefix)
+
+    async def acquire_lock(self, key: Hashable) -> Optional[str]:
+        token = await self._call("acquire_lock", self._key(key), self.lock_timeout_seconds)
+        if token is None and self._failing:
+            return "unlocked"  # Store down: don't make every process wait out the lock timeout
+        return token
+
+    async def release_lock(self, key: Hashable, token: str) -> None:
+        if token != "unlocked":
+            await self._call("release_lock", self._key(key), token)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.store.name, **self.store.stats(self.prefix), **self._counters}
+
+
+_store: Optional[Any] = None
+
+
+def _get_store() -> Any:
+    global _store
+    if _store is None:
+        if config.CACHE_BACKEND == "sqlite":
+            os.makedirs(os.path.dirname(os.path.abspath(config.CACHE_SQLITE_PATH)), exist_ok=True)
+            _store = SQLiteStore(config.CACHE_SQLITE_PATH, config.CACHE_SQLITE_MAX_BYTES, config.CACHE_SQLITE_MMAP_BYTES)
+        elif config.CACHE_BACKEND == "redis":
+            _store = RedisStore(config.CACHE_REDIS_URL)
+        else:
+            raise ValueError(f"Unknown HF_CACHE_BACKEND {config.CACHE_BACKEND!r}; expected memory, sqlite or redis.")
+        logger.info(f"Result caches shared through {config.CACHE_BACKEND} ({config.CACHE_KEY_PREFIX!r} keys).")
+    return _store
+
+
+def make_backend(name: str, max_entries: int, max_bytes: int, codec: Codec) -> CacheBackend:
+    """
+    The backend for cache `name` as configured by HF_CACHE_BACKEND: the in-process LRU (`max_entries`,
+    `max_bytes`), or a shared store, which has its own size limit and stores values with `codec`.
+    """
+    if config.CACHE_BACKEND == "memory":
+        return MemoryLRUBackend(max_entries=max_entries, max_bytes=max_bytes)
+    return SharedBackend(
+        name, _get_store, codec, config.CACHE_KEY_PREFIX,
+        config.CACHE_LOCK_TIMEOUT_SECONDS, config.CACHE_LOCK_POLL_SECONDS,
+    )
+
+
+async def close_store() -> None:
+    """
+    Closes the shared store's connections, if one was opened. Called on app shutdown; backends open a new store
+    on their next use (e.g. in a second app lifespan in the same process).
+    """
+    global _store
+    if _store is not None:
+        await _store.close()
+        _store = None
@@ -0,0 +1,167 @@
+"""
+Benchmark: end-to-end API throughput and latency against a local fake Hub.
+
+Boots the FastAPI `app` in-process with its Hub client pointed at benchmarks.fake_hub (a synthetic catalogue of
+--models models, --hub-latency-ms per upstream response, listing pages capped at --hub-max-page-size), then
+drives these scenarios at --concurrency concurrent requests each:
+- search_shallow   page 1 of `model-<k>` text searches (varying page size and sort)
+- search_deep      pages --deep-from.. of the unfiltered listing, without a cursor (seeks through the listing)
+- search_task      page 1 of "<task keyword> model-<k>" searches (task keyword -> pipeline_tag filter)
+- search_lean      search_shallow's requests with lean=true
+- details          /api/models/{author}/{name} for distinct models
+- details_refetch  the details requests again after the details cache is cleared: the Hub answers the
+                   conditional (If-None-Match) model info and README requests with 304
+Every request uses distinct parameters and the result caches are cleared before each scenario, so the numbers
+measure the service layer rather than cache hits. Prefetching, warm-up and autocomplete are disabled.
+The fake Hub shares the process and event loop, so its own CPU time (filtering the synthetic catalogue) is in
+the numbers too: compare runs with each other, not with production latencies.
+
+Reports per scenario: throughput, p50/p99 latency, errors, upstream calls and bytes per request and process RSS.
+
+Run from the backend/ directory:
+    python -m benchmarks.bench_api
+    python -m benchmarks.bench_api --models 1000000 --hub-latency-ms 40 --concurrency 32 -n 500
+    python -m benchmarks.bench_api --scenarios search_deep details
+"""
+import argparse
+import asyncio
+import logging
+import os
+import resource
+import time
+from typing import Dict, List, Tuple
+
+# Background jobs would add their own Hub traffic to the numbers; must be set before the app modules load config.
+os.environ.setdefault("HF_PREFETCH_ENABLED", "0")
+os.environ.setdefault("HF_AUTOCOMPLETE_ENABLED", "0")
+os.environ.pop("HF_MIRROR_DB_PATH", None)
+
+import httpx  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.services import hf_service, hub_client  # noqa: E402
+from benchmarks.fake_hub import create_app  # noqa: E402
+
+FAKE_ENDPOINT = "http://fake-hub.local"
+TASK_KEYWORDS = ["text generation", "text classification", "image classification", "speech recognition",
+                 "feature extraction", "translation", "summarization", "text to image"]
+SORTS = ["downloads", "likes", "lastModified"]
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def rss_mb() -> float:
+    """Current resident set size (Linux), falling back to the peak where /proc isn't available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def scenario_requests(name: str, n: int, args: argparse.Namespace) -> List[Tuple[str, Dict]]:
+    """(path, query params) for the n requests of a scenario; all distinct, so every one misses the cache."""
+    requests: List[Tuple[str, Dict]] = []
+    for i in range(n):
+        if name in ("search_shallow", "search_lean"):
+            params = {"query": f"model-{1 + i % 9}", "page_size": 10 + i // 27 % 41, "sort_by": SORTS[i // 9 % 3]}
+            if name == "search_lean":
+                params["lean"] = "true"
+            requests.append(("/api/search/models", params))
+        elif name == "search_deep":
+            requests.append(("/api/search/models", {"page": args.deep_from + i, "page_size": 20}))
+        elif name == "search_task":
+            keyword = TASK_KEYWORDS[i % len(TASK_KEYWORDS)]
+            requests.append(("/api/search/models", {"query": f"{keyword} model-{1 + i // 8 % 9}",
+                                                    "page_size": 10 + i // 72 % 41}))
+        elif name in ("details", "details_refetch"):
+            model = (i * 7919) % args.models
+            requests.append((f"/api/models/org{model % 997}/model-{model}", {}))
+    return requests
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, fake_hub, requests: List[Tuple[str, Dict]], concurrency: int
+) -> Dict[str, float]:
+    await hf_service.search_cache.clear()
+    await hf_service.details_cache.clear()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(path: str, params: Dict) -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(path, params=params)
+            elapsed = time.perf_counter() - started
+        if response.status_code == 200:
+            latencies.append(elapsed)
+        else:
+            errors += 1
+
+    upstream_before, bytes_before = fake_hub.state.requests, fake_hub.state.bytes_sent
+    started = time.perf_counter()
+    await asyncio.gather(*(one(path, params) for path, params in requests))
+    wall = time.perf_counter() - started
+    return {
+        "requests": len(requests),
+        "throughput": len(requests) / wall,
+        "p50_ms": percentile(latencies, 0.5) * 1e3,
+        "p99_ms": percentile(latencies, 0.99) * 1e3,
+        "errors": errors,
+        "upstream_per_request": (fake_hub.state.requests - upstream_before) / len(requests),
+        "upstream_kb_per_request": (fake_hub.state.bytes_sent - bytes_before) / len(requests) / 1024,
+        "rss_mb": rss_mb(),
+    }
+
+
+async def run(args: argparse.Namespace) -> None:
+    fake_hub = create_app(
+        num_models=args.models, latency_ms=args.hub_latency_ms, max_page_size=args.hub_max_page_size,
+    )
+    hub_client._client = hub_client.HubClient(
+        endpoint=FAKE_ENDPOINT, transport=httpx.ASGITransport(app=fake_hub),
+        per_host_concurrency=args.hub_concurrency,
+    )
+    # The benchmark measures the service layer, not the scheduler's rate limit
+    hub_client._client.scheduler.rate_per_second = 0
+    logging.getLogger().setLevel(logging.WARNING)  # Per-request httpx logging would dominate the timings
+
+    print(f"fake Hub: {args.models:,} models, {args.hub_latency_ms:g} ms latency, pages <= {args.hub_max_page_size}; "
+          f"concurrency {args.concurrency}, {args.n} requests per scenario; RSS at start {rss_mb():.0f} MB")
+    print(f"{'scenario':<16}{'req/s':>9}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}{'upstream/req':>14}"
+          f"{'upstream KB/req':>17}{'RSS MB':>9}")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api.local", timeout=120) as client:
+        for name in args.scenarios:
+            requests = scenario_requests(name, args.n, args)
+            if name == "details_refetch" and not hub_client._client.conditional.stats()["entries"]:
+                await run_scenario(client, fake_hub, requests, args.concurrency)  # First fetch, to have ETags
+            result = await run_scenario(client, fake_hub, requests, args.concurrency)
+            print(f"{name:<16}{result['throughput']:>9.1f}{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+                  f"{result['errors']:>8}{result['upstream_per_request']:>14.2f}"
+                  f"{result['upstream_kb_per_request']:>17.1f}{result['rss_mb']:>9.0f}")
+    await hub_client.close_hub_client()
+
+
+def main() -> None:
+    scenarios = ["search_shallow", "search_lean", "search_task", "search_deep", "details", "details_refetch"]
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", type=int, default=1_000_000)
+    parser.add_argument("--hub-latency-ms", type=float, default=20.0)
+    parser.add_argument("--hub-max-page-size", type=int, default=1000)
+    parser.add_argument("--hub-concurrency", type=int, default=256, help="HubClient per-host concurrency.")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("-n", type=int, default=200, help="Requests per scenario.")
+    parser.add_argument("--deep-from", type=int, default=200, help="First page of the deep-page scenario.")
+    parser.add_argument("--scenarios", nargs="+", choices=scenarios, default=scenarios)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
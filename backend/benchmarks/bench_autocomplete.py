@@ -0,0 +1,77 @@
+"""
+Benchmark: autocomplete prefix index build time, size and lookup latency.
+
+Builds the index over a synthetic catalogue (Zipf-like downloads, a few thousand authors, Hub-like tags) and replays
+keystroke prefixes (the first 2..8 characters of ids, names, authors and tags, weighted towards popular models).
+
+Run from the backend/ directory:
+    python -m benchmarks.bench_autocomplete
+    python -m benchmarks.bench_autocomplete --models 1000000 --lookups 200000 --budget-mb 256
+"""
+import argparse
+import random
+import time
+
+from app.services.autocomplete import build_prefix_index
+
+WORDS = ["llama", "mistral", "qwen", "phi", "gemma", "bert", "roberta", "whisper", "clip", "t5", "gpt2", "falcon",
+         "stable-diffusion", "sdxl", "deepseek", "coder", "instruct", "chat", "base", "mini", "large", "small", "tiny"]
+TAGS = ["transformers", "pytorch", "safetensors", "gguf", "text-generation", "text-classification", "en", "zh",
+        "license:apache-2.0", "license:mit", "conversational", "region:us", "diffusers", "onnx", "feature-extraction"]
+
+
+def synthetic_catalogue(n: int, rng: random.Random):
+    authors = [f"{rng.choice(WORDS)}-{rng.choice(['ai', 'labs', 'org', 'team'])}{i}" for i in range(max(1, n // 200))]
+    for i in range(n):
+        author = authors[int(rng.paretovariate(1.2)) % len(authors)]
+        name = f"{rng.choice(WORDS)}-{rng.choice(WORDS)}-{rng.randint(1, 70)}b-v{i}"
+        yield {
+            "id": f"{author}/{name}",
+            "author": author,
+            "downloads": int(1_000_000 / (i + 1) ** 0.8),
+            "likes": int(1_000 / (i + 1) ** 0.5),
+            "tags": rng.sample(TAGS, 5),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", type=int, default=200_000)
+    parser.add_argument("--lookups", type=int, default=50_000)
+    parser.add_argument("--budget-mb", type=float, default=128.0)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    records = list(synthetic_catalogue(args.models, rng))
+    start = time.perf_counter()
+    index = build_prefix_index(records, memory_budget_bytes=int(args.budget_mb * 1024 * 1024))
+    build_seconds = time.perf_counter() - start
+    stats = index.stats()
+
+    sources = [r["id"] for r in records[:1000]] + [r["id"].split("/", 1)[1] for r in records[:1000]] + TAGS
+    prefixes = []
+    for _ in range(args.lookups):
+        source = sources[int(rng.paretovariate(1.0)) % len(sources)] if rng.random() < 0.8 else rng.choice(sources)
+        prefixes.append(source[:rng.randint(2, 8)])
+
+    latencies = []
+    start = time.perf_counter()
+    for prefix in prefixes:
+        t0 = time.perf_counter()
+        index.lookup(prefix, limit=10)
+        latencies.append(time.perf_counter() - t0)
+    total = time.perf_counter() - start
+    latencies.sort()
+
+    def pct(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1e3
+
+    print(f"models={args.models:,} suggestions={stats['suggestions']:,} keys={stats['keys']:,} "
+          f"precomputed_prefixes={stats['precomputed_prefixes']:,}")
+    print(f"build: {build_seconds:.2f} s, estimated size {stats['memory_bytes'] / 2 ** 20:.1f} MiB (budget {args.budget_mb:.0f} MiB)")
+    print(f"lookups: {args.lookups / total:,.0f}/s  p50={pct(0.50):.3f} ms  p99={pct(0.99):.3f} ms  max={latencies[-1] * 1e3:.3f} ms")
+    print(f"example 'lla': {[s['id'] for s in index.lookup('lla', limit=5)]}")
+
+
+if __name__ == "__main__":
+    main()
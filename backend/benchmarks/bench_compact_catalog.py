@@ -0,0 +1,174 @@
+"""
+Benchmark: compact catalogue size, build time, page (sort/top-k) latency and cross-process sharing.
+
+Builds a compact catalogue file from a synthetic catalogue (Hub-like ids, Zipf-like downloads, a few thousand
+authors, 5-15 tags per model) and reports:
+- memory per model: the compact file vs. raw Hub listing dicts and HFModelSearchResultItem objects
+  (measured with tracemalloc on --sample models and scaled up)
+- page latency: first, deep and per-task pages for each sort order, vs. sorting --sample Pydantic objects
+  (and, with --with-mirror, the same pages from a SQLite catalogue mirror)
+- sharing: --workers processes map the file and read every page of it; their proportional set size (PSS) shows
+  the mapping counted once across them
+
+Run from the backend/ directory:
+    python -m benchmarks.bench_compact_catalog
+    python -m benchmarks.bench_compact_catalog --models 1000000 --workers 4 --with-mirror
+"""
+import argparse
+import heapq
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+
+from app.schemas.search_schemas import HFModelSearchResultItem
+from app.services.compact_catalog import SORT_COLUMNS, CompactCatalog, build_compact_catalog
+
+WORDS = ["llama", "mistral", "qwen", "phi", "gemma", "bert", "roberta", "whisper", "clip", "t5", "gpt2", "falcon",
+         "stable-diffusion", "sdxl", "deepseek", "coder", "instruct", "chat", "base", "mini", "large", "small", "tiny"]
+TASKS = ["text-generation", "text-classification", "image-classification", "automatic-speech-recognition",
+         "feature-extraction", "translation", "summarization", "text-to-image", "token-classification", None]
+TAGS = ["transformers", "pytorch", "safetensors", "gguf", "en", "zh", "fr", "license:apache-2.0", "license:mit",
+        "conversational", "region:us", "diffusers", "onnx", "endpoints_compatible", "autotrain_compatible",
+        "text-generation-inference", "arxiv:2307.09288", "base_model:meta-llama/Llama-2-7b-hf", "dataset:c4"]
+
+
+def synthetic_records(n: int, rng: random.Random) -> List[Dict]:
+    """Hub listing records (the fields a search result needs), in rowid order."""
+    authors = [f"{rng.choice(WORDS)}-{rng.choice(['ai', 'labs', 'org', 'team'])}{i}" for i in range(max(1, n // 200))]
+    records = []
+    for i in range(n):
+        author = authors[int(rng.paretovariate(1.2)) % len(authors)]
+        task = TASKS[int(rng.paretovariate(1.0)) % len(TASKS)]
+        records.append({
+            "id": f"{author}/{rng.choice(WORDS)}-{rng.choice(WORDS)}-{rng.randint(1, 70)}b-v{i}",
+            "author": author,
+            "downloads": int(1_000_000 / (rng.random() * n + 1) ** 0.8),
+            "likes": int(1_000 / (rng.random() * n + 1) ** 0.5),
+            "lastModified": f"20{rng.randint(20, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T"
+                            f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00.{rng.randint(0, 999):03d}Z",
+            "private": False,
+            "pipeline_tag": task,
+            "tags": rng.sample(TAGS, rng.randint(5, 15)) + ([task] if task else []),
+        })
+    return records
+
+
+def compact_rows(records: List[Dict]):
+    for r in records:
+        yield (r["id"], r["author"], r["pipeline_tag"], "\n" + "\n".join(r["tags"]) + "\n",
+               r["downloads"], r["likes"], r["lastModified"], "gguf" in r["tags"])
+
+
+def bytes_per_object(make, records: List[Dict]) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [make(r) for r in records]
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del objects
+    return size / len(records)
+
+
+def timed_ms(fn, repeat: int) -> float:
+    """Median of `repeat` runs, in milliseconds."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return sorted(times)[len(times) // 2] * 1e3
+
+
+def mapping_pss_mb(path: str) -> float:
+    """Proportional set size of this process's mapping of `path` (pages shared by N processes count 1/N each)."""
+    pss_kb, in_mapping = 0, False
+    with open("/proc/self/smaps") as f:
+        for line in f:
+            if "-" in line.split(" ", 1)[0]:  # Header line of the next mapping
+                in_mapping = line.rstrip().endswith(path)
+            elif in_mapping and line.startswith("Pss:"):
+                pss_kb += int(line.split()[1])
+    return pss_kb / 1024
+
+
+def touch_all(path: str, barrier, results) -> None:
+    catalog = CompactCatalog(path)
+    for sort_by in SORT_COLUMNS:
+        for offset in range(0, catalog.rows, 5000):
+            catalog.search_items(catalog.page(sort_by, offset, 50)[0], lean=True)
+    for start in range(0, catalog.rows, 10_000):  # Every row's strings and columns
+        catalog.search_items(list(range(start, min(catalog.rows, start + 10_000))), lean=True)
+    barrier.wait()  # All workers hold their mapping while PSS is measured
+    results.put(mapping_pss_mb(path))
+    barrier.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", type=int, default=200_000)
+    parser.add_argument("--sample", type=int, default=50_000, help="Models measured as dicts/Pydantic objects.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--with-mirror", action="store_true", help="Also time the same pages from a SQLite mirror.")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    records = synthetic_records(args.models, rng)
+    workdir = tempfile.mkdtemp(prefix="bench_compact_")
+    path = os.path.join(workdir, "catalog.compact")
+    started = time.perf_counter()
+    build_compact_catalog(compact_rows(records), path)
+    build_seconds = time.perf_counter() - started
+    catalog = CompactCatalog(path)
+
+    sample = records[:args.sample]
+    dict_bytes = bytes_per_object(lambda r: {**r, "tags": list(r["tags"])}, sample)
+    item_bytes = bytes_per_object(HFModelSearchResultItem.model_validate, sample)
+    print(f"models={args.models:,}  build {build_seconds:.1f} s")
+    print(f"{'representation':<32}{'bytes/model':>12}{'total MB':>11}")
+    for name, per_model in [("compact file (mmap, shared)", catalog.file_bytes / args.models),
+                            ("raw listing dicts", dict_bytes), ("HFModelSearchResultItem", item_bytes)]:
+        print(f"{name:<32}{per_model:>12.0f}{per_model * args.models / 2 ** 20:>11.0f}")
+
+    deep = min(args.models - 20, 100_000)
+    print(f"\n{'page (20 items)':<40}{'compact ms':>12}")
+    for sort_by in SORT_COLUMNS:
+        for label, offset, task in [("first", 0, None), (f"offset {deep:,}", deep, None), ("task, first", 0, "translation")]:
+            ms = timed_ms(lambda: catalog.search_items(catalog.page(sort_by, offset, 20, task)[0]), 50)
+            print(f"{sort_by + ', ' + label:<40}{ms:>12.3f}")
+
+    items = [HFModelSearchResultItem.model_validate(r) for r in sample]
+    print(f"\nsorting {len(items):,} Pydantic objects instead (grows with the catalogue):")
+    print(f"  sorted() by downloads      {timed_ms(lambda: sorted(items, key=lambda m: m.downloads, reverse=True)[:20], 5):8.2f} ms")
+    print(f"  heapq.nlargest(20)         {timed_ms(lambda: heapq.nlargest(20, items, key=lambda m: m.downloads), 5):8.2f} ms")
+    del items
+
+    if args.with_mirror:
+        from app.services.catalog_mirror import CatalogMirror
+
+        mirror = CatalogMirror(os.path.join(workdir, "mirror.db"))
+        started = time.perf_counter()
+        mirror.sync(({**r, "siblings": []} for r in records), incremental=False)
+        print(f"\nSQLite mirror (synced in {time.perf_counter() - started:.0f} s), same pages, lean:")
+        for sort_by in SORT_COLUMNS:
+            for label, offset, task in [("first", 0, None), (f"offset {deep:,}", deep, None), ("task, first", 0, "translation")]:
+                ms = timed_ms(lambda: mirror.search(sort_by=sort_by, offset=offset, limit=20, pipeline_tags=[task] if task else None, lean=True), 5)
+                print(f"  {sort_by + ', ' + label:<38}{ms:>12.3f}")
+
+    ctx = multiprocessing.get_context("fork")
+    barrier, results = ctx.Barrier(args.workers), ctx.Queue()
+    workers = [ctx.Process(target=touch_all, args=(path, barrier, results)) for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    pss = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    print(f"\n{args.workers} workers mapping the whole {catalog.file_bytes / 2 ** 20:.0f} MB file: "
+          f"PSS of the mapping per worker {', '.join(f'{p:.0f}' for p in pss)} MB")
+
+
+if __name__ == "__main__":
+    main()
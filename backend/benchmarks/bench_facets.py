@@ -0,0 +1,107 @@
+"""
+Benchmark: facet index build time, size and facet-count latency.
+
+Builds the index over a synthetic catalogue (Zipf-like task, library, license and language distributions, GGUF
+quantizations on the gguf models) and times facet counts for:
+- unfiltered      every facet over the whole catalogue (the index's own value sizes)
+- base            every facet over a random base set of --base-fraction of the rows (as a text search would give)
+- base+filters    the same, with one or two facet filters selected (disjunctive counts per facet)
+Counts are checked against a brute-force count over the rows for a few queries.
+
+Run from the backend/ directory:
+    python -m benchmarks.bench_facets
+    python -m benchmarks.bench_facets --models 1000000 --queries 200 --base-fraction 0.05
+"""
+import argparse
+import random
+import time
+from typing import List, Tuple
+
+from app.services.facets import FACETS, bitmap_from_rowids, build_facet_index, row_facet_values
+
+TASKS = ["text-generation", "text-classification", "image-classification", "automatic-speech-recognition",
+         "feature-extraction", "translation", "summarization", "text-to-image", "token-classification",
+         "sentence-similarity", "fill-mask", "question-answering"]
+LIBRARIES = ["transformers", "gguf", "diffusers", "sentence-transformers", "timm", "peft", "mlx", "onnx", "keras"]
+LICENSES = ["apache-2.0", "mit", "other", "cc-by-4.0", "llama3", "gemma", "openrail", "cc-by-nc-4.0"]
+LANGUAGES = ["en", "zh", "fr", "de", "es", "ja", "ru", "ko", "ar", "pt", "it", "hi"]
+QUANTS = ["Q4_K_M", "Q5_K_M", "Q8_0", "Q4_0", "Q6_K", "IQ4_XS", "F16", "Q3_K_L", "Q2_K"]
+
+
+def zipf_choice(rng: random.Random, values: List[str]) -> str:
+    return values[int(rng.paretovariate(1.0)) % len(values)]
+
+
+def synthetic_rows(n: int, rng: random.Random) -> List[Tuple[int, str, str, str, str]]:
+    """(rowid, pipeline_tag, library_name, tags, siblings) rows as CatalogMirror.iter_facet_rows yields them."""
+    rows = []
+    for rowid in range(1, n + 1):
+        library = zipf_choice(rng, LIBRARIES)
+        tags = [library, f"license:{zipf_choice(rng, LICENSES)}"]
+        tags += {zipf_choice(rng, LANGUAGES) for _ in range(rng.randint(0, 2))}
+        siblings = ["README.md", "config.json"]
+        if library == "gguf":
+            siblings += [f"model-{quant}.gguf" for quant in rng.sample(QUANTS, rng.randint(1, 4))]
+        rows.append((rowid, zipf_choice(rng, TASKS), library, "\n" + "\n".join(tags) + "\n",
+                     "\n" + "\n".join(siblings) + "\n"))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=100, help="Count queries per scenario.")
+    parser.add_argument("--base-fraction", type=float, default=0.05, help="Share of rows in each base set.")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    rows = synthetic_rows(args.models, rng)
+    start = time.perf_counter()
+    index = build_facet_index(rows)
+    build_seconds = time.perf_counter() - start
+    stats = index.stats()
+    print(f"models={args.models:,} values={stats['values']} bitmaps={stats['bitmaps']}")
+    print(f"build: {build_seconds:.2f} s, estimated size {stats['memory_bytes'] / 2 ** 20:.1f} MiB")
+
+    base_size = max(1, int(args.models * args.base_fraction))
+    bases = [sorted(rng.sample(range(1, args.models + 1), base_size)) for _ in range(min(args.queries, 10))]
+    filter_choices = [{"license": ["mit"]}, {"library": ["gguf"], "quantization": ["Q4_K_M"]},
+                      {"language": ["en", "zh"]}, {"task": ["text-generation"], "license": ["apache-2.0"]}]
+    scenarios = {
+        "unfiltered": lambda i: (None, {}),
+        "base": lambda i: (bases[i % len(bases)], {}),
+        "base+filters": lambda i: (bases[i % len(bases)], filter_choices[i % len(filter_choices)]),
+    }
+    for name, make_query in scenarios.items():
+        latencies = []
+        for i in range(args.queries):
+            base_rowids, facet_filters = make_query(i)
+            t0 = time.perf_counter()
+            # Converting the base rowids is part of every real request (CatalogMirror.matching_rowids -> bitmap)
+            base = bitmap_from_rowids(base_rowids, index.size_bits) if base_rowids is not None else None
+            index.counts(base, facet_filters, FACETS, args.limit)
+            latencies.append(time.perf_counter() - t0)
+        latencies.sort()
+        print(f"{name:<14} p50={latencies[len(latencies) // 2] * 1e3:8.2f} ms  "
+              f"p99={latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] * 1e3:8.2f} ms")
+
+    # Brute-force check: same counts as filtering the rows directly
+    values_by_row = {row[0]: row_facet_values(*row[1:]) for row in rows}
+    for base_rowids, facet_filters in [(bases[0], filter_choices[1]), (bases[1], filter_choices[2])]:
+        counts = index.counts(bitmap_from_rowids(base_rowids, index.size_bits), facet_filters, FACETS, 1000)
+        for facet, entries in counts.items():
+            for entry in entries:
+                expected = sum(
+                    1 for rowid in base_rowids
+                    if entry["value"] in values_by_row[rowid][facet] and all(
+                        set(values) & set(values_by_row[rowid][other])
+                        for other, values in facet_filters.items() if other != facet
+                    )
+                )
+                assert entry["count"] == expected, (facet, entry, expected)
+    print("counts match a brute-force count")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark: Hub call scheduling under upstream rate limiting, against the local fake Hub.
+
+The fake Hub allows --hub-rate requests/s per credential (bursts of --hub-burst) and answers 429 with Retry-After
+beyond that. A HubClient with its own scheduler (--rate/--burst, set above the Hub's limit to provoke 429s) then
+sends a mixed load at once: --interactive search pages, --details model infos and --background listing pages.
+Reports, per priority class: completed/failed calls and p50/p99 latency, plus 429s seen upstream and the
+scheduler's queue and shed counters. Finally checks that an expired cache entry is served when reloading it
+gets throttled (stale-if-error).
+
+Run from the backend/ directory:
+    python -m benchmarks.bench_hub_scheduler
+    python -m benchmarks.bench_hub_scheduler --hub-rate 5 --rate 50 --interactive 40 --background 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+from app.services.cache import AsyncResultCache
+from app.services.hub_client import HubClient, HubRateLimitedError, is_upstream_unavailable
+from app.services.hub_scheduler import HubScheduler, Priority, use_priority
+from benchmarks.fake_hub import create_app
+
+FAKE_ENDPOINT = "http://fake-hub.local"
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run(args: argparse.Namespace) -> None:
+    fake_hub = create_app(num_models=10_000, rate=args.hub_rate, burst=args.hub_burst)
+    scheduler = HubScheduler(
+        rate_per_second=args.rate,
+        burst=args.burst,
+        max_wait_seconds={Priority.INTERACTIVE: 10.0, Priority.DETAIL: 20.0, Priority.BACKGROUND: 60.0},
+        default_pause_seconds=1.0,
+    )
+    client = HubClient(
+        endpoint=FAKE_ENDPOINT, scheduler=scheduler, transport=httpx.ASGITransport(app=fake_hub),
+        max_retries=args.retries, backoff_base_seconds=0.05,
+    )
+    latencies: Dict[Priority, List[float]] = {p: [] for p in Priority}
+    failures: Dict[Priority, int] = {p: 0 for p in Priority}
+
+    async def timed(priority: Priority, call) -> None:
+        started = time.perf_counter()
+        try:
+            await call()
+        except Exception:
+            failures[priority] += 1
+            return
+        latencies[priority].append(time.perf_counter() - started)
+
+    async def background_page(i: int) -> None:
+        with use_priority(Priority.BACKGROUND):
+            await client.list_models_page({"limit": 100, "cursor": str(i * 100)})
+
+    calls = (
+        [timed(Priority.BACKGROUND, lambda i=i: background_page(i)) for i in range(args.background)]
+        + [timed(Priority.INTERACTIVE, lambda i=i: client.list_models_page({"limit": 20, "search": f"model-{i}"}))
+           for i in range(args.interactive)]
+        + [timed(Priority.DETAIL, lambda i=i: client.model_info(f"org{i % 997}/model-{i}", files_metadata=True))
+           for i in range(args.details)]
+    )
+    started = time.perf_counter()
+    await asyncio.gather(*calls)
+    elapsed = time.perf_counter() - started
+
+    limiter = fake_hub.state.limiter
+    print(f"fake Hub: {args.hub_rate}/s burst {args.hub_burst}; scheduler: {args.rate}/s burst {args.burst}")
+    print(f"{sum(len(v) for v in latencies.values())} calls in {elapsed:.2f}s, "
+          f"{limiter.allowed} upstream requests served, {limiter.rejected} answered 429")
+    bucket = scheduler.stats()["credentials"].get("anonymous", {})
+    for priority in Priority:
+        values = latencies[priority]
+        counters = bucket.get("priorities", {}).get(priority.name.lower(), {})
+        print(f"  {priority.name.lower():<12} ok={len(values):<4} failed={failures[priority]:<4} "
+              f"p50={percentile(values, 0.5) * 1e3:8.1f} ms  p99={percentile(values, 0.99) * 1e3:8.1f} ms  "
+              f"mean={statistics.fmean(values) * 1e3 if values else 0.0:8.1f} ms  shed={counters.get('shed', 0)}")
+    print(f"  throttled responses seen by the scheduler: {bucket.get('throttled_responses', 0)}")
+
+    # Stale-if-error: the entry expires immediately, then the Hub throttles the reload.
+    cache = AsyncResultCache("bench", ttl_seconds=0.0, stale_if_error_seconds=60.0, serve_stale_on=is_upstream_unavailable)
+    await cache.get_or_load("page", lambda: client.list_models_page({"limit": 5}))
+    scheduler.throttled("anonymous", 30.0)  # Upstream is now refusing for 30s; a 0s max wait sheds immediately
+    scheduler.max_wait_seconds[Priority.INTERACTIVE] = 0.0
+    try:
+        items, _ = await cache.get_or_load("page", lambda: client.list_models_page({"limit": 5}))
+        print(f"stale-if-error: served {len(items)} cached items while throttled "
+              f"(stale_on_error={cache.stats()['stale_on_error']})")
+    except HubRateLimitedError as e:
+        print(f"stale-if-error: FAILED, got {e}")
+    await client.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hub-rate", type=float, default=20.0, help="Fake Hub limit, requests/s.")
+    parser.add_argument("--hub-burst", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=25.0, help="Scheduler rate, requests/s.")
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument("--interactive", type=int, default=30)
+    parser.add_argument("--details", type=int, default=30)
+    parser.add_argument("--background", type=int, default=100)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Micro-benchmark: per-query cost of search query parsing.
+
+Compares the precompiled single-pass parser (app.services.query_parser) against the previous approach,
+which re-sorted TASK_KEYWORD_TO_PIPELINE_TAG and ran re.search/re.sub per keyword on every query.
+
+Run from the backend/ directory:
+    python -m benchmarks.bench_query_parser            # 1,000,000 queries
+    python -m benchmarks.bench_query_parser -n 200000
+"""
+import argparse
+import itertools
+import re
+import time
+
+from app.services.query_parser import TASK_KEYWORD_TO_PIPELINE_TAG, parse_query
+
+QUERIES = [
+    "llama",
+    "llama gguf",
+    "mistral 7b instruct text generation",
+    "bert fill mask",
+    "whisper automatic speech recognition",
+    "stable diffusion text to image",
+    "phi lib:transformers quant:Q4_K_M author:TheBloke",
+    "sentence-transformers all-minilm feature extraction",
+    "clip zero shot image classification",
+    "qwen2.5 coder",
+]
+
+
+def legacy_parse(query: str):
+    """The per-query keyword loop search_models_on_hub_paginated used before the precompiled parser."""
+    processed_query = query
+    derived_pipeline_tag = None
+    query_lower = query.lower()
+    sorted_task_keywords = sorted(TASK_KEYWORD_TO_PIPELINE_TAG.keys(), key=len, reverse=True)
+    for task_keyword in sorted_task_keywords:
+        if re.search(r"\b" + re.escape(task_keyword) + r"\b", query_lower):
+            derived_pipeline_tag = TASK_KEYWORD_TO_PIPELINE_TAG[task_keyword]
+            processed_query = re.sub(r"\b" + re.escape(task_keyword) + r"\b", "", processed_query, flags=re.IGNORECASE).strip() or None
+            break
+    return processed_query, derived_pipeline_tag
+
+
+def bench(name: str, fn, n: int) -> None:
+    queries = itertools.islice(itertools.cycle(QUERIES), n)
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<22} {n:>10,} queries  {elapsed:8.2f} s  {elapsed / n * 1e6:8.2f} us/query")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", type=int, default=1_000_000, help="Number of queries to parse (default: 1,000,000).")
+    args = parser.parse_args()
+
+    bench("precompiled parser", parse_query, args.n)
+    bench("legacy keyword loop", legacy_parse, args.n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: per-page CPU time and payload size of the full vs lean search paths.
+
+Both paths start from synthetic Hub listing records and end with the JSON bytes of the API response:
+- full: `full=True` records -> ModelInfo -> HFModelSearchResultItem.model_validate -> response model -> JSON
+- lean: `expand=[...]` records -> lean_search_item dicts -> orjson
+
+Run from the backend/ directory:
+    python -m benchmarks.bench_search_serialization
+    python -m benchmarks.bench_search_serialization --page-size 50 --siblings 200 --pages 2000
+"""
+import argparse
+import json
+import random
+import time
+
+import orjson
+from huggingface_hub.hf_api import ModelInfo
+
+from app.schemas.search_schemas import HFModelSearchResponsePaginated, HFModelSearchResultItem
+from app.services.hf_service import LEAN_SEARCH_EXPAND, lean_search_item
+
+
+def synthetic_full_record(i: int, n_siblings: int) -> dict:
+    """Roughly the shape of a /api/models?full=true record."""
+    model_id = f"org{i % 500}/model-{i}"
+    return {
+        "_id": f"{i:024x}",
+        "id": model_id,
+        "modelId": model_id,
+        "author": f"org{i % 500}",
+        "sha": f"{random.getrandbits(160):040x}",
+        "lastModified": "2024-05-01T12:34:56.000Z",
+        "createdAt": "2023-01-01T00:00:00.000Z",
+        "private": False,
+        "disabled": False,
+        "gated": False,
+        "downloads": random.randint(0, 10_000_000),
+        "likes": random.randint(0, 10_000),
+        "library_name": "transformers",
+        "pipeline_tag": "text-generation",
+        "tags": ["transformers", "safetensors", "llama", "text-generation", "conversational", "en", "license:apache-2.0", "region:us"],
+        "siblings": [{"rfilename": f"model-{j:05d}-of-{n_siblings:05d}.safetensors"} for j in range(n_siblings)]
+                    + [{"rfilename": "README.md"}, {"rfilename": "config.json"}, {"rfilename": "model.Q4_K_M.gguf"}],
+    }
+
+
+def lean_projection_of(record: dict) -> dict:
+    """What the Hub returns for the same model when only LEAN_SEARCH_EXPAND fields are requested."""
+    fields = set(LEAN_SEARCH_EXPAND) | {"id"}
+    return {k: v for k, v in record.items() if k in fields}
+
+
+def full_path(records: list, page_size: int) -> bytes:
+    results = []
+    for raw_model in records:
+        model = ModelInfo(**raw_model)
+        has_gguf_file = any(s.rfilename.lower().endswith(".gguf") for s in model.siblings or [])
+        results.append(HFModelSearchResultItem.model_validate({
+            "id": model.id, "author": model.author, "last_modified": model.lastModified,
+            "likes": model.likes or 0, "private": model.private or False,
+            "downloads": model.downloads or 0, "tags": model.tags or [],
+            "pipeline_tag": model.pipeline_tag, "has_gguf": has_gguf_file,
+        }))
+    response = HFModelSearchResponsePaginated(
+        query="llama", sort_by="downloads", page=1, page_size=page_size, results=results, has_more=True,
+    )
+    return response.model_dump_json(by_alias=True).encode("utf-8")
+
+
+def lean_path(records: list, page_size: int) -> bytes:
+    return orjson.dumps({
+        "query": "llama", "sort_by": "downloads", "page": 1, "page_size": page_size,
+        "results": [lean_search_item(r) for r in records], "has_more": True,
+        "total_results_available": None, "next_cursor": None,
+    })
+
+
+def time_per_page(fn, records: list, page_size: int, pages: int) -> float:
+    start = time.process_time()
+    for _ in range(pages):
+        fn(records, page_size)
+    return (time.process_time() - start) / pages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--siblings", type=int, default=30, help="Sibling files per model in the synthetic records.")
+    parser.add_argument("--pages", type=int, default=1000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    full_records = [synthetic_full_record(i, args.siblings) for i in range(args.page_size)]
+    lean_records = [lean_projection_of(r) for r in full_records]
+
+    upstream_full = len(json.dumps(full_records).encode("utf-8"))
+    upstream_lean = len(json.dumps(lean_records).encode("utf-8"))
+    full_cpu = time_per_page(full_path, full_records, args.page_size, args.pages)
+    lean_cpu = time_per_page(lean_path, lean_records, args.page_size, args.pages)
+    full_body = full_path(full_records, args.page_size)
+    lean_body = lean_path(lean_records, args.page_size)
+
+    print(f"page_size={args.page_size} siblings/model={args.siblings} pages={args.pages}")
+    print(f"{'':<8} {'CPU/page':>12} {'upstream bytes':>16} {'response bytes':>16}")
+    print(f"{'full':<8} {full_cpu * 1e3:>9.3f} ms {upstream_full:>16,} {len(full_body):>16,}")
+    print(f"{'lean':<8} {lean_cpu * 1e3:>9.3f} ms {upstream_lean:>16,} {len(lean_body):>16,}")
+    print(f"lean CPU speedup: {full_cpu / lean_cpu:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark: Hub traffic and cache-hit latency of N API workers with per-process vs shared result caches.
+
+Starts --workers processes, each booting the FastAPI `app` with HF_CACHE_BACKEND set to the backend under test
+and its Hub client pointed at its own benchmarks.fake_hub (--hub-latency-ms per upstream response). All workers
+then request the same --models model details and search pages at the same time (as a load balancer spreading
+one popular set of requests over the workers would), and again once everything is cached. Reports per backend:
+- upstream requests, summed over the workers' fake Hubs (per-process caches: each worker loads every entry;
+  shared caches: one worker loads it while the others wait for the result)
+- cold pass wall time, and p50/p99 latency of the warm pass (every request a cache hit)
+- serialized bytes written to the shared store per entry
+
+Backends: memory and sqlite always; redis too with --redis-url (any Redis-protocol server, e.g. a local
+`redis-server` or `valkey-server`; the benchmark's keys use their own prefix and are deleted afterwards).
+
+Run from the backend/ directory:
+    python -m benchmarks.bench_shared_cache
+    python -m benchmarks.bench_shared_cache --workers 8 --models 200 --redis-url redis://localhost:6379/15
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+FAKE_ENDPOINT = "http://fake-hub.local"
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def worker(env: Dict[str, str], args: argparse.Namespace, barrier, results) -> None:
+    # A fresh (spawned) interpreter: config is read when the app modules are imported, after this
+    os.environ.update(env)
+    import logging
+
+    import httpx
+
+    from app.main import app
+    from app.services import hf_service, hub_client
+    from benchmarks.fake_hub import create_app
+
+    logging.getLogger().setLevel(logging.WARNING)
+    paths = [f"/api/models/org{i % 997}/model-{i}" for i in range(args.models)]
+    paths += [f"/api/search/models?query=model-{i}&page_size=20" for i in range(args.models // 4)]
+
+    async def run() -> Dict:
+        fake_hub = create_app(num_models=max(10_000, args.models), latency_ms=args.hub_latency_ms, max_page_size=1000)
+        hub_client._client = hub_client.HubClient(endpoint=FAKE_ENDPOINT, transport=httpx.ASGITransport(app=fake_hub))
+        hub_client._client.scheduler.rate_per_second = 0
+        semaphore = asyncio.Semaphore(args.concurrency)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api.local", timeout=120) as client:
+
+            async def one(path: str, latencies: List[float]) -> None:
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await client.get(path)
+                    latencies.append(time.perf_counter() - started)
+                    response.raise_for_status()
+
+            await asyncio.to_thread(barrier.wait)
+            cold: List[float] = []
+            started = time.perf_counter()
+            await asyncio.gather(*(one(path, cold) for path in paths))
+            cold_seconds = time.perf_counter() - started
+            await asyncio.to_thread(barrier.wait)
+            warm: List[float] = []
+            await asyncio.gather(*(one(path, warm) for path in paths))
+        stats = hf_service.get_cache_stats()
+        await hub_client.close_hub_client()
+        return {
+            "upstream": fake_hub.state.requests,
+            "cold_seconds": cold_seconds,
+            "warm": warm,
+            "bytes_written": sum(s.get("bytes_written", 0) for s in stats.values()),
+            "entries_written": sum(s["misses"] + s["refreshes"] - s["loaded_elsewhere"] for s in stats.values()),
+            "loaded_elsewhere": sum(s["loaded_elsewhere"] for s in stats.values()),
+        }
+
+    results.put(asyncio.run(run()))
+
+
+def run_backend(name: str, env: Dict[str, str], args: argparse.Namespace) -> None:
+    ctx = multiprocessing.get_context("spawn")
+    barrier, results = ctx.Barrier(args.workers), ctx.Queue()
+    env = {"HF_PREFETCH_ENABLED": "0", "HF_AUTOCOMPLETE_ENABLED": "0", "HF_MIRROR_DB_PATH": "",
+           "HF_GGUF_HEADER_PARSING_ENABLED": "0", "HF_CACHE_BACKEND": name, **env}
+    processes = [ctx.Process(target=worker, args=(env, args, barrier, results)) for _ in range(args.workers)]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    warm = [latency for outcome in outcomes for latency in outcome["warm"]]
+    written = sum(outcome["entries_written"] for outcome in outcomes)
+    bytes_per_entry = sum(outcome["bytes_written"] for outcome in outcomes) / written if written else 0
+    print(f"{name:<8}{sum(o['upstream'] for o in outcomes):>10}{max(o['cold_seconds'] for o in outcomes):>10.2f}"
+          f"{percentile(warm, 0.5) * 1e3:>10.2f}{percentile(warm, 0.99) * 1e3:>10.2f}"
+          f"{sum(o['loaded_elsewhere'] for o in outcomes):>17}{bytes_per_entry:>13.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--models", type=int, default=100, help="Distinct model details requested by every worker.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent requests per worker.")
+    parser.add_argument("--hub-latency-ms", type=float, default=50.0)
+    parser.add_argument("--redis-url", help="Also benchmark HF_CACHE_BACKEND=redis against this server.")
+    args = parser.parse_args()
+
+    print(f"{args.workers} workers, each: {args.models} details + {args.models // 4} searches "
+          f"at concurrency {args.concurrency}; fake Hub latency {args.hub_latency_ms:g} ms")
+    print(f"{'backend':<8}{'upstream':>10}{'cold s':>10}{'warm p50':>10}{'warm p99':>10}"
+          f"{'loaded elsewhere':>17}{'bytes/entry':>13}")
+    prefix = f"bench-shared-cache:{os.getpid()}:"
+    with tempfile.TemporaryDirectory(prefix="bench_shared_cache_") as workdir:
+        run_backend("memory", {}, args)
+        run_backend("sqlite", {"HF_CACHE_SQLITE_PATH": os.path.join(workdir, "cache.db")}, args)
+    if args.redis_url:
+        run_backend("redis", {"HF_CACHE_REDIS_URL": args.redis_url, "HF_CACHE_KEY_PREFIX": prefix}, args)
+        import redis
+
+        client = redis.Redis.from_url(args.redis_url)
+        for key in client.scan_iter(match=f"{prefix}*", count=1000):
+            client.unlink(key)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Local stand-in for the Hugging Face Hub API, for benchmarks and manual testing without huggingface.co.
+
+Serves a synthetic, deterministic catalogue (model i is computed from i, so even 1M models take no memory):
+- GET /api/models                     listing with `limit` (capped at max_page_size), `cursor` (Link: rel="next"),
+                                      search/author/pipeline_tag/filter (library) filters
+- GET /api/models/{author}/{name}     model info with siblings
+- GET /{author}/{name}/resolve/{revision}/{filename}   README.md, and a small GGUF header (Range supported)
+                                                      for .gguf files; other files 404
+
+Model info and README.md responses carry an ETag and answer a matching If-None-Match with 304, like the Hub.
+
+Rate limiting works like the Hub's: a token bucket per credential (Authorization header, or anonymous), and
+HTTP 429 with Retry-After once it's empty. Every response is delayed by `latency_ms` to stand in for the network.
+Use `create_app()` in-process through `httpx.ASGITransport`, or run it:
+    python -m benchmarks.fake_hub --port 9000 --rate 10 --burst 20 --latency-ms 50
+and point the backend at it with HF_ENDPOINT=http://127.0.0.1:9000.
+"""
+import argparse
+import asyncio
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import JSONResponse, Response
+
+from app.services.gguf_parser import write_gguf_header
+
+TASKS = ["text-generation", "text-classification", "image-classification", "automatic-speech-recognition",
+         "feature-extraction", "translation", "summarization", "text-to-image"]
+LIBRARIES = ["transformers", "gguf", "diffusers", "sentence-transformers", "timm", "peft"]
+
+
+class FakeRateLimiter:
+    """Token bucket per credential; `rate` <= 0 disables limiting."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # credential -> (tokens, updated)
+        self.allowed = 0
+        self.rejected = 0
+
+    def take(self, credential: str) -> Optional[float]:
+        """Takes a token. Returns None if allowed, otherwise the seconds until the next token."""
+        if self.rate <= 0:
+            self.allowed += 1
+            return None
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(credential, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+        if tokens >= 1.0:
+            self._buckets[credential] = (tokens - 1.0, now)
+            self.allowed += 1
+            return None
+        self._buckets[credential] = (tokens, now)
+        self.rejected += 1
+        return (1.0 - tokens) / self.rate
+
+
+def synthetic_model(i: int) -> Dict:
+    """Listing record for model i; downloads decrease with i, so the catalogue is already sorted by downloads."""
+    author = f"org{i % 997}"
+    library = LIBRARIES[i % len(LIBRARIES)]
+    siblings = [{"rfilename": "README.md"}, {"rfilename": "config.json"}]
+    if library == "gguf":
+        siblings.append({"rfilename": f"model-{i}-Q4_K_M.gguf"})
+    else:
+        siblings.append({"rfilename": "model.safetensors"})
+    return {
+        "_id": f"{i:024x}",
+        "id": f"{author}/model-{i}",
+        "modelId": f"{author}/model-{i}",
+        "author": author,
+        "downloads": max(0, 10_000_000 - i * 7),
+        "likes": max(0, 100_000 - i),
+        "lastModified": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}T12:00:00.000Z",
+        "private": False,
+        "pipeline_tag": TASKS[i % len(TASKS)],
+        "library_name": library,
+        "tags": [library, TASKS[i % len(TASKS)], f"license:{'apache-2.0' if i % 3 else 'mit'}"],
+        "siblings": siblings,
+    }
+
+
+# Served for every .gguf file: metadata and tensor infos only, as if the tensor data had been cut off
+GGUF_HEADER = write_gguf_header(
+    {"general.architecture": "llama", "general.file_type": 15, "llama.context_length": 4096},
+    {"token_embd.weight": ((4096, 32000), 12), "output.weight": ((4096, 32000), 14)},
+)
+
+
+def _byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """[start, end) of a `Range: bytes=a-b` header, clamped to the file; None without one."""
+    if not header or not header.startswith("bytes="):
+        return None
+    first, _, last = header[len("bytes="):].partition("-")
+    start = int(first)
+    end = min(size, int(last) + 1) if last else size
+    return start, end
+
+
+def create_app(
+    num_models: int = 100_000, rate: float = 0.0, burst: int = 10, latency_ms: float = 0.0, max_page_size: int = 1000
+) -> FastAPI:
+    app = FastAPI(title="Fake Hugging Face Hub")
+    limiter = FakeRateLimiter(rate, burst)
+    app.state.limiter = limiter
+    app.state.requests = 0
+    app.state.not_modified = 0
+    app.state.bytes_sent = 0
+
+    @app.middleware("http")
+    async def rate_limit(request: Request, call_next):
+        app.state.requests += 1
+        if latency_ms > 0:
+            await asyncio.sleep(latency_ms / 1000)
+        retry_after = limiter.take(request.headers.get("authorization") or "anonymous")
+        if retry_after is not None:
+            return Response(status_code=429, headers={"Retry-After": str(math.ceil(retry_after)),
+                                                      "X-Error-Message": "Rate limit exceeded"})
+        response = await call_next(request)
+        app.state.bytes_sent += int(response.headers.get("content-length", 0))
+        return response
+
+    def conditional(request: Request, etag: str, make_response) -> Response:
+        """304 if the client already has this version, otherwise the full response with its ETag."""
+        if request.headers.get("if-none-match") == etag:
+            app.state.not_modified += 1
+            return Response(status_code=304, headers={"ETag": etag})
+        response = make_response()
+        response.headers["ETag"] = etag
+        return response
+
+    def matches(i: int, search: Optional[str], author: Optional[str], task: int, library: int) -> bool:
+        if task >= 0 and i % len(TASKS) != task:
+            return False
+        if library >= 0 and i % len(LIBRARIES) != library:
+            return False
+        if author and f"org{i % 997}" != author:
+            return False
+        return not search or search in f"org{i % 997}/model-{i}"
+
+    @app.get("/api/models")
+    async def list_models(request: Request, limit: int = 20, cursor: Optional[str] = None,
+                          search: Optional[str] = None, author: Optional[str] = None,
+                          pipeline_tag: Optional[str] = None, filter: Optional[List[str]] = Query(None)):
+        start = int(cursor) if cursor else 0
+        limit = min(limit, max_page_size)
+        task = TASKS.index(pipeline_tag) if pipeline_tag in TASKS else (-1 if pipeline_tag is None else len(TASKS))
+        library = -1
+        for name in filter or ():
+            library = LIBRARIES.index(name) if name in LIBRARIES else len(LIBRARIES)  # Unknown: matches nothing
+        search = search.lower() if search else None
+        items = []
+        i = start
+        while i < num_models and len(items) < limit:
+            if matches(i, search, author, task, library):
+                items.append(synthetic_model(i))
+            i += 1
+        headers = {}
+        if i < num_models:
+            next_url = request.url.include_query_params(cursor=str(i))
+            headers["Link"] = f'<{next_url}>; rel="next"'
+        return JSONResponse(items, headers=headers)
+
+    @app.get("/api/models/{author}/{name}")
+    async def model_info(request: Request, author: str, name: str):
+        try:
+            i = int(name.rsplit("-", 1)[1])
+        except (IndexError, ValueError):
+            i = -1
+        if not 0 <= i < num_models or f"org{i % 997}" != author:
+            return Response(status_code=404, headers={"X-Error-Message": "Repository not found"})
+        return conditional(request, f'W/"{i:040x}"', lambda: JSONResponse(
+            {**synthetic_model(i), "sha": f"{i:040x}", "cardData": {"license": "apache-2.0"}}
+        ))
+
+    @app.get("/{author}/{name}/resolve/{revision}/{filename:path}")
+    async def resolve(request: Request, author: str, name: str, revision: str, filename: str):
+        if filename.endswith(".gguf"):
+            byte_range = _byte_range(request.headers.get("range"), len(GGUF_HEADER))
+            if byte_range is None:
+                return Response(GGUF_HEADER, media_type="application/octet-stream")
+            start, end = byte_range
+            return Response(GGUF_HEADER[start:end], status_code=206, media_type="application/octet-stream",
+                            headers={"Content-Range": f"bytes {start}-{end - 1}/{len(GGUF_HEADER)}"})
+        if filename != "README.md":
+            return Response(status_code=404, headers={"X-Error-Message": "Entry not found"})
+        return conditional(request, f'"readme-{author}-{name}"', lambda: Response(
+            f"# {author}/{name}\n\nSynthetic model card.\n" + "Lorem ipsum. " * 200, media_type="text/markdown"
+        ))
+
+    @app.get("/_fake/stats")
+    async def stats():
+        return {"requests": app.state.requests, "allowed": limiter.allowed, "rate_limited": limiter.rejected,
+                "not_modified": app.state.not_modified, "bytes_sent": app.state.bytes_sent}
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--models", type=int, default=100_000)
+    parser.add_argument("--rate", type=float, default=0.0, help="Requests per second per credential (0: unlimited).")
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every response.")
+    parser.add_argument("--max-page-size", type=int, default=1000, help="Largest `limit` a listing page honours.")
+    args = parser.parse_args()
+    app = create_app(args.models, args.rate, args.burst, args.latency_ms, args.max_page_size)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import asyncio
+import os
+
+import pytest
+
+from app.core import file_lock
+from app.services import catalog_mirror, hf_service
+from app.services.catalog_mirror import CatalogMirror, iter_catalogue_fixture
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "catalogue.jsonl")
+
+
+def catalogue():
+    return list(iter_catalogue_fixture(FIXTURE))
+
+
+def search_ids(mirror: CatalogMirror, **kwargs):
+    results, _ = mirror.search(limit=100, lean=True, **kwargs)
+    return [item["id"] for item in results]
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    mirror = CatalogMirror(str(tmp_path / "mirror.db"))
+    mirror.sync(iter_catalogue_fixture(FIXTURE), incremental=False)
+    return mirror
+
+
+def test_full_sync_mirrors_every_record(mirror):
+    records = catalogue()
+    assert mirror.is_ready()
+    assert mirror.search(limit=1)[1] == sum(1 for r in records if not r["private"])
+    assert mirror.get_sibling_filenames("TheBloke/Llama-2-7B-Chat-GGUF") == [
+        "llama-2-7b-chat.Q4_K_M.gguf", "llama-2-7b-chat.Q8_0.gguf", "README.md",
+    ]
+    assert "someuser/private-experiment" not in search_ids(mirror)
+    assert search_ids(mirror)[0] == "sentence-transformers/all-MiniLM-L6-v2"  # Most downloaded
+    assert search_ids(mirror, sort_by="lastModified")[0] == records[0]["id"]
+
+
+def test_incremental_sync_stops_at_the_watermark(mirror):
+    records = catalogue()
+    added = {**records[5], "id": "facebook/bart-large-xsum", "modelId": "facebook/bart-large-xsum",
+             "lastModified": "2024-10-01T00:00:00.000Z"}
+    updated = {**records[2], "downloads": 1, "lastModified": "2024-09-30T00:00:00.000Z"}
+    # Older than the watermark: already mirrored, so neither it nor anything after it is written
+    stale = {**records[3], "likes": 0}
+    later = {**records[4], "id": "late/unseen-model", "modelId": "late/unseen-model"}
+
+    written = mirror.sync([added, updated, stale, later], incremental=True)
+
+    assert written == 2
+    assert "facebook/bart-large-xsum" in search_ids(mirror, search="bart")
+    assert search_ids(mirror, sort_by="downloads")[-1] == updated["id"]
+    assert "late/unseen-model" not in search_ids(mirror)
+    whisper = mirror.search(search="whisper", lean=True)[0][0]
+    assert whisper["likes"] == records[3]["likes"]
+    assert search_ids(mirror, sort_by="lastModified")[:3] == [added["id"], updated["id"], records[0]["id"]]
+
+
+def test_incremental_sync_into_an_empty_mirror_takes_everything(tmp_path):
+    mirror = CatalogMirror(str(tmp_path / "mirror.db"))
+    assert mirror.sync(iter_catalogue_fixture(FIXTURE), incremental=True) == len(catalogue())
+    assert not mirror.is_ready()  # Only a full sync makes the mirror answer searches
+
+
+def test_readiness_is_kept_in_memory_once_seen(tmp_path, monkeypatch):
+    path = str(tmp_path / "mirror.db")
+    syncing, reader = CatalogMirror(path), CatalogMirror(path)  # As in two worker processes
+    assert not reader.is_ready()
+
+    syncing.sync(iter_catalogue_fixture(FIXTURE), incremental=False)
+    assert syncing.is_ready()
+    assert not reader.is_ready()  # Checked again only after READY_RECHECK_SECONDS
+    reader._next_ready_check = 0.0
+    assert reader.is_ready()
+
+    monkeypatch.setattr(reader, "_get_state", lambda key: pytest.fail("queried the mirror"))
+    assert reader.is_ready()
+
+
+def test_only_one_worker_syncs_at_a_time(mirror, monkeypatch):
+    calls = []
+    monkeypatch.setattr(mirror, "sync_from_hub", lambda loop, incremental: calls.append(incremental) or 0)
+    other_worker = file_lock.open_lock_file(f"{mirror.db_path}.sync.lock")
+    try:
+        assert file_lock.try_lock(other_worker)
+        assert catalog_mirror._sync_unless_running_elsewhere(mirror, loop=None) is None
+        file_lock.unlock(other_worker)
+    finally:
+        os.close(other_worker)
+
+    assert catalog_mirror._sync_unless_running_elsewhere(mirror, loop=None) == 0
+    assert calls == [True]  # The fixture's full sync is recent, so this one is incremental
+
+
+def test_full_sync_deletes_models_no_longer_listed(mirror):
+    records = catalogue()
+    kept = [r for r in records if not r["id"].startswith("Qwen/")]
+
+    mirror.sync(kept, incremental=False)
+
+    assert search_ids(mirror, search="qwen") == []
+    assert mirror.get_sibling_filenames("Qwen/Qwen2.5-7B-Instruct") is None
+    assert mirror.search(limit=1)[1] == sum(1 for r in kept if not r["private"])
+    # The trigram index drops deleted rows too, and a re-listed model comes back
+    mirror.sync(records, incremental=False)
+    assert sorted(search_ids(mirror, search="qwen")) == ["Qwen/Qwen2.5-7B-Instruct", "Qwen/Qwen2.5-7B-Instruct-GGUF"]
+
+
+def test_trigram_search_matches_substrings_case_insensitively(mirror):
+    assert sorted(search_ids(mirror, search="LLAMA")) == [
+        "TheBloke/Llama-2-7B-Chat-GGUF", "meta-llama/Llama-3.1-8B-Instruct",
+    ]
+    # Every term must match; terms can be anywhere in the id
+    assert search_ids(mirror, search="instruct gguf") == [
+        "Qwen/Qwen2.5-7B-Instruct-GGUF", "bartowski/Mistral-7B-Instruct-v0.3-GGUF",
+    ]
+    # Terms shorter than a trigram fall back to LIKE, with wildcards taken literally
+    assert search_ids(mirror, search="xy") == ["ab/xy"]
+    assert search_ids(mirror, search="%") == []
+    assert search_ids(mirror, search='"bert') == []
+
+
+def test_search_filters_combine_with_text(mirror):
+    assert search_ids(mirror, search="instruct", pipeline_tags=["text-generation"], libraries=["transformers"]) == [
+        "meta-llama/Llama-3.1-8B-Instruct", "Qwen/Qwen2.5-7B-Instruct", "mistralai/Mistral-7B-Instruct-v0.3",
+    ]
+    assert search_ids(mirror, authors=["Qwen"], quantizations=["Q5_K_M"]) == ["Qwen/Qwen2.5-7B-Instruct-GGUF"]
+    assert search_ids(mirror, quantizations=["iq2_xs"]) == ["bartowski/Mistral-7B-Instruct-v0.3-GGUF"]
+
+
+def test_several_tasks_or_authors_in_a_query_are_ored(mirror, monkeypatch):
+    monkeypatch.setattr(catalog_mirror, "_mirror", mirror)
+
+    def query_ids(query):
+        results, total, _, _ = asyncio.run(hf_service.search_models_on_hub_paginated(query=query, page_size=50, lean=True))
+        assert total == len(results)
+        return sorted(item["id"] for item in results)
+
+    assert query_ids("translation summarization") == [
+        "Helsinki-NLP/opus-mt-en-de", "facebook/bart-large-cnn", "t5-small-org/t5-small",
+    ]
+    assert query_ids("author:Qwen author:bartowski") == [
+        "Qwen/Qwen2.5-7B-Instruct", "Qwen/Qwen2.5-7B-Instruct-GGUF", "bartowski/Mistral-7B-Instruct-v0.3-GGUF",
+    ]
+    # An explicit pipeline_tag is ORed with `task:` filters in the query
+    results, _, _, _ = asyncio.run(hf_service.search_models_on_hub_paginated(
+        query="task:translation", pipeline_tag="summarization", page_size=50, lean=True,
+    ))
+    assert len(results) == 3
+
+
+def test_cursor_paging_walks_the_mirror(mirror, monkeypatch):
+    monkeypatch.setattr(catalog_mirror, "_mirror", mirror)
+    expected, total = mirror.search(search="in", limit=100, lean=True)
+
+    async def walk():
+        seen, page, cursor = [], 1, None
+        while True:
+            results, page_total, has_more, cursor = await hf_service.search_models_on_hub_paginated(
+                query="in", page=page, page_size=3, cursor=cursor, lean=True,
+            )
+            assert page_total == total
+            seen.extend(item["id"] for item in results)
+            if not has_more:
+                assert cursor is None
+                return seen
+            page += 1
+
+    assert asyncio.run(walk()) == [item["id"] for item in expected]
+    assert total > 3
+
+
+def test_cursor_is_bound_to_its_search(mirror, monkeypatch):
+    monkeypatch.setattr(catalog_mirror, "_mirror", mirror)
+    _, _, _, cursor = asyncio.run(hf_service.search_models_on_hub_paginated(query="in", page_size=3))
+
+    with pytest.raises(hf_service.InvalidCursorError):
+        asyncio.run(hf_service.search_models_on_hub_paginated(query="in", page=2, page_size=4, cursor=cursor))
+    with pytest.raises(hf_service.InvalidCursorError):
+        asyncio.run(hf_service.search_models_on_hub_paginated(query="in", page=3, page_size=3, cursor=cursor))
@@ -0,0 +1,94 @@
+import os
+from collections import Counter
+
+import pytest
+
+from app.services import facets
+from app.services.catalog_mirror import CatalogMirror, iter_catalogue_fixture
+from app.services.facets import InvalidFacetFilterError, build_facet_index, compute_facet_counts, parse_facet_filters
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "catalogue.jsonl")
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    mirror = CatalogMirror(str(tmp_path / "mirror.db"))
+    mirror.sync(iter_catalogue_fixture(FIXTURE), incremental=False)
+    return mirror
+
+
+def expected_counts(mirror, base_rowids, facet_filters, facet):
+    """Multi-select counts by brute force: every other facet's filter applies (any value), this facet's doesn't."""
+    counts = Counter()
+    for rowid, *row in mirror.iter_facet_rows():
+        values = facets.row_facet_values(*row)
+        if base_rowids is not None and rowid not in base_rowids:
+            continue
+        if all(set(values[other]) & set(selected) for other, selected in facet_filters.items() if other != facet):
+            counts.update(values[facet])
+    for value in facet_filters.get(facet, ()):
+        counts.setdefault(value, 0)
+    return [{"value": v, "count": c} for v, c in sorted(counts.items(), key=lambda vc: (-vc[1], vc[0]))]
+
+
+def test_parse_facet_filters_normalizes_and_rejects():
+    assert parse_facet_filters(["license:mit", "task:translation", "license:apache-2.0", "license:mit",
+                                "quantization:q4_k_m"]) == {
+        "license": ["apache-2.0", "mit"], "quantization": ["Q4_K_M"], "task": ["translation"],
+    }
+    for raw in ["license", "colour:red", "task:", "quantization:fp8"]:
+        with pytest.raises(InvalidFacetFilterError):
+            parse_facet_filters([raw])
+
+
+@pytest.mark.parametrize("facet_filters", [
+    {},
+    {"license": ["apache-2.0"]},
+    {"task": ["text-generation", "translation"]},  # ORed within a facet
+    {"task": ["text-generation"], "library": ["gguf"]},  # ANDed across facets
+    {"license": ["mit", "apache-2.0"], "language": ["en"], "quantization": ["Q4_K_M"]},
+])
+def test_counts_follow_multi_select_rules(mirror, facet_filters):
+    index = build_facet_index(mirror.iter_facet_rows())
+
+    for base_filters in [{}, {"search": "instruct"}, {"libraries": ["transformers"]}]:
+        counts = compute_facet_counts(mirror, index, base_filters, facet_filters, facets.FACETS, limit=100)
+        base_rowids = set(mirror.matching_rowids(**base_filters)) if base_filters else None
+        for facet in facets.FACETS:
+            assert counts[facet] == expected_counts(mirror, base_rowids, facet_filters, facet), (base_filters, facet)
+
+
+def test_counts_match_filtered_search_totals(mirror):
+    index = build_facet_index(mirror.iter_facet_rows())
+    facet_filters = {"license": ["apache-2.0"]}
+
+    counts = compute_facet_counts(mirror, index, {}, facet_filters, ["task"], limit=100)
+
+    for entry in counts["task"]:
+        _, total = mirror.search(facet_filters={**facet_filters, "task": [entry["value"]]})
+        assert entry["count"] == total
+
+
+def test_limit_keeps_top_values_and_selected_ones(mirror):
+    index = build_facet_index(mirror.iter_facet_rows())
+
+    counts = compute_facet_counts(mirror, index, {}, {"task": ["translation"]}, ["task"], limit=1)
+
+    assert counts["task"] == [{"value": "text-generation", "count": 6}, {"value": "translation", "count": 2}]
+
+
+def test_rows_synced_after_the_index_was_built_are_left_out(mirror):
+    index = build_facet_index(mirror.iter_facet_rows())
+    before = compute_facet_counts(mirror, index, {"search": "llama"}, {}, ["task", "license"], limit=10)
+    records = list(iter_catalogue_fixture(FIXTURE))
+    added = [{**records[0], "id": f"new-org/llama-{i}", "modelId": f"new-org/llama-{i}"} for i in range(40)]
+
+    mirror.sync(added, incremental=True)
+    assert max(mirror.matching_rowids(search="llama")) >= index.size_bits
+
+    # Counted from the index's snapshot until the next rebuild
+    assert compute_facet_counts(mirror, index, {"search": "llama"}, {}, ["task", "license"], limit=10) == before
+    rebuilt = build_facet_index(mirror.iter_facet_rows())
+    after = compute_facet_counts(mirror, rebuilt, {"search": "llama"}, {}, ["task"], limit=10)
+    assert after["task"] == [{"value": "text-generation", "count": 42}]
+    assert rebuilt.generation != index.generation
@@ -0,0 +1,146 @@
+import asyncio
+import struct
+
+import httpx
+import pytest
+
+from app.core import config
+from app.services import hf_service, hub_client
+from app.services.gguf_parser import (
+    GGUFFormatError, GGUFTruncatedError, parse_gguf_header, write_gguf_header,
+)
+from benchmarks import fake_hub
+
+Q4_K, Q6_K, F32 = 12, 14, 0
+
+
+def llama_header(vocab: int = 64, version: int = 3, file_type: int = 15) -> bytes:
+    metadata = {
+        "general.architecture": "llama",
+        "general.name": "tiny-llama",
+        "general.file_type": file_type,
+        "llama.context_length": 8192,
+        "llama.block_count": 2,
+        "tokenizer.ggml.tokens": [f"tok{i}" for i in range(vocab)],
+        "tokenizer.ggml.scores": [0.5] * vocab,
+    }
+    tensors = {
+        "token_embd.weight": ((256, vocab), Q4_K),
+        "blk.0.attn_q.weight": ((256, 256), Q4_K),
+        "output_norm.weight": ((256,), F32),
+        "output.weight": ((256, vocab), Q6_K),
+    }
+    return write_gguf_header(metadata, tensors, version=version)
+
+
+@pytest.mark.parametrize("version", [1, 2, 3])
+def test_round_trip(version):
+    data = llama_header(version=version)
+
+    info, metadata = parse_gguf_header(data)
+
+    assert info.version == version
+    assert info.tensor_count == 4
+    assert info.quantization == "Q4_K_M"
+    assert info.architecture == "llama"
+    assert info.context_length == 8192
+    assert info.parameter_count == 256 * 64 + 256 * 256 + 256 + 256 * 64
+    assert info.header_bytes == len(data)
+    # The tokenizer vocabulary is skipped unless asked for
+    assert metadata == {"general.architecture": "llama", "general.name": "tiny-llama", "general.file_type": 15,
+                        "llama.context_length": 8192}
+    _, everything = parse_gguf_header(data, key_filter=lambda key: True)
+    assert everything["tokenizer.ggml.tokens"][-1] == "tok63"
+    assert everything["tokenizer.ggml.scores"] == [0.5] * 64
+
+
+def test_quantization_falls_back_to_the_dominant_tensor_type():
+    info, _ = parse_gguf_header(llama_header(file_type=999))
+    assert info.quantization == "Q4_K"
+
+
+def test_trailing_tensor_data_is_ignored():
+    data = llama_header()
+    info, _ = parse_gguf_header(data + b"\0" * 4096)
+    assert info.header_bytes == len(data)
+
+
+def test_truncated_header_reports_how_much_more_is_needed():
+    data = llama_header()
+    for cut in range(len(data)):
+        with pytest.raises(GGUFTruncatedError) as excinfo:
+            parse_gguf_header(data[:cut])
+        # A lower bound on the total, so callers always fetch more and never more than the header
+        assert cut < excinfo.value.needed <= len(data)
+
+
+def test_bad_magic_is_a_format_error():
+    data = llama_header()
+    with pytest.raises(GGUFFormatError, match="bad magic"):
+        parse_gguf_header(b"GGML" + data[4:])
+    with pytest.raises(GGUFFormatError, match="bad magic"):
+        parse_gguf_header(b"<!DOCTYPE html><html>")
+
+
+def test_unsupported_version_and_value_type_are_format_errors():
+    data = llama_header()
+    with pytest.raises(GGUFFormatError, match="version"):
+        parse_gguf_header(data[:4] + struct.pack("<I", 4) + data[8:])
+    key = b"general.weird"
+    bad_kv = struct.pack("<Q", len(key)) + key + struct.pack("<I", 99)
+    with pytest.raises(GGUFFormatError, match="value type 99"):
+        parse_gguf_header(b"GGUF" + struct.pack("<IQQ", 3, 0, 1) + bad_kv)
+
+
+def read_from_fake_hub(monkeypatch, header: bytes):
+    """
+    read_gguf_header against benchmarks.fake_hub serving `header` for .gguf files.
+    Returns (the header info or the error raised, bytes the fake Hub sent).
+    """
+    monkeypatch.setattr(fake_hub, "GGUF_HEADER", header)
+
+    async def run():
+        app = fake_hub.create_app(num_models=10, latency_ms=0)
+        client = hub_client.HubClient(endpoint="http://fake-hub.local", transport=httpx.ASGITransport(app=app))
+        monkeypatch.setattr(hub_client, "_client", client)
+        try:
+            outcome = await hf_service.read_gguf_header("org1/model-1", "model-1-Q4_K_M.gguf")
+        except GGUFFormatError as e:
+            outcome = e
+        finally:
+            await client.aclose()
+        return outcome, app.state.bytes_sent
+
+    return asyncio.run(run())
+
+
+def test_ranged_reads_grow_until_the_header_parses(monkeypatch):
+    header = llama_header(vocab=2000)
+    monkeypatch.setattr(config, "GGUF_HEADER_INITIAL_BYTES", 1024)
+
+    info, bytes_sent = read_from_fake_hub(monkeypatch, header)
+
+    assert info.header_bytes == len(header)
+    assert bytes_sent == len(header)  # Each read fetches only the missing tail
+
+
+def test_first_read_is_small_when_the_header_is(monkeypatch):
+    header = llama_header()
+    # Tensor data follows the header in a real file; none of it should be fetched beyond the first read
+    info, bytes_sent = read_from_fake_hub(monkeypatch, header + b"\0" * (4 * 1024 * 1024))
+
+    assert info.header_bytes == len(header)
+    assert bytes_sent == config.GGUF_HEADER_INITIAL_BYTES <= 256 * 1024
+
+
+def test_header_larger_than_the_bound_is_rejected(monkeypatch):
+    header = llama_header(vocab=5000)
+    monkeypatch.setattr(config, "GGUF_HEADER_INITIAL_BYTES", 1024)
+    monkeypatch.setattr(config, "GGUF_HEADER_MAX_BYTES", 16 * 1024)
+    assert len(header) > 16 * 1024
+
+    error, bytes_sent = read_from_fake_hub(monkeypatch, header)
+
+    assert isinstance(error, GGUFFormatError)
+    assert "larger than 16384 bytes" in str(error)
+    assert bytes_sent == 16 * 1024  # Reads stop at the bound instead of fetching the whole header
@@ -0,0 +1,149 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.services import hub_client
+from app.services.hub_client import HubClient, HubRateLimitedError
+from app.services.hub_scheduler import HubScheduler, Priority, use_priority
+from benchmarks.fake_hub import create_app
+
+
+def make_client(fake_hub, **kwargs) -> HubClient:
+    # Scheduling on, but loose enough that only the fake Hub's 429s hold calls back
+    scheduler = HubScheduler(rate_per_second=100.0, burst=100, default_pause_seconds=1.0)
+    return HubClient(endpoint="http://fake-hub.local", transport=httpx.ASGITransport(app=fake_hub),
+                     scheduler=scheduler, **kwargs)
+
+
+def model_url(i: int) -> str:
+    return f"/api/models/org{i % 997}/model-{i}"
+
+
+def test_429_pauses_for_retry_after_and_retries():
+    fake_hub = create_app(num_models=100, rate=1.0, burst=1)  # One call, then 429 with Retry-After: 1
+
+    async def run():
+        client = make_client(fake_hub)
+        try:
+            await client.request("GET", model_url(1))
+            started = time.monotonic()
+            response = await client.request("GET", model_url(2))
+            return response, time.monotonic() - started, client.scheduler.stats()
+        finally:
+            await client.aclose()
+
+    response, elapsed, stats = asyncio.run(run())
+
+    assert response.status_code == 200
+    assert elapsed >= 0.95  # Waited out Retry-After before the retry
+    assert fake_hub.state.requests == 3
+    assert fake_hub.state.limiter.rejected == 1
+    assert stats["credentials"]["anonymous"]["throttled_responses"] == 1
+
+
+def test_gives_up_after_max_retries():
+    fake_hub = create_app(num_models=100, rate=1.0, burst=0)  # Every call is answered 429
+
+    async def run():
+        client = make_client(fake_hub, max_retries=2)
+        try:
+            with pytest.raises(HubRateLimitedError) as excinfo:
+                await client.request("GET", model_url(1))
+            return excinfo.value
+        finally:
+            await client.aclose()
+
+    started = time.monotonic()
+    error = asyncio.run(run())
+
+    assert fake_hub.state.requests == 3  # The first attempt and two retries
+    assert error.status_code == 429
+    assert error.retry_after_seconds == 1.0
+    assert time.monotonic() - started >= 1.95  # Both retries waited for the pause
+
+
+def test_retry_after_is_honoured_without_the_scheduler():
+    fake_hub = create_app(num_models=100, rate=1.0, burst=0)
+
+    async def run():
+        client = make_client(fake_hub, max_retries=1)
+        client.scheduler.rate_per_second = 0  # Scheduling disabled: the client has to wait itself
+        try:
+            return await client.request("GET", model_url(1), raise_for_status=False)
+        finally:
+            await client.aclose()
+
+    started = time.monotonic()
+    response = asyncio.run(run())
+
+    assert response.status_code == 429
+    assert fake_hub.state.requests == 2
+    assert time.monotonic() - started >= 0.95
+
+
+def test_5xx_retries_back_off_exponentially(monkeypatch):
+    attempts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(time.monotonic())
+        return httpx.Response(503 if len(attempts) <= 2 else 200, json={})
+
+    monkeypatch.setattr(hub_client.random, "random", lambda: 0.5)  # No jitter
+
+    async def run():
+        client = HubClient(endpoint="http://fake-hub.local", transport=httpx.MockTransport(handler),
+                           scheduler=HubScheduler(rate_per_second=0), backoff_base_seconds=0.1, max_retries=3)
+        try:
+            return await client.request("GET", model_url(1))
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()).status_code == 200
+    assert len(attempts) == 3
+    # backoff_base_seconds * 2 ** attempt
+    assert attempts[1] - attempts[0] >= 0.1
+    assert attempts[2] - attempts[1] >= 0.2
+
+
+def test_calls_queued_during_a_pause_resume_in_priority_order():
+    fake_hub = create_app(num_models=100, rate=1.0, burst=1)
+    finished = []
+
+    async def call(name: str, i: int, priority: Priority) -> None:
+        await client.request("GET", model_url(i), priority=priority)
+        finished.append(name)
+
+    async def background_job(name: str, i: int) -> None:
+        with use_priority(Priority.BACKGROUND):  # Demotes the call site's INTERACTIVE
+            await call(name, i, Priority.INTERACTIVE)
+
+    async def run():
+        await client.request("GET", model_url(0))
+        throttled = asyncio.ensure_future(call("throttled", 1, Priority.BACKGROUND))  # 429, pauses the bucket
+        while not client.scheduler.stats()["credentials"]["anonymous"]["throttled_responses"]:
+            await asyncio.sleep(0.01)
+        fake_hub.state.limiter.rate = 0  # Everything after the pause succeeds
+        paused_at = time.monotonic()
+        await asyncio.gather(
+            throttled,
+            background_job("background-1", 2),
+            call("background-2", 3, Priority.BACKGROUND),
+            call("detail", 4, Priority.DETAIL),
+            call("interactive", 5, Priority.INTERACTIVE),
+        )
+        return time.monotonic() - paused_at
+
+    client = make_client(fake_hub)
+    try:
+        waited = asyncio.run(run())
+    finally:
+        asyncio.run(client.aclose())
+
+    assert waited >= 0.9  # Nothing went out during the pause
+    # Highest priority first, then the background calls in the order they were queued
+    assert finished == ["interactive", "detail", "throttled", "background-1", "background-2"]
+    priorities = client.scheduler.stats()["credentials"]["anonymous"]["priorities"]
+    assert priorities["interactive"]["granted"] == 2
+    assert priorities["background"]["granted"] == 4  # The throttled call's first attempt, its retry and two more
@@ -0,0 +1,30 @@
+import asyncio
+
+from app.services.hub_scheduler import Priority, PriorityScope, TokenBucket
+
+
+def queue_depths(bucket: TokenBucket):
+    return {name: p["queue_depth"] for name, p in bucket.stats()["priorities"].items() if p["queue_depth"]}
+
+
+def test_promotion_moves_a_queued_call_and_its_queue_depth():
+    async def run():
+        bucket = TokenBucket(rate=10.0, burst=1)
+        await bucket.acquire(Priority.INTERACTIVE, max_wait_seconds=1.0)  # Uses the only token
+        scope = PriorityScope(Priority.BACKGROUND)
+        waiter = asyncio.ensure_future(bucket.acquire(Priority.INTERACTIVE, max_wait_seconds=1.0, scope=scope))
+        await asyncio.sleep(0)
+        queued = queue_depths(bucket)
+
+        scope.promote(Priority.DETAIL)
+        promoted = queue_depths(bucket)
+        scope.promote(Priority.DETAIL)  # Already there: no second move
+        await waiter
+        return queued, promoted, bucket.stats()
+
+    queued, promoted, stats = asyncio.run(run())
+
+    assert queued == {"background": 1}
+    assert promoted == {"detail": 1}
+    assert stats["promoted_calls"] == 1
+    assert all(p["queue_depth"] == 0 for p in stats["priorities"].values())
@@ -0,0 +1,43 @@
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import hub_client
+from benchmarks.fake_hub import create_app
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake_hub = create_app(num_models=10, latency_ms=0)
+    monkeypatch.setattr(hub_client, "_client", hub_client.HubClient(
+        endpoint="http://fake-hub.local", transport=httpx.ASGITransport(app=fake_hub),
+    ))
+    return TestClient(app)  # Not entered: no startup jobs (warm-up, syncs) in these tests
+
+
+BAD_IDS = ["../whoami-v2", "org1", "org1/model-1/extra", "org1//model-1"]
+
+
+def test_malformed_ids_fail_only_their_own_items(client):
+    response = client.post("/api/models/batch", json={"model_ids": ["org2/model-2", *BAD_IDS, " org3/model-3 "]})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [item["model_id"] for item in results] == ["org2/model-2", *BAD_IDS, "org3/model-3"]
+    assert [item["status"] for item in results] == [200, 400, 400, 400, 400, 200]
+    assert results[0]["data"]["id"] == "org2/model-2"
+
+
+def test_streamed_batch_reports_malformed_ids_as_items(client):
+    response = client.post("/api/models/batch?stream=true", json={"model_ids": ["org2/model-2", "a/../b"]})
+
+    items = [json.loads(line) for line in response.text.splitlines()]
+    assert {item["model_id"]: item["status"] for item in items} == {"org2/model-2": 200, "a/../b": 400}
+
+
+def test_batch_size_is_bounded(client):
+    ids = [f"org{i}/model-{i}" for i in range(101)]
+    assert client.post("/api/models/batch", json={"model_ids": ids}).status_code == 422
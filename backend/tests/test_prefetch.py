@@ -0,0 +1,35 @@
+import asyncio
+
+import httpx
+
+from app.core import config
+from app.services import hf_service, hub_client, prefetch
+from benchmarks.fake_hub import create_app
+
+
+def test_details_prefetch_skips_gguf_header_reads(monkeypatch):
+    fake_hub = create_app(num_models=10, latency_ms=0)
+    monkeypatch.setattr(config, "PREFETCH_ENABLED", True)
+    monkeypatch.setattr(prefetch, "_prefetcher", prefetch.Prefetcher(budget_per_minute=10))
+    model_id = "org1/model-1"  # A GGUF repo
+
+    async def run():
+        client = hub_client.HubClient(endpoint="http://fake-hub.local", transport=httpx.ASGITransport(app=fake_hub))
+        monkeypatch.setattr(hub_client, "_client", client)
+        try:
+            await hf_service.details_cache.invalidate(hf_service.details_cache_key(model_id))
+            await prefetch.prefetch_after_search(
+                None, "downloads", 1, 20, None, None, True, [{"id": model_id}], False, None,
+            )
+            await asyncio.gather(*prefetch.get_prefetcher()._tasks)
+            return await hf_service.details_cache.get_fresh(hf_service.details_cache_key(model_id))
+        finally:
+            await client.aclose()
+
+    details = asyncio.run(run())
+
+    assert fake_hub.state.requests == 2  # Model info and README; no ranged reads of the .gguf file
+    assert prefetch.get_stats()["completed"] == 1
+    [gguf] = details.gguf_files
+    assert gguf.quantization == "Q4_K_M"  # From the file name
+    assert gguf.architecture is None
@@ -0,0 +1,47 @@
+from app.services.hf_service import _list_models_params, _resolve_search_filters
+from app.services.query_parser import first_filters_only, parse_query
+
+
+def test_filters_are_extracted_and_the_rest_is_free_text():
+    parsed = parse_query('llama text generation lib:Transformers quant:q4_k_m author:"meta-llama" gguf')
+
+    assert parsed.text == "llama"
+    assert parsed.pipeline_tags == ["text-generation"]
+    assert parsed.libraries == ["transformers", "gguf"]
+    assert parsed.quantizations == ["Q4_K_M"]
+    assert parsed.authors == ["meta-llama"]
+
+
+def test_library_names_that_are_also_model_names_stay_in_the_text():
+    for query in ["mistral nemo", "keras", "jax pytorch tensorflow"]:
+        parsed = parse_query(query)
+        assert parsed.text == query
+        assert parsed.libraries == []
+    assert parse_query("lib:nemo mistral").libraries == ["nemo"]
+
+
+def test_first_filters_only_puts_the_others_back_into_the_text():
+    parsed = parse_query("bert translation summarization task:fill-mask author:google author:facebook")
+
+    single = first_filters_only(parsed, ("pipeline_tags", "authors"))
+
+    assert single.pipeline_tags == ["translation"]
+    assert single.authors == ["google"]
+    assert single.text == "bert summarization fill-mask facebook"
+    assert parsed.pipeline_tags == ["translation", "summarization", "fill-mask"]  # Left as it was
+
+
+def test_hub_params_use_the_first_task_and_author():
+    assert _list_models_params(parse_query("text generation conversational"), "downloads") == {
+        "sort": "downloads", "direction": -1, "search": "conversational", "pipeline_tag": "text-generation",
+    }
+    assert _list_models_params(parse_query("llama author:a author:b"), "likes") == {
+        "sort": "likes", "direction": -1, "search": "llama b", "author": "a",
+    }
+
+
+def test_explicit_pipeline_tag_is_merged_with_task_filters():
+    parsed = _resolve_search_filters("summarization task:translation task:fill-mask", "fill-mask", None)
+
+    assert parsed.pipeline_tags == ["fill-mask", "translation"]
+    assert parsed.text == "summarization"  # Bare task keywords aren't extracted next to an explicit pipeline_tag
@@ -0,0 +1,288 @@
+import asyncio
+import os
+import pickle
+import subprocess
+import sys
+import time
+import uuid
+
+import pytest
+
+from app.core import config
+from app.services import shared_cache
+from app.services.cache import AsyncResultCache
+from app.services.shared_cache import _HEADER, Codec, RedisStore, SharedBackend, SQLiteStore
+
+PLAIN = Codec(lambda value: value, lambda data: data)
+REDIS_URL = os.getenv("HF_TEST_REDIS_URL") or "redis://localhost:6379/15"
+
+
+def redis_available() -> bool:
+    try:
+        import redis
+    except ImportError:
+        return False
+    try:
+        redis.Redis.from_url(REDIS_URL, socket_connect_timeout=0.5).ping()
+    except redis.RedisError:
+        return False
+    return True
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def make_store(request, tmp_path):
+    """Builds a store (call it inside the test's event loop); Redis tests are skipped without a server."""
+    prefix = f"test-shared-cache:{uuid.uuid4().hex}:"
+    if request.param == "sqlite":
+        path = str(tmp_path / "cache.db")
+        yield lambda: SQLiteStore(path, max_bytes=1024 * 1024, mmap_bytes=0), prefix
+        return
+    if not redis_available():
+        pytest.skip(f"no Redis server at {REDIS_URL} (set HF_TEST_REDIS_URL)")
+    yield lambda: RedisStore(REDIS_URL), prefix
+    import redis
+
+    client = redis.Redis.from_url(REDIS_URL)
+    for key in client.scan_iter(match=f"{prefix}*"):
+        client.unlink(key)
+
+
+def shared_backend(store, prefix: str, name: str = "test", lock_timeout_seconds: float = 5.0) -> SharedBackend:
+    return SharedBackend(name, lambda: store, PLAIN, prefix, lock_timeout_seconds, lock_poll_seconds=0.01)
+
+
+def test_store_round_trip_and_expiry(make_store):
+    factory, prefix = make_store
+
+    async def run():
+        store = factory()
+        try:
+            await store.set(prefix + "a", b"\x00value", time.time() + 60)
+            await store.set(prefix + "expired", b"old", time.time() - 1)
+            assert await store.get(prefix + "a") == b"\x00value"
+            assert await store.get(prefix + "expired") is None
+            assert await store.get(prefix + "missing") is None
+            await store.delete(prefix + "a")
+            assert await store.get(prefix + "a") is None
+            await store.set(prefix + "b", b"1", time.time() + 60)
+            await store.set("other:b", b"2", time.time() + 60)
+            await store.clear(prefix)
+            assert await store.get(prefix + "b") is None
+            assert await store.get("other:b") == b"2"  # Only this prefix is cleared
+            await store.delete("other:b")
+        finally:
+            await store.close()
+
+    asyncio.run(run())
+
+
+def test_backend_round_trip_keeps_freshness(make_store):
+    factory, prefix = make_store
+
+    async def run():
+        store = factory()
+        try:
+            cache = AsyncResultCache("test", ttl_seconds=60, stale_ttl_seconds=60, backend=shared_backend(store, prefix))
+            await cache.set(("search", "llama", 1), {"results": ["a/b"], "total": 1})
+            entry = await cache.backend.get(("search", "llama", 1))
+            assert entry.value == {"results": ["a/b"], "total": 1}
+            assert entry.size > 0
+            assert entry.fresh_until == pytest.approx(time.monotonic() + 60, abs=1)
+            assert entry.stale_until == pytest.approx(time.monotonic() + 120, abs=1)
+            assert await cache.get_or_load(("search", "llama", 1), lambda: pytest.fail("loaded a fresh entry"))
+        finally:
+            await store.close()
+
+    asyncio.run(run())
+
+
+WRITER = """
+import asyncio, sys, time
+from app.services.cache import CacheEntry
+from app.services.shared_cache import Codec, SharedBackend, SQLiteStore
+
+async def main():
+    store = SQLiteStore(sys.argv[1], max_bytes=1024 * 1024, mmap_bytes=0)
+    backend = SharedBackend("test", lambda: store, Codec(lambda v: v, lambda d: d), "ttl:", 5.0, 0.01)
+    now = time.monotonic()
+    await backend.set("key", CacheEntry("from another process", 0, now + 30, now + 90, now + 300))
+    await store.close()
+
+asyncio.run(main())
+"""
+
+
+def test_deadlines_survive_the_trip_to_another_process(tmp_path):
+    path = str(tmp_path / "cache.db")
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # A separate interpreter has its own time.monotonic() origin; the store must carry wall-clock deadlines
+    subprocess.run([sys.executable, "-c", WRITER, path], cwd=backend_dir, check=True, timeout=60)
+
+    async def run():
+        store = SQLiteStore(path, max_bytes=1024 * 1024, mmap_bytes=0)
+        try:
+            return await shared_backend(store, "ttl:").get("key")
+        finally:
+            await store.close()
+
+    entry = asyncio.run(run())
+    now = time.monotonic()
+    assert entry.value == "from another process"
+    # Loose bounds: the child wrote them a moment (interpreter start-up) ago
+    assert 20 < entry.fresh_until - now <= 30
+    assert 80 < entry.stale_until - now <= 90
+    assert 290 < entry.error_until - now <= 300
+
+
+def test_lock_acquire_release(make_store):
+    factory, prefix = make_store
+
+    async def run():
+        store = factory()
+        try:
+            key = prefix + "k"
+            token = await store.acquire_lock(key, 30)
+            assert token is not None
+            assert await store.acquire_lock(key, 30) is None  # Held
+            await store.release_lock(key, "not-the-holder")
+            assert await store.acquire_lock(key, 30) is None  # Only the holder's token releases it
+            await store.release_lock(key, token)
+            second = await store.acquire_lock(key, 30)
+            assert second is not None and second != token
+            await store.release_lock(key, second)
+        finally:
+            await store.close()
+
+    asyncio.run(run())
+
+
+def test_stale_lock_is_taken_over(make_store):
+    factory, prefix = make_store
+
+    async def run():
+        store = factory()
+        try:
+            key = prefix + "k"
+            dead_holder = await store.acquire_lock(key, 0.05)
+            await asyncio.sleep(0.1)
+            taken_over = await store.acquire_lock(key, 30)
+            assert taken_over is not None
+            # The old holder waking up must not release the new holder's lock
+            await store.release_lock(key, dead_holder)
+            assert await store.acquire_lock(key, 30) is None
+            await store.release_lock(key, taken_over)
+        finally:
+            await store.close()
+
+    asyncio.run(run())
+
+
+def test_single_flight_across_workers(make_store):
+    factory, prefix = make_store
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return {"loaded": True}
+
+    async def run():
+        # Two workers: each its own store connection and cache, sharing the store's contents
+        stores = [factory(), factory()]
+        try:
+            caches = [AsyncResultCache("test", ttl_seconds=60, backend=shared_backend(store, prefix)) for store in stores]
+            values = await asyncio.gather(*(cache.get_or_load("key", loader) for cache in caches))
+            return values, [cache.stats() for cache in caches]
+        finally:
+            for store in stores:
+                await store.close()
+
+    values, stats = asyncio.run(run())
+
+    assert values == [{"loaded": True}] * 2
+    assert len(calls) == 1
+    assert sorted(s["loaded_elsewhere"] for s in stats) == [0, 1]
+
+
+def test_stuck_lock_holder_is_waited_out_then_bypassed(make_store):
+    factory, prefix = make_store
+
+    async def run():
+        store = factory()
+        try:
+            backend = shared_backend(store, prefix, lock_timeout_seconds=0.2)
+            cache = AsyncResultCache("test", ttl_seconds=60, backend=backend)
+            # Another worker holds the lock and never delivers
+            await store.acquire_lock(backend._key("key"), 30)
+            started = time.monotonic()
+
+            async def loader():
+                return "loaded here"
+
+            value = await cache.get_or_load("key", loader)
+            return value, time.monotonic() - started, cache.stats()
+        finally:
+            await store.close()
+
+    value, waited, stats = asyncio.run(run())
+
+    assert value == "loaded here"
+    assert waited >= 0.2
+    assert stats["lock_waits"] == 1
+
+
+def test_entries_in_other_formats_are_rejected(make_store):
+    factory, prefix = make_store
+
+    class Boom:
+        def __reduce__(self):
+            return (pytest.fail, ("unpickled a shared cache entry",))
+
+    async def run():
+        store = factory()
+        try:
+            backend = shared_backend(store, prefix)
+            header = _HEADER.pack(time.time() + 60, time.time() + 60, time.time() + 60)
+            await store.set(backend._key("key"), header + b"p" + pickle.dumps(Boom()), time.time() + 60)
+            assert await backend.get("key") is None
+            assert await store.get(backend._key("key")) is None  # Dropped
+            return backend.stats()
+        finally:
+            await store.close()
+
+    assert asyncio.run(run())["decode_errors"] == 1
+
+
+def test_backends_reopen_the_store_after_close(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CACHE_BACKEND", "sqlite")
+    monkeypatch.setattr(config, "CACHE_SQLITE_PATH", str(tmp_path / "cache.db"))
+    monkeypatch.setattr(shared_cache, "_store", None)
+    # Built once at import, like the module-level caches, and used across two app lifespans
+    cache = AsyncResultCache("test", ttl_seconds=60, backend=shared_cache.make_backend("test", 10, 1024, PLAIN))
+
+    async def lifespan(value):
+        try:
+            await cache.set("key", value)
+            return (await cache.backend.get("key")).value
+        finally:
+            await shared_cache.close_store()
+
+    assert asyncio.run(lifespan("first")) == "first"
+    assert asyncio.run(lifespan("second")) == "second"
+    assert cache.backend.stats()["store_errors"] == 0
+
+
+def test_sqlite_prune_evicts_past_max_bytes(tmp_path):
+    async def run():
+        store = SQLiteStore(str(tmp_path / "cache.db"), max_bytes=10_000, mmap_bytes=0)
+        store.PRUNE_EVERY = 10
+        try:
+            for i in range(50):
+                await store.set(f"k{i}", b"x" * 1000, time.time() + 60 + i)
+            return store.stats("")
+        finally:
+            await store.close()
+
+    stats = asyncio.run(run())
+    assert stats["file_bytes_at_last_prune"] <= 10_000
+    assert stats["evictions"] >= 40
@@ -80,6 +80,7 @@ function HomePage() {
     
     const [currentPage, setCurrentPage] = useState(() => JSON.parse(sessionStorage.getItem(SESSION_STORAGE_KEY))?.currentPage || 1);
     const [hasNextPage, setHasNextPage] = useState(() => JSON.parse(sessionStorage.getItem(SESSION_STORAGE_KEY))?.hasNextPage || false);
+    const [nextCursor, setNextCursor] = useState(() => JSON.parse(sessionStorage.getItem(SESSION_STORAGE_KEY))?.nextCursor || null);
 
     const [displayQueryInfo, setDisplayQueryInfo] = useState(() => JSON.parse(sessionStorage.getItem(SESSION_STORAGE_KEY))?.displayQueryInfo || '');
     const [hasSearchedAtLeastOnce, setHasSearchedAtLeastOnce] = useState(() => JSON.parse(sessionStorage.getItem(SESSION_STORAGE_KEY))?.hasSearchedAtLeastOnce || false);
@@ -100,7 +101,7 @@ function HomePage() {
         });
     }, []);
 
-    const performSearch = useCallback(async (searchConfig, pageToFetch) => {
+    const performSearch = useCallback(async (searchConfig, pageToFetch, cursor = undefined) => {
         setIsLoading(true);
         const effectiveSearchConfig = { 
             query: searchConfig.query !== undefined ? searchConfig.query : currentQuery,
@@ -125,24 +126,26 @@ function HomePage() {
                 pageSize: paramsToSearch.pageSize,
                 pipelineTag: paramsToSearch.pipelineTag || undefined,
                 library: paramsToSearch.library || undefined,
+                cursor: cursor || undefined,
             };
             const data = await searchModels(apiParams);
             const newModels = data.results || [];
             const newHasNextPage = data.has_more || false;
-            setModels(newModels); setHasNextPage(newHasNextPage);
+            const newNextCursor = data.next_cursor || null;
+            setModels(newModels); setHasNextPage(newHasNextPage); setNextCursor(newNextCursor);
             setCurrentPage(pageToFetch); setDisplayQueryInfo(newDisplayQueryInfo);
             setSelectedForComparison([]); 
             const stateToSave = {
                 models: newModels, currentQuery: effectiveSearchConfig.query,
                 currentSortBy: effectiveSearchConfig.sortBy, currentPipelineTag: effectiveSearchConfig.pipelineTag,
                 currentLibrary: effectiveSearchConfig.library, currentPage: pageToFetch,
-                hasNextPage: newHasNextPage, displayQueryInfo: newDisplayQueryInfo,
+                hasNextPage: newHasNextPage, nextCursor: newNextCursor, displayQueryInfo: newDisplayQueryInfo,
                 hasSearchedAtLeastOnce: true, error: null
             };
             sessionStorage.setItem(SESSION_STORAGE_KEY, JSON.stringify(stateToSave));
         } catch (err) {
             const errorMsg = err.message || 'Failed to fetch models.';
-            setError(errorMsg); setModels([]); setHasNextPage(false);
+            setError(errorMsg); setModels([]); setHasNextPage(false); setNextCursor(null);
             setDisplayQueryInfo(newDisplayQueryInfo); setCurrentPage(pageToFetch); 
             const stateToSaveOnError = {
                 models: [], currentQuery: effectiveSearchConfig.query,
@@ -174,9 +177,9 @@ function HomePage() {
     
     const goToNextPage = useCallback(() => {
         if (hasNextPage && !isLoading) {
-            performSearch({ query: currentQuery, sortBy: currentSortBy, pipelineTag: currentPipelineTag, library: currentLibrary }, currentPage + 1);
+            performSearch({ query: currentQuery, sortBy: currentSortBy, pipelineTag: currentPipelineTag, library: currentLibrary }, currentPage + 1, nextCursor);
         }
-    }, [hasNextPage, isLoading, currentPage, currentQuery, currentSortBy, currentPipelineTag, currentLibrary, performSearch]);
+    }, [hasNextPage, isLoading, currentPage, nextCursor, currentQuery, currentSortBy, currentPipelineTag, currentLibrary, performSearch]);
 
     const goToPreviousPage = useCallback(() => {
         if (currentPage > 1 && !isLoading) {
@@ -188,7 +191,7 @@ function HomePage() {
         setCurrentQuery(DEFAULT_QUERY); setCurrentSortBy(DEFAULT_SORT_BY);
         setCurrentPipelineTag(DEFAULT_PIPELINE_TAG); setCurrentLibrary(DEFAULT_LIBRARY);
         setModels([]); setHasSearchedAtLeastOnce(false); setDisplayQueryInfo('');
-        setCurrentPage(1); setHasNextPage(false); setError(null);
+        setCurrentPage(1); setHasNextPage(false); setNextCursor(null); setError(null);
         setSelectedForComparison([]); 
         sessionStorage.removeItem(SESSION_STORAGE_KEY);
     }, []);
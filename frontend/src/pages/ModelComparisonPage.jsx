@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { useParams, Link } from 'react-router-dom';
-import { getModelDetails } from '../services/api';
+import { getModelDetailsBatch } from '../services/api';
 import ModelDetailPageContent from './ModelDetailPageContent'; // We'll create this to reuse detail rendering
 
 // --- Styles ---
@@ -49,7 +49,7 @@ function ModelComparisonPage() {
             return;
         }
 
-        const ids = modelIdsString.split(',');
+        const ids = modelIdsString.split(',').map(id => id.trim()).filter(id => id);
         if (ids.length < 2 || ids.length > 3) {
             setError("Please select 2 or 3 models to compare.");
             setIsLoading(false);
@@ -60,18 +60,19 @@ function ModelComparisonPage() {
             setIsLoading(true);
             setError(null);
             try {
-                const promises = ids.map(id => getModelDetails(id.trim()));
-                const results = await Promise.allSettled(promises);
+                // One batch request; the backend fetches the models concurrently and reports failures per item.
+                // Malformed IDs come back as 400 items and show as errored columns next to the others.
+                const results = await getModelDetailsBatch(ids);
                 
                 const fetchedModels = [];
                 const fetchErrors = [];
 
-                results.forEach((result, index) => {
-                    if (result.status === 'fulfilled') {
-                        fetchedModels.push(result.value);
+                results.forEach((result) => {
+                    if (result.status === 200 && result.data) {
+                        fetchedModels.push(result.data);
                     } else {
-                        fetchErrors.push(`Failed to load details for ${ids[index]}: ${result.reason?.message || 'Unknown error'}`);
-                        fetchedModels.push({ id: ids[index], error: result.reason?.message || 'Failed to load' }); // Add placeholder for errored model
+                        fetchErrors.push(`Failed to load details for ${result.model_id}: ${result.error || 'Unknown error'}`);
+                        fetchedModels.push({ id: result.model_id, error: result.error || 'Failed to load' }); // Add placeholder for errored model
                     }
                 });
 
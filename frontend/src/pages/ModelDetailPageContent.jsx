@@ -178,6 +178,15 @@ function ModelDetailPageContent({ modelDetails, isComparisonView = false }) {
                                      {file.quantization && file.quantization !== "Unknown" && (
                                         <span style={{...ggufDetailStyle, marginLeft: 0, marginTop: '2px', fontSize: '0.8em' }}>Quant: {file.quantization}</span>
                                     )}
+                                    {(file.architecture || file.parameter_count != null || file.context_length != null) && (
+                                        <span style={{...ggufDetailStyle, marginLeft: 0, fontSize: '0.8em' }}>
+                                            {[
+                                                file.architecture,
+                                                file.parameter_count != null && `${(file.parameter_count / 1e9).toFixed(2)}B params`,
+                                                file.context_length != null && `ctx ${file.context_length}`,
+                                            ].filter(Boolean).join(' · ')}
+                                        </span>
+                                    )}
                                 </div>
                                 <div style={{display: 'flex', alignItems: 'center', flexShrink: 0}}>
                                     {file.size_bytes != null && <span style={{...ggufDetailStyle, fontSize: '0.8em'}}>{formatBytes(file.size_bytes)}</span>}
@@ -16,6 +16,7 @@ const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://127.0.0.1:8000
  * @param {number} [params.limit=20] - Number of results to return.
  * @param {string} [params.pipelineTag] - Filter by pipeline tag.
  * @param {string} [params.library] - Filter by library.
+ * @param {string} [params.cursor] - Continuation cursor (`next_cursor`) for fetching the page after the current one.
  * @returns {Promise<object>} A promise that resolves to the search response data.
  *                            Typically { query, sortBy, limit, results: [HFModelSearchResultItem], total_results_approx }
  * @throws {Error} If the API request fails.
@@ -31,6 +32,8 @@ export const searchModels = async (params = {}) => {
 
         if (params.pipelineTag) queryParams.append('pipeline_tag', params.pipelineTag);
         if (params.library) queryParams.append('library', params.library);
+        // Cursor from the previous page's `next_cursor`; lets the backend resume instead of re-walking the listing.
+        if (params.cursor) queryParams.append('cursor', params.cursor);
 
         const requestUrl = `${API_BASE_URL}/search/models`;
         console.log(`[api.js] Making API GET request to: ${requestUrl} with params: ${queryParams.toString()}`); // Confirm this log
@@ -73,13 +76,39 @@ export const getModelDetails = async (modelId) => {
 };
 
 
-// Placeholder for autocomplete - we'll implement this later
-export const getAutocompleteSuggestions = async (query) => {
+// The batch endpoint's limit on model IDs per request
+const MODEL_BATCH_MAX_IDS = 100;
+
+/**
+ * Fetches details for several models, in requests of up to MODEL_BATCH_MAX_IDS IDs.
+ * @param {string[]} modelIds - Full model IDs (e.g. 'openai-community/gpt2').
+ * @returns {Promise<object[]>} One `{ model_id, status, data, error }` item per (de-duplicated) model ID, in request order.
+ *   IDs that aren't `author/name` pairs come back as items with status 400.
+ * @throws {Error} If a batch request itself fails. Per-model failures are reported in the items instead.
+ */
+export const getModelDetailsBatch = async (modelIds) => {
+    const uniqueIds = [...new Set(modelIds.map(id => id.trim()).filter(id => id))];
+    const chunks = [];
+    for (let i = 0; i < uniqueIds.length; i += MODEL_BATCH_MAX_IDS) {
+        chunks.push(uniqueIds.slice(i, i + MODEL_BATCH_MAX_IDS));
+    }
+    try {
+        const responses = await Promise.all(
+            chunks.map(chunk => axios.post(`${API_BASE_URL}/models/batch`, { model_ids: chunk }))
+        );
+        return responses.flatMap(response => response.data.results);
+    } catch (error) {
+        console.error("Error fetching model details batch:", error.response ? error.response.data : error.message);
+        throw error;
+    }
+};
+
+
+// Suggestions are {id, type ('model' | 'author' | 'tag'), downloads, likes}, best first
+export const getAutocompleteSuggestions = async (query, limit = 10) => {
     try {
-        // const response = await axios.get(`${API_BASE_URL}/search/autocomplete`, { params: { q: query } });
-        // return response.data;
-        console.warn(`getAutocompleteSuggestions for ${query} is not yet fully implemented.`);
-        return Promise.resolve([{id: "suggestion/one"}, {id: "suggestion/two"}]); // Placeholder
+        const response = await axios.get(`${API_BASE_URL}/search/autocomplete`, { params: { q: query, limit } });
+        return response.data;
     } catch (error) {
         console.error(`Error fetching autocomplete suggestions for ${query}:`, error.response ? error.response.data : error.message);
         throw error;